@@ -0,0 +1,138 @@
+"""
+Write-behind tracking of UserSession.last_activity.
+
+Authenticated requests record "session seen at" in a per-process buffer.
+Timestamps are rounded down to SESSION_ACTIVITY_GRANULARITY seconds, so a
+session is written at most once per bucket. The buffer is flushed as
+batched UPDATEs (one per bucket) every SESSION_ACTIVITY_FLUSH_INTERVAL
+seconds, and once more at process exit. The request that notices the
+interval has passed only starts a background thread for the flush, so no
+request waits on the UPDATEs. Entries of a failed flush go back into the
+buffer and are retried by the next one.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+UPDATE_BATCH_SIZE = 500
+# Cap on remembered flushed buckets before the map is reset
+MAX_TRACKED_SESSIONS = 50000
+
+
+def _bucket(moment, granularity):
+    ts = int(moment.timestamp())
+    return datetime.fromtimestamp(ts - ts % granularity, tz=dt_timezone.utc)
+
+
+class ActivityTracker:
+    """Buffer session activity in memory and flush it in batches."""
+
+    def __init__(self, granularity=None, flush_interval=None):
+        self.granularity = granularity or getattr(settings, 'SESSION_ACTIVITY_GRANULARITY', 60)
+        self.flush_interval = flush_interval if flush_interval is not None else getattr(
+            settings, 'SESSION_ACTIVITY_FLUSH_INTERVAL', 30
+        )
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._flushed = {}
+        self._last_flush = time.monotonic()
+        self._flushing = False
+
+    def touch(self, session_id, now=None):
+        """Record that session_id was seen; start a background flush if the interval has elapsed."""
+        bucket = _bucket(now or timezone.now(), self.granularity)
+        with self._lock:
+            if self._flushed.get(session_id) != bucket:
+                self._pending[session_id] = bucket
+            due = not self._flushing and time.monotonic() - self._last_flush >= self.flush_interval
+            if due:
+                self._flushing = True
+        if due:
+            threading.Thread(target=self._background_flush, name='session-activity-flush', daemon=True).start()
+
+    def _background_flush(self):
+        from django.db import connection
+
+        try:
+            self.flush()
+        finally:
+            self._flushing = False
+            # Django opened a connection for this thread; don't leave it behind
+            connection.close()
+
+    def last_seen(self, session_id):
+        """Most recent buffered (not yet flushed) activity for session_id, or None."""
+        with self._lock:
+            return self._pending.get(session_id)
+
+    def flush(self):
+        """Write buffered activity to the database. Returns rows updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        from .models import UserSession
+
+        by_bucket = {}
+        for session_id, bucket in pending.items():
+            by_bucket.setdefault(bucket, []).append(session_id)
+
+        updated = 0
+        try:
+            for bucket, ids in by_bucket.items():
+                for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+                    chunk = ids[start:start + UPDATE_BATCH_SIZE]
+                    updated += UserSession.objects.filter(pk__in=chunk).filter(
+                        Q(last_activity__isnull=True) | Q(last_activity__lt=bucket)
+                    ).update(last_activity=bucket)
+        except Exception as e:
+            # Rewriting rows that did make it is harmless: the UPDATE only moves last_activity forward
+            self._requeue(pending)
+            logger.error(f"Session activity flush failed, {len(pending)} entries requeued: {e}")
+            return updated
+
+        with self._lock:
+            if len(self._flushed) > MAX_TRACKED_SESSIONS:
+                self._flushed.clear()
+            self._flushed.update(pending)
+        return updated
+
+    def _requeue(self, pending):
+        with self._lock:
+            for session_id, bucket in pending.items():
+                current = self._pending.get(session_id)
+                if current is None or current < bucket:
+                    self._pending[session_id] = bucket
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker():
+    """Lazily create one tracker per process."""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = ActivityTracker()
+                atexit.register(_tracker.flush)
+    return _tracker
+
+
+def record_activity(session_id):
+    get_tracker().touch(session_id)
+
+
+def flush_activity():
+    return get_tracker().flush()
@@ -99,7 +99,7 @@ class UserSessionAdmin(admin.ModelAdmin):
         "created_at",
     )
     list_filter = ("is_active", "expires_at", "created_at")
-    search_fields = ("user__username", "user__email", "session_token")
+    search_fields = ("user__username", "user__email")
     readonly_fields = ("created_at",)
 
 
@@ -1,10 +1,10 @@
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import get_user_model
-from descope import DescopeClient
 from django.conf import settings
 from django.utils import timezone
 import logging
+from .activity import record_activity
 from .models import UserSession
 
 logger = logging.getLogger(__name__)
@@ -18,11 +18,20 @@ class DescopeAuthentication(BaseAuthentication):
     """
     
     def __init__(self):
-        self.descope_client = DescopeClient(
-            project_id=settings.DESCOPE_PROJECT_ID,
-            management_key=settings.DESCOPE_MANAGEMENT_KEY,
-            jwt_validation_leeway=JWT_LEEWAY_SECONDS
-        )
+        self._descope_client = None
+
+    @property
+    def descope_client(self):
+        # Built on first use: the SDK is slow to import, and requests without
+        # a bearer token never need it
+        if self._descope_client is None:
+            from descope import DescopeClient
+            self._descope_client = DescopeClient(
+                project_id=settings.DESCOPE_PROJECT_ID,
+                management_key=settings.DESCOPE_MANAGEMENT_KEY,
+                jwt_validation_leeway=JWT_LEEWAY_SECONDS
+            )
+        return self._descope_client
     
     def authenticate(self, request):
         """
@@ -180,8 +189,7 @@ class PasswordSessionAuthentication(BaseAuthentication):
 
         try:
             # Look up an active, non-expired session
-            session = UserSession.objects.filter(
-                session_token=token,
+            session = UserSession.objects.for_token(token).filter(
                 is_active=True,
                 expires_at__gt=timezone.now(),
             ).select_related('user').first()
@@ -193,6 +201,7 @@ class PasswordSessionAuthentication(BaseAuthentication):
             if not user.is_active:
                 return None
 
+            record_activity(session.pk)
             return (user, token)
 
         except Exception as e:
@@ -0,0 +1,47 @@
+"""
+Batched maintenance helpers for the OTP and session tables.
+
+Rows are processed in primary-key ranges so each statement touches a bounded
+number of rows and holds its locks briefly, instead of one unbounded
+UPDATE/DELETE over the whole table.
+"""
+import time
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _iter_pk_ranges(queryset, batch_size):
+    """Yield (first_pk, last_pk) ranges of matching rows, walking the pk index."""
+    last_pk = None
+    while True:
+        qs = queryset
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+        pks = list(qs.order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks[0], pks[-1]
+        if len(pks) < batch_size:
+            return
+        last_pk = pks[-1]
+
+
+def chunked_delete(queryset, batch_size=DEFAULT_BATCH_SIZE, sleep=0.0):
+    """Delete rows matching queryset in pk-range batches. Returns rows deleted."""
+    total = 0
+    for first_pk, last_pk in _iter_pk_ranges(queryset, batch_size):
+        deleted, _ = queryset.filter(pk__gte=first_pk, pk__lte=last_pk).delete()
+        total += deleted
+        if sleep:
+            time.sleep(sleep)
+    return total
+
+
+def chunked_update(queryset, values, batch_size=DEFAULT_BATCH_SIZE, sleep=0.0):
+    """Apply queryset.update(**values) in pk-range batches. Returns rows updated."""
+    total = 0
+    for first_pk, last_pk in _iter_pk_ranges(queryset, batch_size):
+        total += queryset.filter(pk__gte=first_pk, pk__lte=last_pk).update(**values)
+        if sleep:
+            time.sleep(sleep)
+    return total
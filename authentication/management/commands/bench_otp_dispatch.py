@@ -0,0 +1,55 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from authentication.otp_dispatch import FakeOTPProvider, OTPDispatcher
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare inline vs queued OTP dispatch throughput using the fake provider. "
+        "Each request worker simulates a gunicorn sync worker issuing OTP requests back to back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Total OTP requests to issue')
+        parser.add_argument('--request-workers', type=int, default=2, help='Simulated request workers')
+        parser.add_argument('--dispatch-workers', type=int, default=8, help='Background dispatch threads')
+        parser.add_argument('--latency-ms', type=int, default=250, help='Fake provider latency per send')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        request_workers = options['request_workers']
+        provider = FakeOTPProvider(latency_ms=options['latency_ms'])
+
+        self.stdout.write(
+            f"{total} requests, {request_workers} request workers, "
+            f"provider latency {options['latency_ms']} ms"
+        )
+
+        for mode in ('inline', 'queued'):
+            dispatcher = OTPDispatcher(provider=provider, max_workers=options['dispatch_workers'])
+            if mode == 'inline':
+                send = dispatcher.send_now
+            else:
+                send = dispatcher.submit
+
+            def worker(n):
+                for i in range(n):
+                    send('sms', f'+9100000{i:05d}')
+
+            per_worker = [total // request_workers] * request_workers
+            per_worker[0] += total - sum(per_worker)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=request_workers) as pool:
+                list(pool.map(worker, per_worker))
+            request_elapsed = time.perf_counter() - started
+            dispatcher.shutdown(wait=True)
+            drained_elapsed = time.perf_counter() - started
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{mode:>6}: {total / request_elapsed:10.1f} req/s accepted "
+                f"(workers busy {request_elapsed:.2f}s, all sends done after {drained_elapsed:.2f}s)"
+            ))
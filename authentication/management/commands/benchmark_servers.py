@@ -0,0 +1,59 @@
+import importlib.util
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from repairmybike import server_bench
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the app under sync gunicorn workers (WSGI) and uvicorn workers (ASGI) with the same "
+        "worker count, drive both at increasing concurrency, and report throughput, latency and "
+        "resident memory per mode."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', choices=sorted(server_bench.MODES),
+                            help='Server mode to run (repeatable); default: wsgi and asgi')
+        parser.add_argument('--workers', type=int, default=2, help='Workers per server (default matches production)')
+        parser.add_argument('--concurrency', default='1,8,32,64',
+                            help='Comma-separated concurrent client counts')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per concurrency level')
+        parser.add_argument('--path', action='append', help='Path to request (repeatable); default: health and catalog lists')
+        parser.add_argument('--port', type=int, default=8765, help='First port to bind; each mode uses the next one')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        modes = options['mode'] or ['wsgi', 'asgi']
+        if 'asgi' in modes and importlib.util.find_spec('uvicorn_worker') is None:
+            raise CommandError('ASGI mode needs uvicorn and uvicorn-worker (pip install -r requirements.txt)')
+        try:
+            levels = [int(c) for c in options['concurrency'].split(',') if c.strip()]
+        except ValueError:
+            raise CommandError('--concurrency must be a comma-separated list of integers')
+
+        try:
+            report = server_bench.compare_modes(
+                modes, options['workers'], levels, options['requests'],
+                paths=options['path'] or server_bench.DEFAULT_PATHS, port=options['port'],
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        for mode, result in report['modes'].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{mode}: {options['workers']} workers, {result['rss_mb']} MB RSS"))
+            for level in result['levels']:
+                self.stdout.write(
+                    f"  c={level['concurrency']:<4} {level['rps']:>8.1f} req/s  p50 {level['p50_ms']:8.2f} ms  "
+                    f"p95 {level['p95_ms']:8.2f} ms  p99 {level['p99_ms']:8.2f} ms  "
+                    f"req/s per 100MB {level['rps_per_100mb']}  errors {level['errors']}"
+                )
+
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from repairmybike import transaction_bench
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare blanket ATOMIC_REQUESTS with per-view transactions: throughput, latency and the "
+        "time each request holds a transaction open, for catalog reads, checkout and OTP verify "
+        "(with a simulated outbound Descope call)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workload', action='append', choices=sorted(transaction_bench.WORKLOADS),
+                            help='Workload to run (repeatable); default: all')
+        parser.add_argument('--policy', action='append', choices=transaction_bench.POLICIES,
+                            help='Transaction policy to run (repeatable); default: both')
+        parser.add_argument('--iterations', type=int, default=200, help='Iterations per workload and policy')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent clients')
+        parser.add_argument('--outbound-ms', type=int, default=50, help='Simulated Descope latency for otp_verify')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        workloads = options['workload'] or list(transaction_bench.WORKLOADS)
+        policies = options['policy'] or list(transaction_bench.POLICIES)
+        try:
+            report = transaction_bench.compare_policies(
+                workloads, iterations=options['iterations'], threads=options['threads'],
+                outbound_ms=options['outbound_ms'], policies=policies,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for policy, results in report['policies'].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{policy}:"))
+            for name, result in results.items():
+                self.stdout.write(
+                    f"  {name:<14} {result['rps']:>8.1f} req/s  p50 {result['p50_ms']:8.2f} ms  "
+                    f"p95 {result['p95_ms']:8.2f} ms  in-transaction {result['tx_ms_per_request']:8.2f} ms/req  "
+                    f"errors {result['errors']}"
+                )
+
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
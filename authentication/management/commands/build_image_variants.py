@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from repairmybike import image_variants
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the resized WebP variants (thumb, medium) of catalog images that do not have them yet, "
+        "decoding on a process pool. Run after bulk imports and after deploying new variant sizes (--force)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', choices=sorted(image_variants.TRACKED),
+                            help='Model to process (repeatable); default: all tracked models')
+        parser.add_argument('--force', action='store_true', help='Rebuild variants that already exist')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Images per bulk update')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(label, counts):
+            self.stdout.write(f"  {label}: {counts['built']} built, {counts['failed']} failed")
+
+        report = image_variants.backfill(
+            models=options['model'], force=options['force'], workers=options['workers'],
+            batch_size=options['batch_size'], on_result=progress,
+        )
+        for label, counts in report.items():
+            style = self.style.WARNING if counts['failed'] else self.style.SUCCESS
+            self.stdout.write(style(
+                f"{label}: {counts['built']} built, {counts['skipped']} up to date, {counts['failed']} failed"
+            ))
+        self.stdout.write(self.style.SUCCESS(f"Image variants done in {time.perf_counter() - started:.1f}s"))
@@ -1,6 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from authentication.models import PhoneOTP, EmailOTP, OTPAttempt
+from authentication.cleanup import DEFAULT_BATCH_SIZE, chunked_delete, chunked_update
+from authentication import partitions
 
 
 class Command(BaseCommand):
@@ -12,47 +14,67 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be deleted without actually deleting',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Rows per DELETE/UPDATE statement',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        sleep = options['sleep']
         now = timezone.now()
         
         # Clean up expired phone OTPs
         expired_phone_otps = PhoneOTP.objects.filter(expires_at__lt=now)
-        phone_count = expired_phone_otps.count()
         
         # Clean up expired email OTPs
         expired_email_otps = EmailOTP.objects.filter(expires_at__lt=now)
-        email_count = expired_email_otps.count()
         
         # Reset rate limiting for old attempts (older than 24 hours)
         old_attempts = OTPAttempt.objects.filter(
             last_attempt__lt=now - timezone.timedelta(hours=24)
         )
-        attempts_count = old_attempts.count()
         
         if dry_run:
             self.stdout.write(
                 self.style.WARNING(
-                    f'DRY RUN: Would delete {phone_count} expired phone OTPs, '
-                    f'{email_count} expired email OTPs, and reset {attempts_count} rate limiting attempts'
+                    f'DRY RUN: Would delete {expired_phone_otps.count()} expired phone OTPs, '
+                    f'{expired_email_otps.count()} expired email OTPs, and reset '
+                    f'{old_attempts.count()} rate limiting attempts'
                 )
             )
-        else:
-            # Delete expired OTPs
-            expired_phone_otps.delete()
-            expired_email_otps.delete()
-            
-            # Reset rate limiting
-            for attempt in old_attempts:
-                attempt.attempts_count = 0
-                attempt.is_blocked = False
-                attempt.blocked_until = None
-                attempt.save()
-            
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Successfully cleaned up {phone_count} expired phone OTPs, '
-                    f'{email_count} expired email OTPs, and reset {attempts_count} rate limiting attempts'
-                )
+            return
+
+        # Delete expired OTPs; partitioned tables drop whole past days first
+        for model in (PhoneOTP, EmailOTP):
+            table = model._meta.db_table
+            if partitions.is_partitioned(table):
+                dropped = partitions.drop_partitions_before(table, now)
+                partitions.ensure_partitions(table)
+                self.stdout.write(f'Dropped {dropped} expired partitions of {table}')
+        phone_count = chunked_delete(expired_phone_otps, batch_size=batch_size, sleep=sleep)
+        email_count = chunked_delete(expired_email_otps, batch_size=batch_size, sleep=sleep)
+
+        # Reset rate limiting
+        attempts_count = chunked_update(
+            old_attempts,
+            {'attempts_count': 0, 'is_blocked': False, 'blocked_until': None},
+            batch_size=batch_size,
+            sleep=sleep,
+        )
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully cleaned up {phone_count} expired phone OTPs, '
+                f'{email_count} expired email OTPs, and reset {attempts_count} rate limiting attempts'
             )
+        )
@@ -1,27 +1,74 @@
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 from authentication.models import UserSession, PhoneOTP, EmailOTP
+from authentication.cleanup import DEFAULT_BATCH_SIZE, chunked_delete, chunked_update
+from authentication import partitions
 
 
 class Command(BaseCommand):
     help = 'Deactivate expired sessions and remove stale OTP records'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Rows per DELETE/UPDATE statement',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.0,
+            help='Seconds to pause between batches',
+        )
+        parser.add_argument(
+            '--idle-days',
+            type=int,
+            default=None,
+            help='Also deactivate sessions with no activity for this many days',
+        )
+
     def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        sleep = options['sleep']
         now = timezone.now()
 
         # Deactivate sessions past expiry
         expired = UserSession.objects.filter(is_active=True, expires_at__lt=now)
-        count_expired = expired.update(is_active=False)
+        count_expired = chunked_update(expired, {'is_active': False}, batch_size=batch_size, sleep=sleep)
         self.stdout.write(self.style.SUCCESS(f'Deactivated {count_expired} expired sessions'))
 
+        if options['idle_days'] is not None:
+            idle_cutoff = now - timedelta(days=options['idle_days'])
+            idle = UserSession.objects.filter(is_active=True).filter(
+                Q(last_activity__lt=idle_cutoff) | Q(last_activity__isnull=True, created_at__lt=idle_cutoff)
+            )
+            count_idle = chunked_update(idle, {'is_active': False}, batch_size=batch_size, sleep=sleep)
+            self.stdout.write(self.style.SUCCESS(f'Deactivated {count_idle} idle sessions'))
+
         # Optional: prune very old inactive sessions (older than 30 days)
         cutoff = now - timedelta(days=30)
-        pruned, _ = UserSession.objects.filter(is_active=False, created_at__lt=cutoff).delete()
+        pruned = chunked_delete(
+            UserSession.objects.filter(is_active=False, created_at__lt=cutoff),
+            batch_size=batch_size,
+            sleep=sleep,
+        )
         self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} old inactive session rows'))
 
         # Remove OTP entries older than 7 days
         otp_cutoff = now - timedelta(days=7)
-        p_deleted, _ = PhoneOTP.objects.filter(created_at__lt=otp_cutoff).delete()
-        e_deleted, _ = EmailOTP.objects.filter(created_at__lt=otp_cutoff).delete()
-        self.stdout.write(self.style.SUCCESS(f'Deleted {p_deleted + e_deleted} stale OTP rows'))
\ No newline at end of file
+        deleted = 0
+        for model in (PhoneOTP, EmailOTP):
+            table = model._meta.db_table
+            if partitions.is_partitioned(table):
+                dropped = partitions.drop_partitions_before(table, otp_cutoff)
+                partitions.ensure_partitions(table)
+                self.stdout.write(f'Dropped {dropped} old partitions of {table}')
+            deleted += chunked_delete(
+                model.objects.filter(created_at__lt=otp_cutoff),
+                batch_size=batch_size,
+                sleep=sleep,
+            )
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} stale OTP rows'))
@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from repairmybike import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill vehicles, services, pricing, spare parts, fitments, bookings and orders with "
+        "synthetic rows for benchmarking (NumPy-generated, bulk inserted in chunks)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Approximate total rows (10k .. 10M)')
+        parser.add_argument('--chunk-size', type=int, default=synthetic.DEFAULT_CHUNK_SIZE, help='Rows per bulk_create')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same data)')
+        parser.add_argument('--reset', action='store_true', help='Delete existing synthetic rows first')
+        parser.add_argument('--purge', action='store_true', help='Only delete synthetic rows and exit')
+        parser.add_argument('--dry-run', action='store_true', help='Print the per-table plan without writing')
+
+    def handle(self, *args, **options):
+        if options['purge']:
+            synthetic.purge()
+            self.stdout.write(self.style.SUCCESS('Synthetic data removed'))
+            return
+
+        plan = synthetic.build_plan(options['rows'])
+        self.stdout.write(json.dumps({'plan': vars(plan), 'total_rows': plan.total_rows}, indent=2))
+        if options['dry_run']:
+            return
+
+        if synthetic.has_synthetic_data():
+            if not options['reset']:
+                raise CommandError('Synthetic data already present; rerun with --reset to replace it')
+            self.stdout.write('Removing previous synthetic data...')
+            synthetic.purge()
+
+        generator = synthetic.SyntheticDataGenerator(
+            plan, seed=options['seed'], chunk_size=options['chunk_size'], stdout=self.stdout,
+        )
+        timings = generator.generate()
+        seconds = sum(t['seconds'] for t in timings.values())
+        rows = sum(t['rows'] for t in timings.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Inserted {rows} synthetic rows in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)'
+        ))
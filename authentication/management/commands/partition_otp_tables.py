@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'PostgreSQL only: convert PhoneOTP/EmailOTP tables to daily created_at partitions '
+        '(with --convert) and pre-create upcoming partitions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Rebuild tables that are not partitioned yet (copies existing rows)',
+        )
+        parser.add_argument(
+            '--days-ahead',
+            type=int,
+            default=7,
+            help='Number of future daily partitions to keep created',
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_supported():
+            raise CommandError('OTP table partitioning requires PostgreSQL')
+
+        days_ahead = options['days_ahead']
+        for model in partitions.PARTITIONED_MODELS:
+            table = model._meta.db_table
+            if not partitions.is_partitioned(table):
+                if not options['convert']:
+                    self.stdout.write(self.style.WARNING(f'{table} is not partitioned; rerun with --convert'))
+                    continue
+                partitions.convert_to_partitioned(model, days_ahead=days_ahead)
+                self.stdout.write(self.style.SUCCESS(f'Converted {table} to daily partitions'))
+            created = partitions.ensure_partitions(table, days_ahead=days_ahead)
+            self.stdout.write(self.style.SUCCESS(f'{table}: created {created} missing partitions'))
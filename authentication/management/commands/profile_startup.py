@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from repairmybike import startup_profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile startup with `python -X importtime`: wall time and the most expensive imports for "
+        "`manage.py check` and for loading the WSGI application."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', choices=sorted(startup_profile.TARGETS),
+                            help='Startup path to profile (repeatable); default: all')
+        parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters per target (median wall time)')
+        parser.add_argument('--top', type=int, default=15, help='Modules/packages to list')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        try:
+            report = startup_profile.profile(options['target'], runs=options['runs'], top=options['top'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        for name, result in report.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{name}: {result['wall_ms_median']:.1f} ms wall (median of {result['runs']}), "
+                f"{result['import_ms']:.1f} ms importing {result['modules']} modules"
+            ))
+            self.stdout.write('  third-party packages (cumulative):')
+            for row in result['third_party_ms']:
+                self.stdout.write(f"    {row['package']:<32} {row['ms']:8.2f} ms")
+            self.stdout.write('  modules (self):')
+            for row in result['top_self_ms']:
+                self.stdout.write(f"    {row['module']:<48} {row['ms']:8.2f} ms")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
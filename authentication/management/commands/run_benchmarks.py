@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from repairmybike import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Run endpoint benchmark scenarios through the Django test client and write a JSON "
+        "report (p50/p95/p99 latency and queries per request) that can be diffed between commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            choices=sorted(benchmarks.SCENARIOS),
+            help='Scenario to run (repeatable); default: all',
+        )
+        parser.add_argument('--iterations', type=int, default=50, help='Measured iterations per scenario')
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument('--cold-cache', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--compare', help='Baseline JSON report to compare against')
+
+    def handle(self, *args, **options):
+        scenarios = options['scenario'] or list(benchmarks.SCENARIOS)
+        try:
+            report = benchmarks.run_benchmarks(
+                scenarios, options['iterations'], seed=options['seed'], cold_cache=options['cold_cache'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for name, summary in report['scenarios'].items():
+            self.stdout.write(
+                f"{name:>16}: p50 {summary.get('p50_ms', 0):8.2f} ms  p95 {summary.get('p95_ms', 0):8.2f} ms  "
+                f"p99 {summary.get('p99_ms', 0):8.2f} ms  queries/req {summary.get('queries_per_request', 0):6.2f}  "
+                f"errors {summary['errors']}"
+            )
+
+        if options['compare']:
+            with open(options['compare']) as fh:
+                baseline = json.load(fh)
+            for name, metric, old, new, pct in benchmarks.compare_reports(baseline, report):
+                style = self.style.ERROR if pct > 10 else self.style.SUCCESS if pct < -10 else str
+                self.stdout.write(style(f"{name:>16} {metric:<20} {old:>10} -> {new:<10} ({pct:+.1f}%)"))
+
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(payload + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
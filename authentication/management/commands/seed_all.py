@@ -19,17 +19,9 @@ class Command(BaseCommand):
         self.stdout.write("Applying migrations...")
         call_command("migrate", interactive=False)
 
-        # Vehicles
-        self.stdout.write("Loading vehicle data (motorcycle + scooter)...")
-        call_command("load_motorcycle_data")
-        call_command("load_scooter_data")
-
-        # Services and pricing
-        self.stdout.write("Loading service categories and services...")
-        call_command("load_service_categories")
-        call_command("load_major_services")
-        self.stdout.write("Loading default service pricing...")
-        call_command("load_default_service_pricing")
+        # Vehicles, services and default pricing (skipped when unchanged since the last sync)
+        self.stdout.write("Syncing catalog (vehicles, service categories, services, pricing)...")
+        call_command("sync_catalog")
 
         # Subscriptions
         self.stdout.write("Seeding subscriptions...")
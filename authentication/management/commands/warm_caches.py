@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from repairmybike import catalog_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Precompute every catalog list (vehicle types, brands per type, models per brand, '
+        'services per category, pricing per vehicle model) and write it to the cache'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            default=settings.CATALOG_BASE_URL,
+            help='Public origin (https://host) used to make media URLs absolute, as the views do',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Keys per set_many call',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Warm even when the cache is local to this process (LocMemCache)',
+        )
+
+    def handle(self, *args, **options):
+        if catalog_cache.is_process_local() and not options['force']:
+            self.stdout.write(self.style.WARNING(
+                'Default cache is process-local; entries written here would not reach the web workers. '
+                'Skipping (use --force, or WARM_CACHES_ON_FORK for per-worker warming).'
+            ))
+            return
+
+        request = None
+        if options['base_url']:
+            try:
+                request = catalog_cache.BaseUrlRequest(options['base_url'])
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        summary = catalog_cache.warm_catalog(request=request, batch_size=options['batch_size'])
+        for section, count in summary['sections'].items():
+            self.stdout.write(f'  {section:<20} {count:>6} keys')
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {summary['keys']} catalog keys in {summary['seconds']}s"
+        ))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_staffdirectory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailotp',
+            index=models.Index(fields=['expires_at'], name='authenticat_expires_3b0348_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailotp',
+            index=models.Index(fields=['created_at'], name='authenticat_created_7e0102_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otpattempt',
+            index=models.Index(fields=['last_attempt'], name='authenticat_last_at_96383f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='phoneotp',
+            index=models.Index(fields=['expires_at'], name='authenticat_expires_f994d3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='phoneotp',
+            index=models.Index(fields=['created_at'], name='authenticat_created_f824b3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['expires_at'], name='authenticat_expires_8c23d2_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:05
+
+import hashlib
+
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_token_digest(apps, schema_editor):
+    """Hash existing raw tokens into token_digest and clear them, in pk-ordered chunks."""
+    UserSession = apps.get_model('authentication', 'UserSession')
+    db_alias = schema_editor.connection.alias
+    pending = UserSession.objects.using(db_alias).filter(
+        token_digest__isnull=True, session_token__isnull=False,
+    ).order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk).only('pk', 'session_token')[:BACKFILL_BATCH_SIZE])
+        if not batch:
+            break
+        for session in batch:
+            session.token_digest = hashlib.sha256(session.session_token.encode('utf-8')).digest()
+            session.session_token = None
+        UserSession.objects.using(db_alias).bulk_update(batch, ['token_digest', 'session_token'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_cleanup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersession',
+            name='token_digest',
+            field=models.BinaryField(max_length=32, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='usersession',
+            name='session_token',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='usersession',
+            index=models.Index(fields=['user', 'is_active'], name='authenticat_user_id_f427c8_idx'),
+        ),
+        migrations.RunPython(backfill_token_digest, migrations.RunPython.noop),
+    ]
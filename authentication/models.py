@@ -1,3 +1,5 @@
+import hashlib
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
@@ -17,10 +19,19 @@ class User(AbstractUser):
         return self.phone_number or self.email or self.username
 
 
+class UserSessionQuerySet(models.QuerySet):
+    def for_token(self, token):
+        """Sessions matching a raw bearer token, looked up by its digest"""
+        return self.filter(token_digest=UserSession.hash_token(token))
+
+
 class UserSession(models.Model):
     """Track user sessions for Descope integration"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sessions')
-    session_token = models.CharField(max_length=500, unique=True)
+    # Legacy raw token column; new sessions are stored by token_digest only
+    session_token = models.CharField(max_length=500, blank=True, null=True)
+    # SHA-256 of the session token (32 bytes), the lookup key for authentication
+    token_digest = models.BinaryField(max_length=32, unique=True, null=True, editable=False)
     refresh_token = models.CharField(max_length=500, blank=True, null=True)
     expires_at = models.DateTimeField()
     is_active = models.BooleanField(default=True)
@@ -30,12 +41,23 @@ class UserSession(models.Model):
     user_agent = models.CharField(max_length=500, blank=True, null=True)
     ip_address = models.CharField(max_length=100, blank=True, null=True)
     last_activity = models.DateTimeField(blank=True, null=True)
+
+    objects = UserSessionQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['expires_at']),
+            models.Index(fields=['user', 'is_active']),
+        ]
+
+    @staticmethod
+    def hash_token(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
     
     def __str__(self):
-        return f"{self.user.email} - {self.session_token[:20]}..."
+        digest = bytes(self.token_digest).hex()[:16] if self.token_digest else '-'
+        return f"{self.user.email} - {digest}..."
 
 
 class PhoneOTP(models.Model):
@@ -52,6 +74,8 @@ class PhoneOTP(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['phone_number', 'created_at']),
+            models.Index(fields=['expires_at']),
+            models.Index(fields=['created_at']),
         ]
     
     def is_expired(self):
@@ -78,6 +102,8 @@ class EmailOTP(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['email', 'created_at']),
+            models.Index(fields=['expires_at']),
+            models.Index(fields=['created_at']),
         ]
     
     def is_expired(self):
@@ -104,6 +130,7 @@ class OTPAttempt(models.Model):
         unique_together = ['identifier', 'attempt_type']
         indexes = [
             models.Index(fields=['identifier', 'attempt_type']),
+            models.Index(fields=['last_attempt']),
         ]
     
     def is_blocked_now(self):
@@ -0,0 +1,154 @@
+"""
+OTP delivery providers and a background dispatcher.
+
+Views hand the provider round-trip to a per-process thread pool so a slow
+SMS/email provider no longer holds a gunicorn worker. Dispatch status is
+kept in the Django cache so clients can poll it by request id.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STATUS_CACHE_PREFIX = 'otp_dispatch_'
+STATUS_TTL_SECONDS = 600
+
+STATUS_QUEUED = 'queued'
+STATUS_SENDING = 'sending'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+
+
+class DescopeOTPProvider:
+    """Send OTPs through Descope (production default)."""
+
+    def send(self, channel, login_id):
+        from descope import DescopeClient, DeliveryMethod
+
+        client = DescopeClient(project_id=settings.DESCOPE_PROJECT_ID)
+        method = DeliveryMethod.SMS if channel == 'sms' else DeliveryMethod.EMAIL
+        return client.otp.sign_up_or_in(method=method, login_id=login_id)
+
+
+class FakeOTPProvider:
+    """
+    Local provider that only sleeps for a configurable latency.
+    Used for development and for benchmarking dispatch throughput.
+    """
+
+    def __init__(self, latency_ms=0, fail=False):
+        self.latency_ms = latency_ms
+        self.fail = fail
+
+    def send(self, channel, login_id):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        if self.fail:
+            raise RuntimeError('Fake OTP provider configured to fail')
+        logger.debug(f"[fake-otp] {channel} code sent to {login_id}")
+        return {'maskedAddress': login_id}
+
+
+def get_otp_provider():
+    """Build the provider selected by settings.OTP_PROVIDER."""
+    name = getattr(settings, 'OTP_PROVIDER', 'descope')
+    if name == 'fake':
+        return FakeOTPProvider(latency_ms=getattr(settings, 'OTP_FAKE_LATENCY_MS', 0))
+    return DescopeOTPProvider()
+
+
+def _status_key(request_id):
+    return f'{STATUS_CACHE_PREFIX}{request_id}'
+
+
+def get_dispatch_status(request_id):
+    """Return the stored status dict for a dispatch request, or None."""
+    return cache.get(_status_key(request_id))
+
+
+def _set_status(request_id, state, **extra):
+    payload = {
+        'request_id': request_id,
+        'status': state,
+        'updated_at': timezone.now().isoformat(),
+    }
+    payload.update(extra)
+    cache.set(_status_key(request_id), payload, STATUS_TTL_SECONDS)
+
+
+class OTPDispatcher:
+    """Run provider sends on a bounded thread pool and record their outcome."""
+
+    def __init__(self, provider=None, max_workers=4):
+        self.provider = provider or get_otp_provider()
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='otp-dispatch')
+
+    def submit(self, channel, login_id):
+        """Queue a send and return its request id immediately."""
+        request_id = uuid.uuid4().hex
+        _set_status(request_id, STATUS_QUEUED, channel=channel)
+        self._executor.submit(self._run, request_id, channel, login_id)
+        return request_id
+
+    def send_now(self, channel, login_id):
+        """Synchronous send through the same provider (used when async dispatch is off)."""
+        return self.provider.send(channel, login_id)
+
+    def _run(self, request_id, channel, login_id):
+        _set_status(request_id, STATUS_SENDING, channel=channel)
+        started = time.monotonic()
+        try:
+            self.provider.send(channel, login_id)
+        except Exception as e:
+            logger.error(f"OTP dispatch {request_id} failed: {e}")
+            _set_status(request_id, STATUS_FAILED, channel=channel, error='Failed to send verification code')
+            return
+        elapsed_ms = int((time.monotonic() - started) * 1000)
+        _set_status(request_id, STATUS_SENT, channel=channel, provider_ms=elapsed_ms)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Lazily create one dispatcher per process (after the gunicorn fork)."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = OTPDispatcher(max_workers=getattr(settings, 'OTP_DISPATCH_WORKERS', 4))
+    return _dispatcher
+
+
+def reset_dispatcher():
+    """Drop the process dispatcher so the next call picks up new settings."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            _dispatcher.shutdown(wait=False)
+        _dispatcher = None
+
+
+def dispatch_otp(channel, login_id):
+    """
+    Send an OTP according to settings.OTP_ASYNC_DISPATCH.
+    Returns the request id when queued, or None when it was sent inline.
+    Inline sends propagate provider errors to the caller.
+    """
+    dispatcher = get_dispatcher()
+    if getattr(settings, 'OTP_ASYNC_DISPATCH', False):
+        return dispatcher.submit(channel, login_id)
+    dispatcher.send_now(channel, login_id)
+    return None
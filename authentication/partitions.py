@@ -0,0 +1,184 @@
+"""
+Optional PostgreSQL time partitioning for the OTP tables.
+
+PhoneOTP and EmailOTP rows are short-lived and only ever expired in bulk, so
+on PostgreSQL they can be range-partitioned by created_at into daily
+partitions named <table>_pYYYYMMDD. Expiry then becomes DROP TABLE on whole
+partitions instead of row-by-row deletes. Everything here is a no-op on
+other database backends.
+"""
+import logging
+import re
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from .models import PhoneOTP, EmailOTP
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_MODELS = (PhoneOTP, EmailOTP)
+PARTITION_KEY = 'created_at'
+_PARTITION_RE = re.compile(r'_p(\d{8})$')
+
+
+def is_supported(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def partition_name(table, day):
+    return f'{table}_p{day:%Y%m%d}'
+
+
+def _day_bound(day):
+    return datetime.combine(day, dt_time.min, tzinfo=dt_timezone.utc).isoformat()
+
+
+def is_partitioned(table, using='default'):
+    if not is_supported(using):
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table, using='default'):
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s ORDER BY child.relname",
+            [table],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _create_partition(cursor, qn, table, name, bounds, existing):
+    """Create one daily partition, first moving rows for its day out of the DEFAULT partition."""
+    default = default_partition_name(table)
+    if default in existing:
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {qn(default)} "
+            f"WHERE {qn(PARTITION_KEY)} >= %s AND {qn(PARTITION_KEY)} < %s)",
+            bounds,
+        )
+        if cursor.fetchone()[0]:
+            # PostgreSQL refuses a partition whose range the DEFAULT partition already holds rows for.
+            # DETACH locks the parent, so concurrent inserts wait instead of failing.
+            cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(default)}")
+            cursor.execute(
+                f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)", bounds,
+            )
+            cursor.execute(
+                f"INSERT INTO {qn(table)} OVERRIDING SYSTEM VALUE SELECT * FROM {qn(default)} "
+                f"WHERE {qn(PARTITION_KEY)} >= %s AND {qn(PARTITION_KEY)} < %s",
+                bounds,
+            )
+            moved = cursor.rowcount
+            cursor.execute(
+                f"DELETE FROM {qn(default)} WHERE {qn(PARTITION_KEY)} >= %s AND {qn(PARTITION_KEY)} < %s", bounds,
+            )
+            cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(default)} DEFAULT")
+            logger.info(f"Moved {moved} rows of {table} from its DEFAULT partition into {name}")
+            return
+    cursor.execute(f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)", bounds)
+
+
+def ensure_partitions(table, days_ahead=7, start=None, using='default'):
+    """
+    Create the missing daily partitions from start (default: today, UTC)
+    through today + days_ahead. Rows that already landed in the DEFAULT
+    partition for such a day are moved into the new partition. A day that
+    still fails is logged and skipped. Returns the partitions created.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    day = start or today
+    existing = set(list_partitions(table, using=using))
+    created = 0
+    with connection.cursor() as cursor:
+        while day <= today + timedelta(days=days_ahead):
+            name = partition_name(table, day)
+            if name not in existing:
+                bounds = [_day_bound(day), _day_bound(day + timedelta(days=1))]
+                try:
+                    with transaction.atomic(using=using):
+                        _create_partition(cursor, qn, table, name, bounds, existing)
+                except DatabaseError as e:
+                    logger.error(f"Could not create partition {name}: {e}")
+                else:
+                    existing.add(name)
+                    created += 1
+            day += timedelta(days=1)
+    return created
+
+
+def drop_partitions_before(table, cutoff, using='default'):
+    """Drop daily partitions whose whole range lies before cutoff. Returns partitions dropped."""
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    cutoff_day = cutoff.astimezone(dt_timezone.utc).date()
+    dropped = 0
+    with connection.cursor() as cursor:
+        for name in list_partitions(table, using=using):
+            match = _PARTITION_RE.search(name)
+            if not match:
+                continue
+            day = datetime.strptime(match.group(1), '%Y%m%d').date()
+            if day + timedelta(days=1) <= cutoff_day:
+                cursor.execute(f"DROP TABLE {qn(name)}")
+                dropped += 1
+    return dropped
+
+
+def convert_to_partitioned(model, days_ahead=7, using='default'):
+    """
+    Rebuild model's table as a range-partitioned table on created_at.
+    The primary key becomes (id, created_at), as PostgreSQL requires the
+    partition key in every unique constraint; ids keep coming from the
+    table's identity sequence. Runs in one transaction.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    legacy = f'{table}_legacy'
+
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+            cursor.execute(
+                f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+                f"PARTITION BY RANGE ({qn(PARTITION_KEY)})"
+            )
+            cursor.execute(f"CREATE TABLE {qn(default_partition_name(table))} PARTITION OF {qn(table)} DEFAULT")
+            cursor.execute(f"SELECT MIN({qn(PARTITION_KEY)}) FROM {qn(legacy)}")
+            oldest = cursor.fetchone()[0]
+
+        start = oldest.astimezone(dt_timezone.utc).date() if oldest else None
+        ensure_partitions(table, days_ahead=days_ahead, start=start, using=using)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {qn(table)} OVERRIDING SYSTEM VALUE SELECT * FROM {qn(legacy)}")
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1)) FROM {qn(table)}",
+                [table],
+            )
+            cursor.execute(f"DROP TABLE {qn(legacy)}")
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, {qn(PARTITION_KEY)})")
+
+        with connection.schema_editor(atomic=False) as editor:
+            for index in model._meta.indexes:
+                editor.add_index(model, index)
+
+    logger.info(f"Converted {table} to daily partitions on {PARTITION_KEY}")
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import staff_directory
+from .models import StaffDirectory
+
+
+@receiver(post_save, sender=StaffDirectory)
+@receiver(post_delete, sender=StaffDirectory)
+def refresh_staff_directory(sender, instance, **kwargs):
+    # After commit: a worker rebuilding earlier would read the old rows and keep them for SNAPSHOT_MAX_AGE_SECONDS
+    transaction.on_commit(staff_directory.bump_version)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def refresh_staff_directory_for_user(sender, instance, update_fields=None, **kwargs):
+    # Login bookkeeping does not change who is staff
+    if update_fields and set(update_fields) <= {'last_login', 'updated_at'}:
+        return
+    if instance.is_staff or instance.is_superuser or staff_directory.contains_user(instance.pk):
+        transaction.on_commit(staff_directory.bump_version)
@@ -0,0 +1,122 @@
+"""
+Per-worker snapshot of staff identities for the staff/admin login views.
+
+The snapshot maps normalized identifiers (email, phone number, username of
+staff/superusers, plus active StaffDirectory entries) to a StaffEntry. It
+is immutable once built and is replaced wholesale when the shared version
+counter in the cache changes. Saves to StaffDirectory or to staff users
+bump that counter through signals, so every worker reloads lazily on its
+next login.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import StaffDirectory
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'staff_directory_version'
+# Rebuild at least this often even if no version bump was seen (e.g. per-process caches)
+SNAPSHOT_MAX_AGE_SECONDS = 300
+
+StaffEntry = namedtuple(
+    'StaffEntry',
+    ['user_id', 'username', 'is_staff', 'is_superuser', 'directory_name'],
+)
+
+
+def normalize_identifier(identifier):
+    """Lower-case emails and drop spaces/dashes from phone numbers."""
+    value = (identifier or '').strip()
+    if '@' in value:
+        return value.lower()
+    return value.replace(' ', '').replace('-', '')
+
+
+class _Snapshot:
+    def __init__(self, entries, version):
+        self.entries = entries
+        self.version = version
+        self.built_at = time.monotonic()
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def _current_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_CACHE_KEY, version, None)
+    return version
+
+
+def bump_version():
+    """Invalidate the snapshot in every worker sharing this cache."""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 2, None)
+    with _snapshot_lock:
+        global _snapshot
+        _snapshot = None
+
+
+def build_snapshot(version=None):
+    User = get_user_model()
+    entries = {}
+
+    users = User.objects.filter(Q(is_staff=True) | Q(is_superuser=True), is_active=True).values(
+        'id', 'username', 'email', 'phone_number', 'is_staff', 'is_superuser'
+    )
+    for row in users:
+        entry = StaffEntry(row['id'], row['username'], row['is_staff'], row['is_superuser'], None)
+        for identifier in (row['username'], row['email'], row['phone_number']):
+            if identifier:
+                entries.setdefault(normalize_identifier(identifier), entry)
+
+    for identifier, name in StaffDirectory.objects.filter(is_active=True).values_list('identifier', 'name'):
+        entries.setdefault(normalize_identifier(identifier), StaffEntry(None, None, False, False, name or ''))
+
+    return _Snapshot(MappingProxyType(entries), version)
+
+
+def get_snapshot():
+    """Return the current snapshot, rebuilding it if stale."""
+    global _snapshot
+    version = _current_version()
+    snapshot = _snapshot
+    if (
+        snapshot is None
+        or snapshot.version != version
+        or time.monotonic() - snapshot.built_at > SNAPSHOT_MAX_AGE_SECONDS
+    ):
+        with _snapshot_lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot.version != version or (
+                time.monotonic() - snapshot.built_at > SNAPSHOT_MAX_AGE_SECONDS
+            ):
+                snapshot = build_snapshot(version)
+                _snapshot = snapshot
+                logger.debug(f"Staff directory snapshot v{version} built with {len(snapshot.entries)} identifiers")
+    return snapshot
+
+
+def resolve(identifier):
+    """Look up a login identifier; returns a StaffEntry or None."""
+    return get_snapshot().entries.get(normalize_identifier(identifier))
+
+
+def contains_user(user_id):
+    snapshot = _snapshot
+    if snapshot is None:
+        return False
+    return any(entry.user_id == user_id for entry in snapshot.entries.values())
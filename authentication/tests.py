@@ -1,3 +1,200 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .activity import ActivityTracker, flush_activity
+from .authentication import PasswordSessionAuthentication
+from . import staff_directory
+from .models import PhoneOTP, OTPAttempt, StaffDirectory, User, UserSession
+from .views import _lookup_staff_user
+from .otp_dispatch import reset_dispatcher
+
+
+@override_settings(OTP_PROVIDER='fake', OTP_FAKE_LATENCY_MS=0, OTP_ASYNC_DISPATCH=True)
+class OTPDispatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_dispatcher()
+
+    def tearDown(self):
+        reset_dispatcher()
+
+    def test_request_is_queued_and_status_can_be_polled(self):
+        resp = self.client.post(
+            reverse('unified-otp-request'),
+            {'identifier': 'rider@example.com', 'method': 'email'},
+            content_type='application/json',
+        )
+        self.assertEqual(resp.status_code, 202)
+        request_id = resp.json()['request_id']
+
+        status_url = reverse('otp-dispatch-status', args=[request_id])
+        for _ in range(50):
+            data = self.client.get(status_url).json()
+            if data['status'] == 'sent':
+                break
+            time.sleep(0.01)
+        self.assertEqual(data['status'], 'sent')
+
+    def test_unknown_request_id_returns_404(self):
+        resp = self.client.get(reverse('otp-dispatch-status', args=['missing']))
+        self.assertEqual(resp.status_code, 404)
+
+
+class CleanupCommandTests(TestCase):
+    def test_cleanup_otp_runs_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            PhoneOTP.objects.create(phone_number=f'+91980000000{i}', otp_code='****', expires_at=now - timedelta(minutes=1))
+        live = PhoneOTP.objects.create(phone_number='+919800000009', otp_code='****', expires_at=now + timedelta(minutes=5))
+        OTPAttempt.objects.create(
+            identifier='+919800000001', attempt_type='phone', attempts_count=10,
+            is_blocked=True, last_attempt=now - timedelta(days=2),
+        )
+
+        call_command('cleanup_otp', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(list(PhoneOTP.objects.values_list('id', flat=True)), [live.id])
+        attempt = OTPAttempt.objects.get()
+        self.assertEqual(attempt.attempts_count, 0)
+        self.assertFalse(attempt.is_blocked)
+
+
+class SessionTokenDigestTests(TestCase):
+    def test_session_is_stored_and_found_by_digest(self):
+        user = User.objects.create_user(username='digest', email='digest@example.com', password='x')
+        UserSession.objects.create(
+            user=user,
+            token_digest=UserSession.hash_token('raw-token'),
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        session = UserSession.objects.get()
+        self.assertIsNone(session.session_token)
+        self.assertEqual(len(bytes(session.token_digest)), 32)
+
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer raw-token')
+        self.assertEqual(PasswordSessionAuthentication().authenticate(request), (user, 'raw-token'))
+
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer other-token')
+        self.assertIsNone(PasswordSessionAuthentication().authenticate(request))
+        # Authentication buffered the session's activity
+        flush_activity()
+        self.assertIsNotNone(UserSession.objects.get().last_activity)
+
+
+class SessionActivityTests(TestCase):
+    def test_activity_is_buffered_then_flushed_in_buckets(self):
+        user = User.objects.create_user(username='active', email='active@example.com', password='x')
+        session = UserSession.objects.create(
+            user=user,
+            token_digest=UserSession.hash_token('activity-token'),
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        tracker = ActivityTracker(granularity=60, flush_interval=3600)
+        seen_at = timezone.now()
+        tracker.touch(session.pk, now=seen_at)
+        tracker.touch(session.pk, now=seen_at)
+
+        session.refresh_from_db()
+        self.assertIsNone(session.last_activity)
+        self.assertIsNotNone(tracker.last_seen(session.pk))
+
+        self.assertEqual(tracker.flush(), 1)
+        session.refresh_from_db()
+        self.assertLessEqual(session.last_activity, seen_at)
+        self.assertLess(seen_at - session.last_activity, timedelta(seconds=60))
+
+        # Same bucket again: nothing new to write
+        tracker.touch(session.pk, now=seen_at)
+        self.assertEqual(tracker.flush(), 0)
+
+    def test_due_flush_runs_off_the_request_and_failed_flush_is_requeued(self):
+        user = User.objects.create_user(username='retry', email='retry@example.com', password='x')
+        session = UserSession.objects.create(
+            user=user,
+            token_digest=UserSession.hash_token('retry-token'),
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        tracker = ActivityTracker(granularity=60, flush_interval=0)
+        with mock.patch('authentication.activity.threading.Thread') as thread, self.assertNumQueries(0):
+            tracker.touch(session.pk)
+            # A flush is already under way: no second thread
+            tracker.touch(session.pk)
+        thread.assert_called_once_with(target=tracker._background_flush, name='session-activity-flush', daemon=True)
+
+        with mock.patch.object(UserSession.objects, 'filter', side_effect=RuntimeError('database is down')):
+            self.assertEqual(tracker.flush(), 0)
+        self.assertIsNotNone(tracker.last_seen(session.pk))
+
+        self.assertEqual(tracker.flush(), 1)
+        session.refresh_from_db()
+        self.assertIsNotNone(session.last_activity)
+
+
+class StaffDirectorySnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        staff_directory.bump_version()
+
+    def test_snapshot_resolves_identifiers_and_refreshes_on_save(self):
+        User.objects.create_user(
+            username='tech1', email='Tech1@Example.com', phone_number='+919800011111',
+            password='pw', is_staff=True,
+        )
+        User.objects.create_user(username='customer', email='customer@example.com', password='pw')
+
+        self.assertEqual(staff_directory.resolve(' tech1@example.com ').username, 'tech1')
+        self.assertEqual(staff_directory.resolve('+91 98000-11111').username, 'tech1')
+        self.assertIsNone(staff_directory.resolve('customer@example.com'))
+
+        with self.assertNumQueries(0):
+            staff_directory.resolve('tech1@example.com')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StaffDirectory.objects.create(identifier='new@example.com', name='New Hire')
+        self.assertEqual(staff_directory.resolve('new@example.com').directory_name, 'New Hire')
+
+    def test_snapshot_is_invalidated_only_after_commit(self):
+        entry = StaffDirectory.objects.create(identifier='leaver@example.com', name='Leaver')
+        self.assertIsNotNone(staff_directory.resolve('leaver@example.com'))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                entry.is_active = False
+                entry.save()
+                # Not committed yet: other workers must keep serving (and not rebuild from) the old rows
+                self.assertIsNotNone(staff_directory.resolve('leaver@example.com'))
+            self.assertIsNotNone(staff_directory.resolve('leaver@example.com'))
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(staff_directory.resolve('leaver@example.com'))
+
+    def test_staff_password_login_by_email_uses_snapshot(self):
+        User.objects.create_user(username='tech2', email='tech2@example.com', password='pw', is_staff=True)
+        resp = self.client.post(
+            reverse('staff-password-login'),
+            {'identifier': 'tech2@example.com', 'password': 'pw'},
+            content_type='application/json',
+            secure=True,
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['user']['username'], 'tech2')
+
+    def test_admin_lookup_rechecks_superuser_against_database(self):
+        admin = User.objects.create_user(
+            username='admin1', email='Admin1@Example.com', password='pw', is_staff=True, is_superuser=True,
+        )
+        self.assertEqual(_lookup_staff_user('admin1@example.com', superuser_only=True), admin)
+
+        # QuerySet.update() skips post_save, so the warm snapshot still says superuser
+        User.objects.filter(pk=admin.pk).update(is_superuser=False)
+        self.assertTrue(staff_directory.resolve('admin1@example.com').is_superuser)
+        self.assertIsNone(_lookup_staff_user('admin1@example.com', superuser_only=True))
+        self.assertEqual(_lookup_staff_user('admin1@example.com'), admin)
@@ -22,6 +22,7 @@ urlpatterns = [
     # Unified OTP authentication endpoints (recommended)
     path('otp/request/', views.UnifiedOTPRequestView.as_view(), name='unified-otp-request'),
     path('otp/verify/', views.UnifiedOTPVerifyView.as_view(), name='unified-otp-verify'),
+    path('otp/status/<str:request_id>/', views.otp_dispatch_status, name='otp-dispatch-status'),
     
     # User profile endpoints
     path('profile/', views.UserProfileView.as_view(), name='user-profile'),
@@ -13,7 +13,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.generics import RetrieveUpdateAPIView
-from descope import DescopeClient, DeliveryMethod, SESSION_TOKEN_NAME, REFRESH_SESSION_TOKEN_NAME
+from repairmybike.transactions import NonAtomicRequestsMixin
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, UserLoginSerializer,
     PasswordResetSerializer, PasswordResetConfirmSerializer,
@@ -26,6 +26,9 @@ from .serializers import (
 )
 from .models import UserSession, PhoneOTP, EmailOTP, OTPAttempt, StaffDirectory
 from .authentication import DescopeAuthentication
+from .activity import get_tracker
+from . import staff_directory
+from .otp_dispatch import dispatch_otp, get_dispatch_status
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +38,7 @@ JWT_LEEWAY_SECONDS = 30  # allow 30 seconds clock skew
 
 def create_descope_client():
     """Create DescopeClient with increased jwt_validation_leeway."""
+    from descope import DescopeClient
     return DescopeClient(
         project_id=settings.DESCOPE_PROJECT_ID,
         jwt_validation_leeway=JWT_LEEWAY_SECONDS
@@ -43,7 +47,51 @@ def create_descope_client():
 User = get_user_model()
 
 
-class UserRegistrationView(APIView):
+def _otp_sent_response(payload, request_id):
+    """200 for inline sends; 202 with a pollable request id when the send was queued."""
+    if request_id is None:
+        return Response(payload, status=status.HTTP_200_OK)
+    payload.update({
+        'request_id': request_id,
+        'dispatch_status': 'queued',
+    })
+    return Response(payload, status=status.HTTP_202_ACCEPTED)
+
+
+def _lookup_staff_user(identifier, superuser_only=False):
+    """Resolve a staff identifier via the in-memory snapshot, falling back to the DB on a miss.
+
+    The snapshot may be stale, so it only locates the row; active and
+    superuser status are always checked against the database.
+    """
+    filters = {'is_active': True}
+    if superuser_only:
+        filters['is_superuser'] = True
+    entry = staff_directory.resolve(identifier)
+    if entry is not None and entry.user_id is not None:
+        user = User.objects.filter(pk=entry.user_id, **filters).first()
+        if user is not None:
+            return user
+    return User.objects.filter(Q(email__iexact=identifier) | Q(phone_number=identifier), **filters).first()
+
+
+def _authenticate_staff(request, identifier, password):
+    """Password-authenticate by username, email or phone; known staff map straight to their username."""
+    entry = staff_directory.resolve(identifier)
+    if entry is not None and entry.username:
+        return authenticate(request, username=entry.username, password=password)
+
+    user = authenticate(request, username=identifier, password=password)
+    if not user:
+        try:
+            candidate = User.objects.get(email=identifier)
+            user = authenticate(request, username=candidate.username, password=password)
+        except User.DoesNotExist:
+            user = None
+    return user
+
+
+class UserRegistrationView(NonAtomicRequestsMixin, APIView):
     """Handle user registration using Descope"""
     permission_classes = [permissions.AllowAny]
     
@@ -88,7 +136,7 @@ class UserRegistrationView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserLoginView(APIView):
+class UserLoginView(NonAtomicRequestsMixin, APIView):
     """Handle user login using Descope"""
     permission_classes = [permissions.AllowAny]
     
@@ -136,7 +184,7 @@ class UserLoginView(APIView):
             return user, True
 
 
-class UserLogoutView(APIView):
+class UserLogoutView(NonAtomicRequestsMixin, APIView):
     """Handle user logout"""
     
     def post(self, request):
@@ -165,7 +213,7 @@ class UserLogoutView(APIView):
                 UserSession.objects.filter(refresh_token=refresh_token).update(is_active=False)
             elif session_token:
                 # If only session token is provided, deactivate locally
-                UserSession.objects.filter(session_token=session_token).update(is_active=False)
+                UserSession.objects.for_token(session_token).update(is_active=False)
 
             return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
 
@@ -188,7 +236,7 @@ class UserProfileView(RetrieveUpdateAPIView):
         return UserSerializer
 
 
-class PasswordResetView(APIView):
+class PasswordResetView(NonAtomicRequestsMixin, APIView):
     """Handle password reset requests"""
     permission_classes = [permissions.AllowAny]
     
@@ -215,7 +263,7 @@ class PasswordResetView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PasswordResetConfirmView(APIView):
+class PasswordResetConfirmView(NonAtomicRequestsMixin, APIView):
     """Handle password reset confirmation"""
     permission_classes = [permissions.AllowAny]
     
@@ -247,12 +295,14 @@ class PasswordResetConfirmView(APIView):
 def user_sessions(request):
     """Get user's active sessions"""
     sessions = UserSession.objects.filter(user=request.user, is_active=True)
+    tracker = get_tracker()
     return Response({
         'sessions': [
             {
                 'id': session.id,
                 'created_at': session.created_at,
                 'expires_at': session.expires_at,
+                'last_activity': tracker.last_seen(session.id) or session.last_activity,
                 'is_active': session.is_active
             }
             for session in sessions
@@ -279,7 +329,7 @@ def revoke_session(request, session_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
-class PhoneOTPRequestView(APIView):
+class PhoneOTPRequestView(NonAtomicRequestsMixin, APIView):
     """Handle phone OTP request using Descope"""
     permission_classes = [permissions.AllowAny]
     
@@ -287,7 +337,6 @@ class PhoneOTPRequestView(APIView):
         serializer = PhoneOTPRequestSerializer(data=request.data)
         if serializer.is_valid():
             try:
-                descope_client = create_descope_client()
                 phone_number = serializer.validated_data['phone_number']
                 
                 # Check if phone number is rate limited
@@ -317,12 +366,9 @@ class PhoneOTPRequestView(APIView):
                         status=status.HTTP_429_TOO_MANY_REQUESTS
                     )
                 
-                # Send OTP via Descope
+                # Send OTP via the configured provider (queued when async dispatch is on)
                 try:
-                    auth_response = descope_client.otp.sign_up_or_in(
-                        method=DeliveryMethod.SMS,
-                        login_id=phone_number
-                    )
+                    request_id = dispatch_otp('sms', phone_number)
                 except Exception as descope_error:
                     logger.error(f"Descope OTP error: {str(descope_error)}")
                     return Response(
@@ -356,11 +402,11 @@ class PhoneOTPRequestView(APIView):
                     attempt_rec.blocked_until = timezone.now() + timezone.timedelta(minutes=30)
                 attempt_rec.save()
                 
-                return Response({
+                return _otp_sent_response({
                     'message': 'Verification code sent successfully',
                     'phone_number': phone_number,
                     'expires_in': 300  # 5 minutes
-                }, status=status.HTTP_200_OK)
+                }, request_id)
                 
             except Exception as e:
                 logger.error(f"OTP request failed: {str(e)}")
@@ -372,11 +418,12 @@ class PhoneOTPRequestView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PhoneOTPVerifyView(APIView):
+class PhoneOTPVerifyView(NonAtomicRequestsMixin, APIView):
     """Handle phone OTP verification using Descope"""
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
+        from descope import DescopeClient, DeliveryMethod, SESSION_TOKEN_NAME, REFRESH_SESSION_TOKEN_NAME
         serializer = PhoneOTPVerifySerializer(data=request.data)
         if serializer.is_valid():
             try:
@@ -406,7 +453,7 @@ class PhoneOTPVerifyView(APIView):
                         refresh_jwt = auth_response[REFRESH_SESSION_TOKEN_NAME]["jwt"]
                         UserSession.objects.update_or_create(
                             user=user,
-                            session_token=session_jwt,
+                            token_digest=UserSession.hash_token(session_jwt),
                             defaults={
                                 'refresh_token': refresh_jwt,
                                 'expires_at': timezone.now() + timedelta(hours=8),
@@ -473,11 +520,12 @@ class PhoneOTPVerifyView(APIView):
         return user, True
 
 
-class PhoneLoginView(APIView):
+class PhoneLoginView(NonAtomicRequestsMixin, APIView):
     """Handle phone-based login with OTP"""
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
+        from descope import DescopeClient, DeliveryMethod, SESSION_TOKEN_NAME, REFRESH_SESSION_TOKEN_NAME
         serializer = PhoneLoginSerializer(data=request.data)
         if serializer.is_valid():
             try:
@@ -501,7 +549,7 @@ class PhoneLoginView(APIView):
                         refresh_jwt = auth_response[REFRESH_SESSION_TOKEN_NAME]["jwt"]
                         UserSession.objects.update_or_create(
                             user=user,
-                            session_token=session_jwt,
+                            token_digest=UserSession.hash_token(session_jwt),
                             defaults={
                                 'refresh_token': refresh_jwt,
                                 'expires_at': timezone.now() + timedelta(hours=8),
@@ -575,11 +623,12 @@ def phone_verification_status(request):
     })
 
 
-class StaffLoginView(APIView):
+class StaffLoginView(NonAtomicRequestsMixin, APIView):
     """OTP-based login for staff users (is_staff or is_superuser)."""
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
+        from descope import DescopeClient, DeliveryMethod, SESSION_TOKEN_NAME, REFRESH_SESSION_TOKEN_NAME
         serializer = StaffOtpLoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -602,20 +651,17 @@ class StaffLoginView(APIView):
                 return Response({'error': 'Invalid OTP code'}, status=status.HTTP_401_UNAUTHORIZED)
 
             # Only allow existing staff/admin users
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            qs = User.objects.filter(
-                (Q(email=identifier) | Q(phone_number=identifier)),
-                is_active=True
-            )
-            try:
-                user = qs.get()
-            except User.DoesNotExist:
+            user = _lookup_staff_user(identifier)
+            if user is None:
                 # Just-in-time provision staff user if present in StaffDirectory
-                try:
-                    directory_entry = StaffDirectory.objects.get(identifier=identifier, is_active=True)
-                except StaffDirectory.DoesNotExist:
-                    return Response({'error': 'User not found or not permitted'}, status=status.HTTP_403_FORBIDDEN)
+                entry = staff_directory.resolve(identifier)
+                if entry is not None and entry.directory_name is not None:
+                    directory_name = entry.directory_name
+                else:
+                    try:
+                        directory_name = StaffDirectory.objects.get(identifier=identifier, is_active=True).name
+                    except StaffDirectory.DoesNotExist:
+                        return Response({'error': 'User not found or not permitted'}, status=status.HTTP_403_FORBIDDEN)
 
                 # Determine username and fields based on identifier type
                 username = identifier
@@ -623,8 +669,8 @@ class StaffLoginView(APIView):
                 phone_number = '' if '@' in identifier else identifier
                 first_name = ''
                 last_name = ''
-                if directory_entry.name:
-                    parts = directory_entry.name.split(' ', 1)
+                if directory_name:
+                    parts = directory_name.split(' ', 1)
                     first_name = parts[0]
                     last_name = parts[1] if len(parts) > 1 else ''
 
@@ -648,7 +694,7 @@ class StaffLoginView(APIView):
                 refresh_jwt = auth_response[REFRESH_SESSION_TOKEN_NAME]["jwt"]
                 UserSession.objects.update_or_create(
                     user=user,
-                    session_token=session_jwt,
+                    token_digest=UserSession.hash_token(session_jwt),
                     defaults={
                         'refresh_token': refresh_jwt,
                         'expires_at': timezone.now() + timedelta(hours=8),
@@ -686,14 +732,7 @@ class StaffPasswordLoginView(APIView):
         password = serializer.validated_data['password']
         device_id = serializer.validated_data.get('device_id')
 
-        user = authenticate(request, username=identifier, password=password)
-        if not user:
-            try:
-                candidate = User.objects.get(email=identifier)
-                user = authenticate(request, username=candidate.username, password=password)
-            except User.DoesNotExist:
-                user = None
-
+        user = _authenticate_staff(request, identifier, password)
         if not user:
             return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
@@ -704,7 +743,7 @@ class StaffPasswordLoginView(APIView):
         try:
             UserSession.objects.update_or_create(
                 user=user,
-                session_token=token,
+                token_digest=UserSession.hash_token(token),
                 defaults={
                     'refresh_token': None,
                     'expires_at': timezone.now() + timedelta(hours=8),
@@ -725,11 +764,12 @@ class StaffPasswordLoginView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class AdminLoginView(APIView):
+class AdminLoginView(NonAtomicRequestsMixin, APIView):
     """OTP-based login strictly for superusers."""
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
+        from descope import DescopeClient, DeliveryMethod, SESSION_TOKEN_NAME, REFRESH_SESSION_TOKEN_NAME
         serializer = StaffOtpLoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -751,16 +791,8 @@ class AdminLoginView(APIView):
             if not auth_response:
                 return Response({'error': 'Invalid OTP code'}, status=status.HTTP_401_UNAUTHORIZED)
 
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            qs = User.objects.filter(
-                (Q(email=identifier) | Q(phone_number=identifier)),
-                is_active=True,
-                is_superuser=True
-            )
-            try:
-                user = qs.get()
-            except User.DoesNotExist:
+            user = _lookup_staff_user(identifier, superuser_only=True)
+            if user is None or not user.is_superuser:
                 return Response({'error': 'Admin privileges required'}, status=status.HTTP_403_FORBIDDEN)
 
             # Persist session with metadata
@@ -769,7 +801,7 @@ class AdminLoginView(APIView):
                 refresh_jwt = auth_response[REFRESH_SESSION_TOKEN_NAME]["jwt"]
                 UserSession.objects.update_or_create(
                     user=user,
-                    session_token=session_jwt,
+                    token_digest=UserSession.hash_token(session_jwt),
                     defaults={
                         'refresh_token': refresh_jwt,
                         'expires_at': timezone.now() + timedelta(hours=8),
@@ -807,14 +839,7 @@ class AdminPasswordLoginView(APIView):
         password = serializer.validated_data['password']
         device_id = serializer.validated_data.get('device_id')
 
-        user = authenticate(request, username=identifier, password=password)
-        if not user:
-            try:
-                candidate = User.objects.get(email=identifier)
-                user = authenticate(request, username=candidate.username, password=password)
-            except User.DoesNotExist:
-                user = None
-
+        user = _authenticate_staff(request, identifier, password)
         if not user:
             return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
@@ -825,7 +850,7 @@ class AdminPasswordLoginView(APIView):
         try:
             UserSession.objects.update_or_create(
                 user=user,
-                session_token=token,
+                token_digest=UserSession.hash_token(token),
                 defaults={
                     'refresh_token': None,
                     'expires_at': timezone.now() + timedelta(hours=8),
@@ -846,6 +871,7 @@ class AdminPasswordLoginView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+@transaction.non_atomic_requests
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def resend_phone_otp(request):
@@ -858,23 +884,18 @@ def resend_phone_otp(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        descope_client = DescopeClient(project_id=settings.DESCOPE_PROJECT_ID)
-        
-        # Send OTP via Descope
-        auth_response = descope_client.otp.sign_up_or_in(
-            method=DeliveryMethod.SMS,
-            login_id=phone_number
-        )
+        # Send OTP via the configured provider (queued when async dispatch is on)
+        request_id = dispatch_otp('sms', phone_number)
         
         # Update user's phone number if different
         if request.user.phone_number != phone_number:
             request.user.phone_number = phone_number
             request.user.save()
         
-        return Response({
+        return _otp_sent_response({
             'message': 'OTP resent successfully',
             'phone_number': phone_number
-        }, status=status.HTTP_200_OK)
+        }, request_id)
         
     except Exception as e:
         logger.error(f"Resend OTP failed: {str(e)}")
@@ -884,7 +905,7 @@ def resend_phone_otp(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class EmailOTPRequestView(APIView):
+class EmailOTPRequestView(NonAtomicRequestsMixin, APIView):
     """Handle email OTP request using Descope"""
     permission_classes = [permissions.AllowAny]
     
@@ -900,14 +921,9 @@ class EmailOTPRequestView(APIView):
                         'error': 'Too many OTP requests. Please try again later.'
                     }, status=status.HTTP_429_TOO_MANY_REQUESTS)
                 
-                descope_client = DescopeClient(project_id=settings.DESCOPE_PROJECT_ID)
-                
-                # Send OTP via Descope
+                # Send OTP via the configured provider (queued when async dispatch is on)
                 try:
-                    auth_response = descope_client.otp.sign_up_or_in(
-                        method=DeliveryMethod.EMAIL,
-                        login_id=email
-                    )
+                    request_id = dispatch_otp('email', email)
                 except Exception as descope_error:
                     logger.error(f"Descope Email OTP error: {str(descope_error)}")
                     return Response(
@@ -925,11 +941,11 @@ class EmailOTPRequestView(APIView):
                 # Update rate limiting
                 self._update_rate_limit(email, 'email')
                 
-                return Response({
+                return _otp_sent_response({
                     'message': 'Verification code sent successfully',
                     'email': email,
                     'expires_in': 300  # 5 minutes
-                }, status=status.HTTP_200_OK)
+                }, request_id)
                 
             except Exception as e:
                 logger.error(f"Email OTP request failed: {str(e)}")
@@ -973,11 +989,12 @@ class EmailOTPRequestView(APIView):
         attempt.save()
 
 
-class EmailOTPVerifyView(APIView):
+class EmailOTPVerifyView(NonAtomicRequestsMixin, APIView):
     """Handle email OTP verification using Descope"""
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
+        from descope import DescopeClient, DeliveryMethod, SESSION_TOKEN_NAME, REFRESH_SESSION_TOKEN_NAME
         serializer = EmailOTPVerifySerializer(data=request.data)
         if serializer.is_valid():
             try:
@@ -1009,7 +1026,7 @@ class EmailOTPVerifyView(APIView):
                         refresh_jwt = auth_response[REFRESH_SESSION_TOKEN_NAME]["jwt"]
                         UserSession.objects.update_or_create(
                             user=user,
-                            session_token=session_jwt,
+                            token_digest=UserSession.hash_token(session_jwt),
                             defaults={
                                 'refresh_token': refresh_jwt,
                                 'expires_at': timezone.now() + timedelta(hours=8),
@@ -1078,11 +1095,12 @@ class EmailOTPVerifyView(APIView):
         return user, True
 
 
-class EmailLoginView(APIView):
+class EmailLoginView(NonAtomicRequestsMixin, APIView):
     """Handle email-based login with OTP"""
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
+        from descope import DescopeClient, DeliveryMethod, SESSION_TOKEN_NAME, REFRESH_SESSION_TOKEN_NAME
         serializer = EmailLoginSerializer(data=request.data)
         if serializer.is_valid():
             try:
@@ -1107,7 +1125,7 @@ class EmailLoginView(APIView):
                         refresh_jwt = auth_response[REFRESH_SESSION_TOKEN_NAME]["jwt"]
                         UserSession.objects.update_or_create(
                             user=user,
-                            session_token=session_jwt,
+                            token_digest=UserSession.hash_token(session_jwt),
                             defaults={
                                 'refresh_token': refresh_jwt,
                                 'expires_at': timezone.now() + timedelta(hours=8),
@@ -1174,7 +1192,7 @@ class EmailLoginView(APIView):
         return user, True
 
 
-class UnifiedOTPRequestView(APIView):
+class UnifiedOTPRequestView(NonAtomicRequestsMixin, APIView):
     """Handle unified OTP request (phone or email)"""
     permission_classes = [permissions.AllowAny]
     
@@ -1191,14 +1209,8 @@ class UnifiedOTPRequestView(APIView):
                         'error': 'Too many OTP requests. Please try again later.'
                     }, status=status.HTTP_429_TOO_MANY_REQUESTS)
                 
-                descope_client = DescopeClient(project_id=settings.DESCOPE_PROJECT_ID)
-                
-                # Send OTP via Descope
-                descope_method = DeliveryMethod.SMS if method == "phone" else DeliveryMethod.EMAIL
-                auth_response = descope_client.otp.sign_up_or_in(
-                    method=descope_method,
-                    login_id=identifier
-                )
+                # Send OTP via the configured provider (queued when async dispatch is on)
+                request_id = dispatch_otp('sms' if method == "phone" else 'email', identifier)
                 
                 # Store OTP attempt in database for tracking
                 if method == "phone":
@@ -1217,12 +1229,12 @@ class UnifiedOTPRequestView(APIView):
                 # Update rate limiting
                 self._update_rate_limit(identifier, method)
                 
-                return Response({
+                return _otp_sent_response({
                     'message': 'OTP sent successfully',
                     'identifier': identifier,
                     'method': method,
                     'expires_in': 300  # 5 minutes
-                }, status=status.HTTP_200_OK)
+                }, request_id)
                 
             except Exception as e:
                 logger.error(f"Unified OTP request failed: {str(e)}")
@@ -1264,11 +1276,12 @@ class UnifiedOTPRequestView(APIView):
         attempt.save()
 
 
-class UnifiedOTPVerifyView(APIView):
+class UnifiedOTPVerifyView(NonAtomicRequestsMixin, APIView):
     """Handle unified OTP verification (phone or email)"""
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
+        from descope import DescopeClient, DeliveryMethod, SESSION_TOKEN_NAME, REFRESH_SESSION_TOKEN_NAME
         serializer = UnifiedOTPVerifySerializer(data=request.data)
         if serializer.is_valid():
             try:
@@ -1310,7 +1323,7 @@ class UnifiedOTPVerifyView(APIView):
                         refresh_jwt = auth_response[REFRESH_SESSION_TOKEN_NAME]["jwt"]
                         UserSession.objects.update_or_create(
                             user=user,
-                            session_token=session_jwt,
+                            token_digest=UserSession.hash_token(session_jwt),
                             defaults={
                                 'refresh_token': refresh_jwt,
                                 'expires_at': timezone.now() + timedelta(hours=8),
@@ -1406,3 +1419,15 @@ class UnifiedOTPVerifyView(APIView):
         )
         
         return user, True
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def otp_dispatch_status(request, request_id):
+    """Poll the delivery status of a queued OTP send"""
+    dispatch = get_dispatch_status(request_id)
+    if not dispatch:
+        return Response({
+            'error': 'Unknown or expired request id'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response(dispatch, status=status.HTTP_200_OK)
@@ -26,6 +26,19 @@ class Customer(models.Model):
         return f"{self.name} - {self.phone}"
 
 
+class BookingQuerySet(models.QuerySet):
+    def with_details(self):
+        """Everything the booking serializers read, in a fixed number of queries."""
+        return self.select_related(
+            'customer',
+            'vehicle_model__vehicle_brand__vehicle_type',
+            'subscription__plan'
+        ).prefetch_related(models.Prefetch(
+            'booking_services',
+            queryset=BookingService.objects.select_related('service__service_category')
+        ))
+
+
 class Booking(models.Model):
     SERVICE_LOCATION_CHOICES = [
         ('home', 'Home Service'),
@@ -68,6 +81,8 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BookingQuerySet.as_manager()
+    
     class Meta:
         db_table = 'bookings'
         ordering = ['-created_at']
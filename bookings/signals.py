@@ -1,5 +1,9 @@
+from django.db.models import F
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from subscriptions.models import Subscription
 
 from .models import Booking
 
@@ -18,10 +22,12 @@ def consume_subscription_visit_on_completion(sender, instance: Booking, created,
     subscription = instance.subscription
     try:
         included = subscription.plan.included_visits or 0
-        consumed = subscription.visits_consumed or 0
-        if consumed < included:
-            subscription.visits_consumed = consumed + 1
-            subscription.save(update_fields=["visits_consumed", "updated_at"])
+        # Conditional increment in SQL so concurrent completions cannot overshoot the plan
+        consumed = Subscription.objects.filter(pk=subscription.pk, visits_consumed__lt=included).update(
+            visits_consumed=F("visits_consumed") + 1, updated_at=timezone.now()
+        )
+        if consumed:
+            subscription.refresh_from_db(fields=["visits_consumed", "updated_at"])
             # Mark booking as counted
             instance.subscription_visit_consumed = True
             instance.save(update_fields=["subscription_visit_consumed", "updated_at"])
@@ -14,10 +14,7 @@ from subscriptions.models import Subscription
 
 
 class BookingViewSet(viewsets.ModelViewSet):
-    queryset = Booking.objects.select_related(
-        'customer',
-        'vehicle_model__vehicle_brand__vehicle_type'
-    ).prefetch_related('booking_services__service__service_category').all()
+    queryset = Booking.objects.with_details()
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -102,17 +99,17 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         # Calculate total amount and validate services
         total_amount = 0
-        service_prices = {}
+        service_prices = dict(
+            ServicePricing.objects.filter(
+                service_id__in=data['service_ids'],
+                vehicle_model_id=data['vehicle_model_id']
+            ).values_list('service_id', 'price')
+        )
         
         for service_id in data['service_ids']:
-            try:
-                pricing = ServicePricing.objects.get(
-                    service_id=service_id,
-                    vehicle_model_id=data['vehicle_model_id']
-                )
-                service_prices[service_id] = pricing.price
-                total_amount += pricing.price
-            except ServicePricing.DoesNotExist:
+            if service_id in service_prices:
+                total_amount += service_prices[service_id]
+            else:
                 return Response({
                     'error': True,
                     'message': f'Service pricing not found for service ID {service_id} and selected vehicle'
@@ -152,18 +149,17 @@ class BookingViewSet(viewsets.ModelViewSet):
         )
         
         # Create booking services
-        for service_id in data['service_ids']:
-            BookingService.objects.create(
+        BookingService.objects.bulk_create([
+            BookingService(
                 booking=booking,
                 service_id=service_id,
                 price=service_prices[service_id]
             )
+            for service_id in data['service_ids']
+        ])
         
         # Fetch created booking with all relations
-        booking = Booking.objects.select_related(
-            'customer',
-            'vehicle_model__vehicle_brand__vehicle_type'
-        ).prefetch_related('booking_services__service__service_category').get(id=booking.id)
+        booking = Booking.objects.with_details().get(id=booking.id)
         
         response_serializer = BookingDetailSerializer(booking)
         
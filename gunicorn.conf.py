@@ -0,0 +1,38 @@
+"""
+Gunicorn settings shared by both server modes (gunicorn reads ./gunicorn.conf.py
+automatically; command-line flags in start.sh still take precedence).
+
+With WARM_CACHES_ON_FORK=true every worker fills its own catalog cache right
+after it is forked, before it accepts connections. That matters when the
+cache is LocMemCache, where each worker would otherwise rebuild every catalog
+list on its first requests. With Redis, run `manage.py warm_caches` once in
+the release phase instead.
+"""
+import os
+
+
+def _enabled(name):
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def post_fork(server, worker):
+    if not _enabled('WARM_CACHES_ON_FORK'):
+        return
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'repairmybike.settings')
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connections
+    from repairmybike import catalog_cache
+
+    try:
+        request = catalog_cache.BaseUrlRequest(settings.CATALOG_BASE_URL) if settings.CATALOG_BASE_URL else None
+        summary = catalog_cache.warm_catalog(request=request)
+        server.log.info(f"Worker {worker.pid}: warmed {summary['keys']} catalog keys in {summary['seconds']}s")
+    except Exception as e:
+        # A cold cache is only slower; never keep a worker from booting
+        server.log.warning(f"Worker {worker.pid}: catalog cache warming failed: {e}")
+    finally:
+        connections.close_all()
@@ -4,7 +4,6 @@ from rest_framework.response import Response
 from django.conf import settings
 from django.db import transaction
 from django.shortcuts import get_object_or_404
-import razorpay
 import hmac
 import hashlib
 from .models import Payment
@@ -14,9 +13,10 @@ from .serializers import (
     RazorpayPaymentVerifySerializer
 )
 from bookings.models import Booking
+from repairmybike.transactions import NonAtomicRequestsMixin
 
 
-class PaymentViewSet(viewsets.ViewSet):
+class PaymentViewSet(NonAtomicRequestsMixin, viewsets.ViewSet):
     
     @action(detail=False, methods=['post'], url_path='razorpay/create-order')
     def create_razorpay_order(self, request):
@@ -43,7 +43,9 @@ class PaymentViewSet(viewsets.ViewSet):
                     'message': 'Payment already completed for this booking'
                 }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Initialize Razorpay client
+        # Initialize Razorpay client (imported here: the SDK is only needed on this path)
+        import razorpay
+
         client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
         
         # Create Razorpay order
@@ -86,7 +88,6 @@ class PaymentViewSet(viewsets.ViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=False, methods=['post'], url_path='razorpay/verify')
-    @transaction.atomic
     def verify_razorpay_payment(self, request):
         """
         Verify Razorpay payment signature (disabled for now, but code is ready)
@@ -115,19 +116,20 @@ class PaymentViewSet(viewsets.ViewSet):
                 'message': 'Invalid payment signature'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update payment record
+        # Update payment record; the row lock keeps a retried callback from interleaving
         try:
-            payment = Payment.objects.get(razorpay_order_id=data['razorpay_order_id'])
-            payment.razorpay_payment_id = data['razorpay_payment_id']
-            payment.razorpay_signature = data['razorpay_signature']
-            payment.status = 'captured'
-            payment.save()
-            
-            # Update booking payment status
-            booking = payment.booking
-            booking.payment_status = 'completed'
-            booking.payment_method = 'razorpay'
-            booking.save()
+            with transaction.atomic():
+                payment = Payment.objects.select_for_update().get(razorpay_order_id=data['razorpay_order_id'])
+                payment.razorpay_payment_id = data['razorpay_payment_id']
+                payment.razorpay_signature = data['razorpay_signature']
+                payment.status = 'captured'
+                payment.save()
+                
+                # Update booking payment status
+                booking = payment.booking
+                booking.payment_status = 'completed'
+                booking.payment_method = 'razorpay'
+                booking.save()
             
             return Response({
                 'error': False,
@@ -0,0 +1,234 @@
+"""
+Scripted endpoint scenarios for benchmarking.
+
+Each scenario issues its requests through the Django test client against the
+configured database (normally filled by generate_synthetic_data). The runner
+records the latency and the number of DB queries for every request, and
+reports p50/p95/p99 per scenario and per step. The JSON report is written
+with sorted keys, so reports from two commits can be diffed or compared with
+compare_reports().
+"""
+import itertools
+import json
+import platform
+import subprocess
+import time
+from contextlib import ExitStack
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client
+
+from services.models import ServicePricing
+from spare_parts.models import SparePart
+from vehicles.models import VehicleModel, VehicleType
+
+from .synthetic import SEARCH_TERMS, SYNTHETIC_PREFIX
+
+_addresses = itertools.count(1)
+
+
+def _next_remote_addr():
+    # Spread requests across client IPs so anonymous throttling does not kick in
+    n = next(_addresses)
+    return f'10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}'
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class ScenarioContext:
+    """Ids sampled once from the database and shared by all scenarios."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        vehicle_type = VehicleType.objects.filter(name=f'{SYNTHETIC_PREFIX} Motorcycle').first()
+        models = VehicleModel.objects.all()
+        if vehicle_type is not None:
+            models = models.filter(vehicle_brand__vehicle_type=vehicle_type)
+        self.vehicle_type_id = vehicle_type.pk if vehicle_type else None
+        self.model_rows = list(models.values_list('pk', 'vehicle_brand_id')[:2000])
+        self.part_ids = list(
+            SparePart.objects.filter(active=True, in_stock=True, stock_qty__gte=10).values_list('pk', flat=True)[:2000]
+        )
+        if not self.model_rows:
+            raise ValueError('No vehicle models found; run generate_synthetic_data first')
+
+    def pick(self, values):
+        return values[int(self.rng.integers(0, len(values)))]
+
+    def priced_services(self, vehicle_model_id, limit=2):
+        return list(
+            ServicePricing.objects.filter(vehicle_model_id=vehicle_model_id)
+            .values_list('service_id', 'service__service_category_id')[:limit]
+        )
+
+
+def scenario_catalog_browse(ctx, n):
+    """Vehicle type -> brand -> model -> service categories -> services -> pricing."""
+    model_id, brand_id = ctx.pick(ctx.model_rows)
+    services = ctx.priced_services(model_id, limit=1)
+    category_id = services[0][1] if services else ''
+    return [
+        ('vehicle_types', 'get', '/api/vehicles/vehicle-types/', None),
+        ('vehicle_brands', 'get', f'/api/vehicles/vehicle-brands/?vehicle_type={ctx.vehicle_type_id or ""}', None),
+        ('vehicle_models', 'get', f'/api/vehicles/vehicle-models/?vehicle_brand={brand_id}', None),
+        ('service_categories', 'get', '/api/services/service-categories/', None),
+        ('services', 'get', f'/api/services/services/?category_id={category_id}', None),
+        ('service_pricing', 'get', f'/api/services/service-pricing/by-vehicle/?vehicle_model_id={model_id}', None),
+    ]
+
+
+def scenario_part_search(ctx, n):
+    model_id, _ = ctx.pick(ctx.model_rows)
+    term = ctx.pick(SEARCH_TERMS)
+    return [
+        ('search_term', 'get', f'/api/spare-parts/parts/?q={term}', None),
+        ('search_for_model', 'get', f'/api/spare-parts/parts/?q={term}&vehicle_model={model_id}', None),
+    ]
+
+
+def scenario_booking_create(ctx, n):
+    model_id, _ = ctx.pick(ctx.model_rows)
+    service_ids = [service_id for service_id, _ in ctx.priced_services(model_id)]
+    payload = {
+        'customer_name': f'{SYNTHETIC_PREFIX} Bench {n}',
+        'customer_phone': f'+9190{n:08d}',
+        'vehicle_model_id': model_id,
+        'service_ids': service_ids,
+        'service_location': 'shop',
+        'appointment_date': (date.today() + timedelta(days=1)).isoformat(),
+        'appointment_time': '10:00',
+    }
+    return [('create_booking', 'post', '/api/bookings/bookings/', payload)]
+
+
+def scenario_checkout(ctx, n):
+    session_id = f'syn-session-bench-{n}-{int(time.time() * 1000)}'
+    return [
+        ('cart_add', 'post', '/api/spare-parts/cart/add/', {
+            'session_id': session_id, 'spare_part_id': ctx.pick(ctx.part_ids), 'quantity': 1,
+        }),
+        ('cart_add_second', 'post', '/api/spare-parts/cart/add/', {
+            'session_id': session_id, 'spare_part_id': ctx.pick(ctx.part_ids), 'quantity': 1,
+        }),
+        ('checkout', 'post', '/api/spare-parts/cart/checkout/', {
+            'session_id': session_id, 'customer_name': f'{SYNTHETIC_PREFIX} Bench {n}',
+            'phone': f'+9190{n:08d}', 'address': 'Benchmark street',
+        }),
+    ]
+
+
+SCENARIOS = {
+    'catalog_browse': scenario_catalog_browse,
+    'part_search': scenario_part_search,
+    'booking_create': scenario_booking_create,
+    'checkout': scenario_checkout,
+}
+
+
+def _summarize(latencies_ms, queries, errors):
+    lat = np.asarray(latencies_ms, dtype=float)
+    q = np.asarray(queries, dtype=float)
+    if not len(lat):
+        return {'requests': 0, 'errors': errors}
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+    return {
+        'requests': int(len(lat)),
+        'errors': errors,
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'mean_ms': round(float(lat.mean()), 2),
+        'queries_per_request': round(float(q.mean()), 2),
+        'max_queries': int(q.max()),
+    }
+
+
+def run_scenario(name, iterations, ctx, client=None, cold_cache=False, warmup=2):
+    client = client or Client(HTTP_HOST='localhost')
+    build = SCENARIOS[name]
+    per_step = {}
+    all_latencies, all_queries, errors = [], [], 0
+
+    for n in range(warmup + iterations):
+        measured = n >= warmup
+        for step, method, path, payload in build(ctx, n):
+            if cold_cache:
+                cache.clear()
+            counter = QueryCounter()
+            kwargs = {'secure': True, 'REMOTE_ADDR': _next_remote_addr()}
+            if payload is not None:
+                kwargs.update(data=json.dumps(payload), content_type='application/json')
+            started = time.perf_counter()
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(counter))
+                response = getattr(client, method)(path, **kwargs)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if not measured:
+                continue
+            failed = response.status_code >= 400
+            stats = per_step.setdefault(step, {'latencies': [], 'queries': [], 'errors': 0})
+            stats['latencies'].append(elapsed_ms)
+            stats['queries'].append(counter.count)
+            stats['errors'] += int(failed)
+            all_latencies.append(elapsed_ms)
+            all_queries.append(counter.count)
+            errors += int(failed)
+
+    summary = _summarize(all_latencies, all_queries, errors)
+    summary['steps'] = {
+        step: _summarize(s['latencies'], s['queries'], s['errors']) for step, s in per_step.items()
+    }
+    return summary
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(scenarios, iterations, seed=7, cold_cache=False):
+    ctx = ScenarioContext(np.random.default_rng(seed))
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'database': connections['default'].vendor,
+            'python': platform.python_version(),
+            'iterations': iterations,
+            'cold_cache': cold_cache,
+            'vehicle_models': VehicleModel.objects.count(),
+            'spare_parts': SparePart.objects.count(),
+            'service_pricing': ServicePricing.objects.count(),
+        },
+        'scenarios': {},
+    }
+    for name in scenarios:
+        report['scenarios'][name] = run_scenario(name, iterations, ctx, cold_cache=cold_cache)
+    return report
+
+
+def compare_reports(baseline, current):
+    """Yield (scenario, metric, before, after, pct_change) for shared scenario metrics."""
+    for name, after in current.get('scenarios', {}).items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request'):
+            if metric in before and metric in after:
+                old, new = before[metric], after[metric]
+                pct = ((new - old) / old * 100) if old else 0.0
+                yield name, metric, old, new, round(pct, 1)
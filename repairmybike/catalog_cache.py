@@ -0,0 +1,153 @@
+"""
+Cache keys and timeouts for the public catalog lists, plus a warmer that
+fills every one of them after a deploy.
+
+The sync viewsets, the async views and the warmer all build keys here so a
+warmed entry is exactly the one a request looks up. The warmer reads each
+catalog table once, groups the rows in Python (brands per type, models per
+brand, services per category, pricing per vehicle model) and writes the
+serialized payloads with ``set_many``, so the query count stays constant
+however many keys there are.
+"""
+import itertools
+import logging
+import time
+from collections import defaultdict
+from urllib.parse import urljoin, urlsplit
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache as default_cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TIMEOUT = 3600
+PRICING_TIMEOUT = 1800
+
+VEHICLE_TYPES_KEY = 'vehicle_types_list'
+SERVICE_CATEGORIES_KEY = 'service_categories_list'
+SERVICES_ALL_KEY = 'services_all'
+
+
+def vehicle_brands_key(vehicle_type_id):
+    return f'vehicle_brands_type_{vehicle_type_id}'
+
+
+def vehicle_models_key(vehicle_brand_id):
+    return f'vehicle_models_brand_{vehicle_brand_id}'
+
+
+def services_category_key(category_id):
+    return f'services_category_{category_id}'
+
+
+def service_pricing_key(vehicle_model_id):
+    return f'service_pricing_vehicle_{vehicle_model_id}'
+
+
+def is_process_local(cache=None):
+    """True when entries written here are invisible to other processes."""
+    return isinstance(cache or caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+class BaseUrlRequest:
+    """
+    Stands in for a request in serializer context outside a request cycle, so
+    media URLs come out absolute against the public host just as they do when
+    a view builds the payload.
+    """
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            raise ValueError(f'Base URL must look like https://host[:port], got {base_url!r}')
+        self.base_url = f'{parts.scheme}://{parts.netloc}/'
+
+    def build_absolute_uri(self, location='/'):
+        return urljoin(self.base_url, location)
+
+
+def _serialize(serializer_class, rows, request):
+    return serializer_class(rows, many=True, context={'request': request}).data
+
+
+def _grouped(rows, attr):
+    groups = defaultdict(list)
+    for row in rows:
+        groups[getattr(row, attr)].append(row)
+    return groups
+
+
+def _catalog_payloads(request):
+    """Yield (section, key, payload, timeout) for every catalog list."""
+    from services.serializers import ServiceCategorySerializer, ServiceSerializer, ServicePricingSerializer
+    from services.views import ServiceCategoryViewSet, ServiceViewSet, ServicePricingViewSet
+    from vehicles.serializers import VehicleTypeSerializer, VehicleBrandSerializer, VehicleModelSerializer
+    from vehicles.views import VehicleTypeViewSet, VehicleBrandViewSet, VehicleModelViewSet
+
+    yield ('vehicle_types', VEHICLE_TYPES_KEY,
+           _serialize(VehicleTypeSerializer, VehicleTypeViewSet.queryset.all(), request), CATALOG_TIMEOUT)
+
+    for type_id, rows in _grouped(VehicleBrandViewSet.queryset.all(), 'vehicle_type_id').items():
+        yield ('vehicle_brands', vehicle_brands_key(type_id),
+               _serialize(VehicleBrandSerializer, rows, request), CATALOG_TIMEOUT)
+
+    for brand_id, rows in _grouped(VehicleModelViewSet.queryset.all(), 'vehicle_brand_id').items():
+        yield ('vehicle_models', vehicle_models_key(brand_id),
+               _serialize(VehicleModelSerializer, rows, request), CATALOG_TIMEOUT)
+
+    yield ('service_categories', SERVICE_CATEGORIES_KEY,
+           _serialize(ServiceCategorySerializer, ServiceCategoryViewSet.queryset.all(), request), CATALOG_TIMEOUT)
+
+    services = list(ServiceViewSet.queryset.all())
+    yield ('services', SERVICES_ALL_KEY, _serialize(ServiceSerializer, services, request), CATALOG_TIMEOUT)
+    for category_id, rows in _grouped(services, 'service_category_id').items():
+        yield ('services', services_category_key(category_id),
+               _serialize(ServiceSerializer, rows, request), CATALOG_TIMEOUT)
+
+    # Pricing is the large table (models x services); stream it ordered by
+    # vehicle model so only one model's rows are held at a time
+    pricing = ServicePricingViewSet.queryset.order_by('vehicle_model_id', 'service__name')
+    for model_id, rows in itertools.groupby(pricing.iterator(chunk_size=2000), key=lambda p: p.vehicle_model_id):
+        yield ('service_pricing', service_pricing_key(model_id),
+               _serialize(ServicePricingSerializer, list(rows), request), PRICING_TIMEOUT)
+
+
+def warm_catalog(request=None, cache=None, batch_size=500):
+    """
+    Fill every catalog cache key and return a summary:
+    ``{'keys': int, 'sections': {section: keys}, 'seconds': float}``.
+
+    Pass a request (or a BaseUrlRequest) to build absolute media URLs for the
+    public host, as the views do; without one the serializers fall back to MEDIA_URL. Empty
+    groups are skipped because the views treat an empty cached list as a miss.
+    """
+    cache = cache or default_cache
+    started = time.perf_counter()
+    sections = defaultdict(int)
+    batches = {}
+    total = 0
+
+    def flush():
+        for timeout, entries in batches.items():
+            if entries:
+                cache.set_many(entries, timeout)
+        batches.clear()
+
+    for section, key, payload, timeout in _catalog_payloads(request):
+        if not payload:
+            continue
+        batches.setdefault(timeout, {})[key] = payload
+        sections[section] += 1
+        total += 1
+        if sum(len(entries) for entries in batches.values()) >= batch_size:
+            flush()
+    flush()
+
+    summary = {
+        'keys': total,
+        'sections': dict(sections),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"Catalog cache warmed: {total} keys in {summary['seconds']}s ({dict(sections)})")
+    return summary
@@ -0,0 +1,143 @@
+"""
+Read-replica routing for safe requests.
+
+ReplicaRoutingMiddleware decides per request whether reads may go to a
+replica: the method must be safe, the path must start with one of
+REPLICA_READ_PREFIXES (catalog, history and stats endpoints), and the
+client must not have written recently. The chosen alias is kept in a
+context variable that ReplicaRouter reads, so it follows the request into
+sync_to_async threads and never leaks between requests. Writes always go
+to the primary.
+
+Read-your-writes: after any unsafe request the response carries a pin
+(cookie and X-DB-Pinned-Until header holding a Unix timestamp
+REPLICA_STICKY_SECONDS ahead). While a client sends a pin that has not
+expired, its reads stay on the primary. Mobile clients that do not keep
+cookies echo the header instead.
+
+A replica that cannot be connected to, or that fails a query during a
+request, is skipped for REPLICA_RETRY_SECONDS; the failed request is
+retried once on the primary since safe requests are idempotent.
+"""
+import contextvars
+import itertools
+import logging
+import threading
+import time
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, InterfaceError, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'db_pinned_until'
+PIN_HEADER = 'X-DB-Pinned-Until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_alias = contextvars.ContextVar('db_read_alias', default=None)
+_rotation = itertools.count()
+_unhealthy_until = {}
+_health_lock = threading.Lock()
+
+
+class ReplicaRouter:
+    """Send reads to the alias chosen for the current request; everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def mark_unhealthy(alias):
+    with _health_lock:
+        _unhealthy_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+    logger.warning(f"Replica {alias} unavailable; reading from the primary for {settings.REPLICA_RETRY_SECONDS}s")
+
+
+def reset_health():
+    with _health_lock:
+        _unhealthy_until.clear()
+
+
+def pick_replica():
+    """Return a healthy replica alias (round-robin), or None to use the primary."""
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return None
+    start = next(_rotation)
+    now = time.monotonic()
+    for offset in range(len(replicas)):
+        alias = replicas[(start + offset) % len(replicas)]
+        if _unhealthy_until.get(alias, 0) > now:
+            continue
+        try:
+            connections[alias].ensure_connection()
+        except (OperationalError, InterfaceError):
+            mark_unhealthy(alias)
+            continue
+        return alias
+    return None
+
+
+def _pinned_until(request):
+    raw = request.headers.get(PIN_HEADER) or request.COOKIES.get(PIN_COOKIE)
+    try:
+        return float(raw) if raw else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _replica_eligible(request):
+    return (
+        request.method in SAFE_METHODS
+        and request.path.startswith(settings.REPLICA_READ_PREFIXES)
+        and _pinned_until(request) <= time.time()
+    )
+
+
+class ReplicaRoutingMiddleware:
+    """Pick the read database for each request and pin clients after writes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        alias = pick_replica() if _replica_eligible(request) else None
+        token = _read_alias.set(alias)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+
+        if request.method not in SAFE_METHODS and settings.DATABASE_REPLICAS:
+            until = f'{time.time() + settings.REPLICA_STICKY_SECONDS:.3f}'
+            response[PIN_HEADER] = until
+            response.set_cookie(
+                PIN_COOKIE, until,
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_exception(self, request, exception):
+        alias = _read_alias.get()
+        if alias is None or not isinstance(exception, (OperationalError, InterfaceError)):
+            return None
+        mark_unhealthy(alias)
+        _read_alias.set(None)
+        match = request.resolver_match
+        view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+        logger.warning(f"Retrying {request.method} {request.path} on the primary after replica error: {exception}")
+        return view(request, *match.args, **match.kwargs)
@@ -0,0 +1,226 @@
+"""
+Direct-to-storage image uploads for the S3/R2 media backend.
+
+Uploading through Django keeps a gunicorn worker busy for the whole
+transfer. Here the file bytes never pass through the app server:
+
+  1. presign(): the client says what it wants to upload (target, file
+     name, content type, size). It gets back a presigned PUT URL for a
+     pending key under DIRECT_UPLOAD_PENDING_PREFIX and a signed upload
+     token naming the target and the final storage name;
+  2. the client PUTs the file straight to the bucket;
+  3. finalize(): the token is verified and the object checked with
+     head_object. It is copied server-side to its final name, the pending
+     key is deleted, and the name is set on the model row.
+
+For targets with a parent (SparePartImage) finalize creates the row; for
+the others it replaces the image on the row given by object_id. Saving goes
+through post_save, so tracked fields get their WebP variants after commit
+(IMAGE_VARIANTS_ON_SAVE, see image_variants). Abandoned uploads stay
+under the pending prefix, and a bucket lifecycle rule on that prefix
+cleans them up.
+
+The token is a django.core.signing payload, so nothing is stored between
+the two calls and a client cannot register a key it was not issued.
+"""
+import logging
+import posixpath
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import storages
+from django.db import transaction
+from django.utils.text import slugify
+
+from . import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+SIGNING_SALT = 'repairmybike.direct_uploads'
+
+CONTENT_TYPES = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/gif': '.gif',
+}
+
+# parent: FK set from object_id when finalize creates the row (None: object_id is the row itself)
+# extra: other fields finalize accepts for a created row
+# cache_keys: catalog cache entries that embed the image
+UploadTarget = namedtuple('UploadTarget', 'model field parent extra cache_keys')
+
+TARGETS = {
+    'vehicle-type': UploadTarget('vehicles.VehicleType', 'image', None, (),
+                                 lambda obj: [catalog_cache.VEHICLE_TYPES_KEY]),
+    'vehicle-brand': UploadTarget('vehicles.VehicleBrand', 'image', None, (),
+                                  lambda obj: [catalog_cache.vehicle_brands_key(obj.vehicle_type_id)]),
+    'vehicle-model': UploadTarget('vehicles.VehicleModel', 'image', None, (),
+                                  lambda obj: [catalog_cache.vehicle_models_key(obj.vehicle_brand_id)]),
+    'service': UploadTarget('services.Service', 'images', None, (), lambda obj: [
+        catalog_cache.SERVICES_ALL_KEY, catalog_cache.services_category_key(obj.service_category_id),
+    ]),
+    'spare-part-category': UploadTarget('spare_parts.SparePartCategory', 'image', None, (), None),
+    'spare-part-brand': UploadTarget('spare_parts.SparePartBrand', 'logo', None, (), None),
+    'spare-part-image': UploadTarget('spare_parts.SparePartImage', 'image', 'spare_part',
+                                     ('alt_text', 'is_primary', 'sort_order'), None),
+}
+
+
+class UploadError(ValueError):
+    """The upload cannot be issued or registered; the message is safe to show to the client."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _storage():
+    """The default storage when it is the S3 backend (R2 included), else UploadError."""
+    try:
+        from storages.backends.s3 import S3Storage
+    except ImportError:
+        S3Storage = None
+    storage = storages['default']
+    if S3Storage is None or not isinstance(storage, S3Storage):
+        raise UploadError('Direct uploads need the S3/R2 media storage backend', status=501)
+    return storage
+
+
+def _key(storage, name):
+    """Object key of a storage name (adds the storage's location prefix)."""
+    from storages.utils import clean_name
+
+    return storage._normalize_name(clean_name(name))
+
+
+def _target(name):
+    try:
+        return TARGETS[name]
+    except KeyError:
+        raise UploadError(f"Unknown upload target '{name}'; choose from {', '.join(TARGETS)}")
+
+
+def _model_field(target):
+    from django.apps import apps
+
+    model = apps.get_model(target.model)
+    return model, model._meta.get_field(target.field)
+
+
+def presign(target_name, filename, content_type, size, user_id):
+    """Validate an upload request and return the presigned PUT and the token finalize() expects."""
+    target = _target(target_name)
+    if content_type not in CONTENT_TYPES:
+        raise UploadError(f"Unsupported content type '{content_type}'; allowed: {', '.join(CONTENT_TYPES)}")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('size must be the file size in bytes')
+    if not 0 < size <= settings.DIRECT_UPLOAD_MAX_BYTES:
+        raise UploadError(f'size must be between 1 and {settings.DIRECT_UPLOAD_MAX_BYTES} bytes')
+    storage = _storage()
+
+    _model, field = _model_field(target)
+    token = uuid.uuid4().hex
+    stem = slugify(posixpath.splitext(posixpath.basename(str(filename or '')))[0])[:40] or 'image'
+    extension = CONTENT_TYPES[content_type]
+    name = posixpath.join(str(field.upload_to), f'{stem}-{token[:12]}{extension}')
+    pending = posixpath.join(settings.DIRECT_UPLOAD_PENDING_PREFIX, f'{token}{extension}')
+
+    params = {'Bucket': storage.bucket_name, 'Key': _key(storage, pending), 'ContentType': content_type}
+    headers = {'Content-Type': content_type}
+    if storage.default_acl:
+        params['ACL'] = storage.default_acl
+        headers['x-amz-acl'] = storage.default_acl
+    url = storage.connection.meta.client.generate_presigned_url(
+        'put_object', Params=params, ExpiresIn=settings.DIRECT_UPLOAD_EXPIRES, HttpMethod='PUT',
+    )
+    upload_token = signing.dumps(
+        {'target': target_name, 'pending': pending, 'name': name, 'content_type': content_type, 'user': user_id},
+        salt=SIGNING_SALT, compress=True,
+    )
+    return {
+        'upload_url': url,
+        'method': 'PUT',
+        'headers': headers,
+        'name': name,
+        'expires_in': settings.DIRECT_UPLOAD_EXPIRES,
+        'upload_token': upload_token,
+    }
+
+
+def finalize(upload_token, object_id, user_id, extra=None):
+    """Move the uploaded object into place and register it on the target row; returns (instance, field name)."""
+    try:
+        object_id = int(object_id)
+    except (TypeError, ValueError):
+        raise UploadError('object_id must be an integer')
+    try:
+        # A PUT started just before the URL expired may finish well after it
+        payload = signing.loads(upload_token, salt=SIGNING_SALT, max_age=settings.DIRECT_UPLOAD_EXPIRES + 3600)
+    except signing.SignatureExpired:
+        raise UploadError('Upload token expired; request a new upload')
+    except signing.BadSignature:
+        raise UploadError('Invalid upload token')
+    if payload['user'] != user_id:
+        raise UploadError('Upload token was issued to another user', status=403)
+    target = _target(payload['target'])
+    model, _field = _model_field(target)
+    values = {}
+    for name in target.extra:
+        if name in (extra or {}):
+            field = model._meta.get_field(name)
+            try:
+                # Form-field parsing takes 'true' / '2' from form posts as well as JSON
+                values[name] = field.clean(field.formfield().to_python(extra[name]), None)
+            except ValidationError as e:
+                raise UploadError(f"{name}: {' '.join(e.messages)}")
+
+    storage = _storage()
+    client = storage.connection.meta.client
+    pending_key = _key(storage, payload['pending'])
+    try:
+        head = client.head_object(Bucket=storage.bucket_name, Key=pending_key)
+    except client.exceptions.ClientError:
+        raise UploadError('Nothing was uploaded for this token (or it was already registered)', status=409)
+    if head['ContentLength'] > settings.DIRECT_UPLOAD_MAX_BYTES:
+        client.delete_object(Bucket=storage.bucket_name, Key=pending_key)
+        raise UploadError(f'Uploaded file is larger than {settings.DIRECT_UPLOAD_MAX_BYTES} bytes')
+
+    with transaction.atomic():
+        if target.parent:
+            parent_model = model._meta.get_field(target.parent).related_model
+            if not parent_model._default_manager.filter(pk=object_id).exists():
+                raise UploadError(f'{parent_model.__name__} {object_id} not found', status=404)
+            instance = model(**{f'{target.parent}_id': object_id, **values})
+        else:
+            instance = model._default_manager.select_for_update().filter(pk=object_id).first()
+            if instance is None:
+                raise UploadError(f'{model.__name__} {object_id} not found', status=404)
+
+        # Server-side copy: the bytes stay inside the bucket
+        copy = {'ContentType': payload['content_type'], 'MetadataDirective': 'REPLACE'}
+        if storage.default_acl:
+            copy['ACL'] = storage.default_acl
+        client.copy_object(
+            Bucket=storage.bucket_name, Key=_key(storage, payload['name']),
+            CopySource={'Bucket': storage.bucket_name, 'Key': pending_key}, **copy,
+        )
+        setattr(instance, target.field, payload['name'])
+        if instance.pk is None:
+            instance.save()
+        else:
+            touched = [f.name for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+            instance.save(update_fields=[target.field, *touched])
+        if target.cache_keys:
+            keys = target.cache_keys(instance)
+            transaction.on_commit(lambda: cache.delete_many(keys))
+        transaction.on_commit(lambda: client.delete_object(Bucket=storage.bucket_name, Key=pending_key))
+
+    logger.info(f"Direct upload registered: {model._meta.label} {instance.pk} {target.field}={payload['name']}")
+    return instance, target.field
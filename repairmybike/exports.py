@@ -0,0 +1,300 @@
+"""
+Streaming CSV / XLSX exports of bookings, orders and subscriptions.
+
+Each dataset is a flat values_list() projection read with
+.iterator(chunk_size), plus an optional per-chunk enrichment for
+one-to-many columns (booking services, order items). The enrichment is one
+extra query per chunk, never per row. No model instances or serializers are
+involved, so memory depends on the chunk size, not the row count.
+
+CSV is yielded line by line, so the first byte leaves as soon as the first
+chunk is read. XLSX uses an openpyxl write-only workbook: rows are appended
+to its disk-backed sheet XML. The zip container can only be assembled after
+the last row, so an XLSX download starts once all rows are written, still
+in constant memory.
+
+The staff endpoint (staff.views.StaffExportView) and `manage.py
+export_data` share the datasets defined here. The endpoint refuses
+exports over EXPORT_HTTP_MAX_ROWS, so a download finishes well inside
+the worker timeout; the command has no limit.
+"""
+import csv
+import datetime
+import itertools
+import re
+import tempfile
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+Column = namedtuple('Column', 'header path')
+
+
+class ExportError(ValueError):
+    """Unknown dataset or format, or an invalid filter."""
+
+
+class ExportTooLarge(ExportError):
+    """More rows than the caller allows (max_rows)."""
+
+
+def _booking_services(ids):
+    from bookings.models import BookingService
+
+    grouped = defaultdict(list)
+    rows = BookingService.objects.filter(booking_id__in=ids).order_by('id').values_list('booking_id', 'service__name')
+    for booking_id, name in rows:
+        grouped[booking_id].append(name)
+    return {pk: '; '.join(names) for pk, names in grouped.items()}
+
+
+def _order_items(ids):
+    from spare_parts.models import OrderItem
+
+    grouped = defaultdict(list)
+    rows = OrderItem.objects.filter(order_id__in=ids).order_by('id').values_list(
+        'order_id', 'spare_part__sku', 'quantity',
+    )
+    for order_id, sku, quantity in rows:
+        grouped[order_id].append(f'{sku} x{quantity}')
+    return {pk: '; '.join(items) for pk, items in grouped.items()}
+
+
+class Dataset:
+    """A flat export: columns read with values_list, filters from query params / options."""
+
+    name = None
+    columns = ()
+    # (header, function(ids) -> {id: value}) appended after the columns
+    extra = None
+    status_field = None
+    date_field = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    @property
+    def headers(self):
+        headers = [c.header for c in self.columns]
+        if self.extra:
+            headers.append(self.extra[0])
+        return headers
+
+    def filter(self, queryset, status=None, date_from=None, date_to=None):
+        """status matches status_field; date_from / date_to (YYYY-MM-DD, inclusive) bound date_field."""
+        if status:
+            queryset = queryset.filter(**{self.status_field: status})
+        field = queryset.model._meta.get_field(self.date_field)
+        date_path = f'{self.date_field}__date' if isinstance(field, models.DateTimeField) else self.date_field
+        for value, lookup in ((date_from, 'gte'), (date_to, 'lte')):
+            if value:
+                try:
+                    parsed = parse_date(value) if isinstance(value, str) else value
+                except ValueError:
+                    parsed = None
+                if parsed is None:
+                    raise ExportError(f"Invalid date '{value}', expected YYYY-MM-DD")
+                queryset = queryset.filter(**{f'{date_path}__{lookup}': parsed})
+        return queryset
+
+    def rows(self, chunk_size=DEFAULT_CHUNK_SIZE, **filters):
+        """Yield one tuple per row, in primary-key order."""
+        queryset = self.filter(self.get_queryset(), **filters).order_by('pk')
+        values = queryset.values_list('pk', *(c.path for c in self.columns)).iterator(chunk_size=chunk_size)
+        while chunk := list(itertools.islice(values, chunk_size)):
+            extra = self.extra[1]([row[0] for row in chunk]) if self.extra else None
+            for row in chunk:
+                yield row[1:] + ((extra.get(row[0], ''),) if extra is not None else ())
+
+
+class BookingsDataset(Dataset):
+    name = 'bookings'
+    columns = (
+        Column('id', 'id'),
+        Column('created_at', 'created_at'),
+        Column('appointment_date', 'appointment_date'),
+        Column('appointment_time', 'appointment_time'),
+        Column('customer_name', 'customer__name'),
+        Column('customer_phone', 'customer__phone'),
+        Column('vehicle_type', 'vehicle_model__vehicle_brand__vehicle_type__name'),
+        Column('vehicle_brand', 'vehicle_model__vehicle_brand__name'),
+        Column('vehicle_model', 'vehicle_model__name'),
+        Column('service_location', 'service_location'),
+        Column('address', 'address'),
+        Column('total_amount', 'total_amount'),
+        Column('payment_method', 'payment_method'),
+        Column('payment_status', 'payment_status'),
+        Column('booking_status', 'booking_status'),
+        Column('subscription_id', 'subscription_id'),
+        Column('notes', 'notes'),
+    )
+    extra = ('services', _booking_services)
+    status_field = 'booking_status'
+    date_field = 'appointment_date'
+
+    def get_queryset(self):
+        from bookings.models import Booking
+
+        return Booking.objects.all()
+
+
+class OrdersDataset(Dataset):
+    name = 'orders'
+    columns = (
+        Column('id', 'id'),
+        Column('created_at', 'created_at'),
+        Column('customer_name', 'customer_name'),
+        Column('phone', 'phone'),
+        Column('user_id', 'user_id'),
+        Column('address', 'address'),
+        Column('amount_total', 'amount_total'),
+        Column('currency', 'currency'),
+        Column('payment_method', 'payment_method'),
+        Column('payment_status', 'payment_status'),
+        Column('status', 'status'),
+    )
+    extra = ('items', _order_items)
+    status_field = 'status'
+    date_field = 'created_at'
+
+    def get_queryset(self):
+        from spare_parts.models import Order
+
+        return Order.objects.all()
+
+
+class SubscriptionsDataset(Dataset):
+    name = 'subscriptions'
+    columns = (
+        Column('id', 'id'),
+        Column('created_at', 'created_at'),
+        Column('plan', 'plan__name'),
+        Column('user_id', 'user_id'),
+        Column('contact_email', 'contact_email'),
+        Column('contact_phone', 'contact_phone'),
+        Column('status', 'status'),
+        Column('auto_renew', 'auto_renew'),
+        Column('start_date', 'start_date'),
+        Column('end_date', 'end_date'),
+        Column('next_billing_date', 'next_billing_date'),
+        Column('visits_consumed', 'visits_consumed'),
+        Column('razorpay_subscription_id', 'razorpay_subscription_id'),
+    )
+    status_field = 'status'
+    date_field = 'created_at'
+
+    def get_queryset(self):
+        from subscriptions.models import Subscription
+
+        return Subscription.objects.all()
+
+
+DATASETS = {d.name: d for d in (BookingsDataset(), OrdersDataset(), SubscriptionsDataset())}
+
+
+def get_dataset(name):
+    try:
+        return DATASETS[name]
+    except KeyError:
+        raise ExportError(f"Unknown dataset '{name}'; choose from {', '.join(DATASETS)}")
+
+
+class _Echo:
+    """csv.writer target that hands each formatted line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+# A spreadsheet reads a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Phone numbers and plain numbers ('+919800000000', '-12.5') start with + / - but carry no formula
+PLAIN_NUMBER = re.compile(r'^[+-]?[\d\s().-]+$')
+
+
+def _csv_value(value):
+    if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not PLAIN_NUMBER.match(value):
+        # Customer-entered text such as '=HYPERLINK(...)' must open as text
+        return f"'{value}"
+    return '' if value is None else value
+
+
+def stream_csv(headers, rows):
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens UTF-8 names correctly
+    yield ('\ufeff' + writer.writerow(headers)).encode('utf-8')
+    for row in rows:
+        yield writer.writerow([_csv_value(v) for v in row]).encode('utf-8')
+
+
+def _xlsx_value(value):
+    if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        # Excel has no time zones
+        return timezone.localtime(value).replace(tzinfo=None)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _xlsx_cell(sheet, value):
+    from openpyxl.cell import WriteOnlyCell
+
+    value = _xlsx_value(value)
+    if not isinstance(value, str):
+        return value
+    # openpyxl turns strings starting with '=' into formulas; store every string as text
+    cell = WriteOnlyCell(sheet, value)
+    cell.data_type = 's'
+    return cell
+
+
+def stream_xlsx(headers, rows, title='export', read_size=64 * 1024):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.append(headers)
+    for row in rows:
+        sheet.append([_xlsx_cell(sheet, v) for v in row])
+    with tempfile.TemporaryFile() as fh:
+        workbook.save(fh)
+        fh.seek(0)
+        while chunk := fh.read(read_size):
+            yield chunk
+
+
+def stream(name, file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE, max_rows=None, **filters):
+    """Validate eagerly (and count against max_rows when given), then return an iterator of bytes for the export."""
+    dataset = get_dataset(name)
+    if file_format not in FORMATS:
+        raise ExportError(f"Unknown format '{file_format}'; choose from {', '.join(FORMATS)}")
+    # Surface bad filters now rather than halfway through a streamed response
+    queryset = dataset.filter(dataset.get_queryset(), **filters)
+    if max_rows is not None:
+        total = queryset.count()
+        if total > max_rows:
+            raise ExportTooLarge(
+                f"{total} rows is more than the {max_rows} a {file_format.upper()} download allows; "
+                f"narrow the status or date range, or run `manage.py export_data {name}` on the server"
+            )
+    rows = dataset.rows(chunk_size=chunk_size, **filters)
+    if file_format == 'csv':
+        return stream_csv(dataset.headers, rows)
+    return stream_xlsx(dataset.headers, rows, title=dataset.name)
+
+
+def filename(name, file_format):
+    return f"{name}-{timezone.localdate().isoformat()}.{file_format}"
@@ -1,45 +1,219 @@
 """
-Health check views for Railway deployment monitoring.
+Liveness and readiness checks.
+
+/health/ is liveness: it answers as long as the process can serve a
+request and never touches a dependency, so a database outage does not get
+every worker restarted at once. /ready/ is readiness: it probes the
+primary database, the cache, the media storage and any read replicas and
+returns 503 when a critical dependency (HEALTH_CRITICAL_PROBES) is down,
+so the load balancer stops routing to the worker instead of retrying into
+it. Both responses carry the per-dependency breakdown:
+
+    {"status": "unavailable", "checks": {"database": {"status": "timeout",
+     "latency_ms": 2000.4, "critical": true, "error": "..."}, ...}}
+
+Each probe runs on a small dedicated thread pool with its own deadline
+(HEALTH_PROBE_TIMEOUT), so a hung dependency costs the caller the deadline
+and nothing more. A probe that is still stuck from an earlier check is not
+submitted again. Results are kept in process memory for
+HEALTH_CACHE_SECONDS (HEALTH_STORAGE_CACHE_SECONDS for storage, whose
+remote backends rate-limit their APIs), and one check refreshes them at a
+time, so load balancer traffic never stampedes the database.
 """
 import logging
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
 from django.http import JsonResponse
-from django.db import connection
 
 logger = logging.getLogger(__name__)
 
+VERSION = '1.0.0'
+
+Probe = namedtuple('Probe', 'name check critical ttl')
+
+_started_at = time.time()
+_executor = None
+_executor_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_results = {}   # name -> (expires_at, result)
+_inflight = {}  # name -> Future still running past its deadline
+
+
+def _check_database(alias):
+    conn = connections[alias]
+    conn.close_if_unusable_or_obsolete()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+def _check_cache():
+    key = 'health:probe'
+    token = uuid.uuid4().hex
+    cache.set(key, token, 30)
+    if cache.get(key) != token:
+        raise RuntimeError('cache did not return the value just written')
+
+
+def _check_storage():
+    # A missing object is fine; only a backend error counts as a failure
+    default_storage.exists(settings.HEALTH_STORAGE_PROBE_PATH)
+
+
+def get_probes():
+    critical = set(settings.HEALTH_CRITICAL_PROBES)
+    ttl = settings.HEALTH_CACHE_SECONDS
+    probes = [
+        Probe('database', partial(_check_database, DEFAULT_DB_ALIAS), 'database' in critical, ttl),
+        Probe('cache', _check_cache, 'cache' in critical, ttl),
+        Probe('storage', _check_storage, 'storage' in critical, settings.HEALTH_STORAGE_CACHE_SECONDS),
+    ]
+    for alias in getattr(settings, 'DATABASE_REPLICAS', ()):
+        name = f'database:{alias}'
+        probes.append(Probe(name, partial(_check_database, alias), name in critical, ttl))
+    return probes
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.HEALTH_PROBE_WORKERS, thread_name_prefix='health',
+                )
+    return _executor
+
+
+def _timed(check):
+    started = time.perf_counter()
+    check()
+    return (time.perf_counter() - started) * 1000
+
+
+def _run(probes):
+    """Run probes concurrently, each bounded by HEALTH_PROBE_TIMEOUT."""
+    timeout = settings.HEALTH_PROBE_TIMEOUT
+    started = time.perf_counter()
+    futures = {}
+    for probe in probes:
+        pending = _inflight.get(probe.name)
+        if pending is not None and not pending.done():
+            futures[probe.name] = pending
+        else:
+            futures[probe.name] = _inflight[probe.name] = _get_executor().submit(_timed, probe.check)
+
+    results = {}
+    for probe in probes:
+        future = futures[probe.name]
+        result = {'critical': probe.critical}
+        try:
+            remaining = max(0.0, started + timeout - time.perf_counter())
+            result['latency_ms'] = round(future.result(timeout=remaining), 2)
+            result['status'] = 'ok'
+            _inflight.pop(probe.name, None)
+        except FutureTimeoutError:
+            result['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            result['status'] = 'timeout'
+            result['error'] = f'no response within {timeout}s'
+        except Exception as e:
+            result['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            result['status'] = 'error'
+            result['error'] = f'{type(e).__name__}: {e}'
+            _inflight.pop(probe.name, None)
+        if result['status'] != 'ok':
+            logger.warning(f"Health probe {probe.name} {result['status']}: {result['error']}")
+        results[probe.name] = result
+    return results
+
+
+def check_dependencies():
+    """Return {name: result} for every probe, re-running only the expired ones."""
+    probes = get_probes()
+    with _refresh_lock:
+        now = time.monotonic()
+        stale = [p for p in probes if _results.get(p.name, (0, None))[0] <= now]
+        fresh = {p.name: dict(_results[p.name][1], cached=True) for p in probes if p not in stale}
+        if stale:
+            ran = _run(stale)
+            now = time.monotonic()
+            for probe in stale:
+                _results[probe.name] = (now + probe.ttl, ran[probe.name])
+                fresh[probe.name] = dict(ran[probe.name], cached=False)
+    return {p.name: fresh[p.name] for p in probes}
+
+
+def reset():
+    """Forget cached probe results (tests, and after reconfiguring probes)."""
+    with _refresh_lock:
+        _results.clear()
+        _inflight.clear()
+
+
+def _overall_status(checks):
+    if any(c['status'] != 'ok' and c['critical'] for c in checks.values()):
+        return 'unavailable'
+    if any(c['status'] != 'ok' for c in checks.values()):
+        return 'degraded'
+    return 'ok'
+
+
+def _liveness_response():
+    return JsonResponse({
+        'status': 'alive',
+        'version': VERSION,
+        'uptime_seconds': round(time.time() - _started_at, 1),
+    })
+
+
+def _readiness_response(checks):
+    status = _overall_status(checks)
+    return JsonResponse(
+        {'status': status, 'version': VERSION, 'checks': checks},
+        status=503 if status == 'unavailable' else 200,
+    )
+
+
+@transaction.non_atomic_requests
 def health_check(request):
     """
-    Simple health check endpoint for Railway deployment.
-    Returns basic status without complex dependency checks.
-    """
-    try:
-        # Basic database connectivity check
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
-        
-        return JsonResponse({
-            'status': 'healthy',
-            'database': 'connected',
-            'version': '1.0.0'
-        })
-        
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        # Return healthy status anyway to pass Railway health check
-        # This ensures deployment succeeds even if there are minor issues
-        return JsonResponse({
-            'status': 'healthy',
-            'database': 'checking',
-            'version': '1.0.0',
-            'note': 'Basic health check passed'
-        })
+    Liveness: the process is up and serving. Never probes dependencies.
+    """
+    return _liveness_response()
+
+
+@transaction.non_atomic_requests
+async def async_health_check(request):
+    """
+    health_check for ASGI mode.
+    """
+    return _liveness_response()
+
 
+@transaction.non_atomic_requests
 def readiness_check(request):
     """
-    Readiness check for Railway deployment.
+    Readiness: probe every dependency (cached for a few seconds); 503 when
+    a critical one is down.
     """
-    return JsonResponse({
-        'status': 'ready',
-        'message': 'Application is ready to serve requests'
-    })
\ No newline at end of file
+    return _readiness_response(check_dependencies())
+
+
+@transaction.non_atomic_requests
+async def async_readiness_check(request):
+    """
+    readiness_check for ASGI mode. Probes block on their deadlines, so they
+    run in a worker thread rather than on the event loop.
+    """
+    checks = await sync_to_async(check_dependencies, thread_sensitive=False)()
+    return _readiness_response(checks)
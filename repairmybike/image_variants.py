@@ -0,0 +1,192 @@
+"""
+Resized WebP derivatives of catalog images, so list screens do not
+download multi-megabyte originals.
+
+For every tracked image field (see track()), each variant in VARIANTS is
+the original scaled down to fit a size x size box (never up), EXIF-rotated
+and encoded as WebP. Variants are written to the same storage, next to the
+original:
+
+    vehicle_models/pulsar.jpg -> vehicle_models/pulsar__thumb.webp
+                                 vehicle_models/pulsar__medium.webp
+
+and their names are recorded on the row in a JSON field alongside the
+source name they were built from:
+
+    {'source': 'vehicle_models/pulsar.jpg', 'thumb': '...', 'medium': '...'}
+
+variant_urls() only returns variants whose source is still the current
+file, so a replaced image falls back to the original until it is rebuilt.
+
+Variants are built after commit when a tracked field changes
+(IMAGE_VARIANTS_ON_SAVE) and in bulk by `manage.py build_image_variants`,
+which decodes on a process pool.
+"""
+import io
+import logging
+import posixpath
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models.signals import post_save
+
+from .media_urls import storage_url
+
+logger = logging.getLogger(__name__)
+
+# name -> longest edge in pixels
+VARIANTS = {
+    'thumb': 320,
+    'medium': 960,
+}
+WEBP_QUALITY = 80
+
+# model label -> (image field, variants JSON field)
+TRACKED = {}
+
+
+def variant_name(name, variant):
+    stem, _ext = posixpath.splitext(name)
+    return f'{stem}__{variant}.webp'
+
+
+def render_variants(data):
+    """Decode image bytes once and return {variant: webp bytes}."""
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(data))
+    # JPEG can decode straight at a reduced scale, which is most of the cost for large photos
+    largest = max(VARIANTS.values())
+    image.draft('RGB', (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    rendered = {}
+    for variant, size in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+        rendered[variant] = buffer.getvalue()
+    return rendered
+
+
+def build_variants(name, storage=None):
+    """Read `name` from storage, write its variants next to it and return the record to store on the row."""
+    storage = storage or default_storage
+    with storage.open(name, 'rb') as fh:
+        data = fh.read()
+    record = {'source': name}
+    for variant, content in render_variants(data).items():
+        target = variant_name(name, variant)
+        # Keep the deterministic name instead of letting storage pick a free one
+        if storage.exists(target):
+            storage.delete(target)
+        record[variant] = storage.save(target, ContentFile(content))
+    return record
+
+
+def variant_urls(instance):
+    """{variant: storage URL (memoized)} for the instance's current image, or {} when none are built for it."""
+    image_field, variants_field = TRACKED[instance._meta.label]
+    file = getattr(instance, image_field)
+    record = getattr(instance, variants_field) or {}
+    if not file or record.get('source') != file.name:
+        return {}
+    return {variant: storage_url(file.storage, record[variant]) for variant in VARIANTS if record.get(variant)}
+
+
+def _needs_build(instance, image_field, variants_field):
+    file = getattr(instance, image_field)
+    return bool(file) and (getattr(instance, variants_field) or {}).get('source') != file.name
+
+
+def _build_for(model, pk, name, variants_field):
+    try:
+        record = build_variants(name)
+    except Exception as e:
+        logger.warning(f"Image variants for {model._meta.label} {pk} ({name}) failed: {e}")
+        return
+    # Only if the image was not replaced meanwhile; update() skips signals and auto_now
+    image_field = TRACKED[model._meta.label][0]
+    model._default_manager.filter(pk=pk, **{image_field: name}).update(**{variants_field: record})
+
+
+def _on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not settings.IMAGE_VARIANTS_ON_SAVE:
+        return
+    image_field, variants_field = TRACKED[sender._meta.label]
+    if update_fields is not None and image_field not in update_fields:
+        return
+    if _needs_build(instance, image_field, variants_field):
+        name = getattr(instance, image_field).name
+        transaction.on_commit(lambda: _build_for(sender, instance.pk, name, variants_field))
+
+
+def track(model, image_field, variants_field='image_variants'):
+    """Build variants for model.image_field whenever it changes. Call from AppConfig.ready()."""
+    TRACKED[model._meta.label] = (image_field, variants_field)
+    post_save.connect(_on_save, sender=model, dispatch_uid=f'image_variants:{model._meta.label}')
+
+
+def _worker_init():
+    # Under the spawn start method the child starts without Django configured
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _worker_build(name):
+    return build_variants(name)
+
+
+def backfill(models=None, force=False, workers=None, batch_size=200, on_result=None):
+    """
+    Build missing (or, with force, all) variants for the tracked models.
+    Decoding and encoding run on a process pool; rows are updated from this
+    process with bulk_update. Returns per-model counts.
+    """
+    from django.apps import apps
+
+    report = {}
+    # Forked children must not share this process's database sockets (a test transaction keeps its own)
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as executor:
+        for label, (image_field, variants_field) in TRACKED.items():
+            if models and label not in models:
+                continue
+            model = apps.get_model(label)
+            counts = report[label] = {'built': 0, 'skipped': 0, 'failed': 0}
+            queryset = model._default_manager.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+            pending = []
+            for obj in queryset.only('pk', image_field, variants_field).order_by('pk').iterator(chunk_size=batch_size):
+                if force or _needs_build(obj, image_field, variants_field):
+                    pending.append(obj)
+                else:
+                    counts['skipped'] += 1
+
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                futures = {executor.submit(_worker_build, getattr(obj, image_field).name): obj for obj in batch}
+                done = []
+                for future in as_completed(futures):
+                    obj = futures[future]
+                    try:
+                        setattr(obj, variants_field, future.result())
+                    except Exception as e:
+                        counts['failed'] += 1
+                        logger.warning(f"Image variants for {label} {obj.pk} failed: {e}")
+                        continue
+                    done.append(obj)
+                model._default_manager.bulk_update(done, [variants_field])
+                counts['built'] += len(done)
+                if on_result:
+                    on_result(label, counts)
+    return report
@@ -0,0 +1,147 @@
+"""
+Logging pipeline helpers referenced from settings.LOGGING.
+
+Request threads only enqueue records (QueueListenerHandler); a background
+listener thread formats them as JSON and writes them to the console and to
+a rotating log file that several gunicorn workers can share.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked rotation
+    fcntl = None
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records at or below max_level (DEBUG by default)."""
+
+    def __init__(self, rate=1.0, max_level='DEBUG'):
+        super().__init__()
+        self.rate = float(rate)
+        self.max_level = logging.getLevelName(max_level) if isinstance(max_level, str) else max_level
+
+    def filter(self, record):
+        if record.levelno > self.max_level or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    QueueHandler that owns its QueueListener, for use from dictConfig on
+    Python 3.11 (which has no 'listener' support). Configure `handlers` as a
+    list of 'cfg://handlers.<name>' references to handlers defined earlier.
+    """
+
+    def __init__(self, handlers, respect_handler_level=True, maxsize=10000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        # Index access makes dictConfig resolve the cfg:// references
+        self._targets = [handlers[i] for i in range(len(handlers))]
+        self._respect_handler_level = respect_handler_level
+        self._start()
+        os.register_at_fork(after_in_child=self._start)
+        atexit.register(self.stop)
+
+    def _start(self):
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self.listener = QueueListener(
+            self.queue, *self._targets, respect_handler_level=self._respect_handler_level
+        )
+        self.listener.start()
+
+    def stop(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def prepare(self, record):
+        # Merge args and render the traceback now, but leave formatting to the targets
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block a request on logging; drop instead
+            pass
+
+
+class LockingRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that several processes can share. Writes and
+    rollovers are serialized with an flock on <filename>.lock, and a stream
+    left pointing at a file another process rotated away is reopened.
+    """
+
+    def __init__(self, filename, *args, **kwargs):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        super().__init__(filename, *args, **kwargs)
+        self._lock_file = open(f'{self.baseFilename}.lock', 'a')
+
+    def _stream_is_stale(self):
+        if self.stream is None:
+            return False
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(self.stream.fileno())
+        return (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev)
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            if self._stream_is_stale():
+                self.stream.close()
+                self.stream = self._open()
+            super().emit(record)
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def close(self):
+        super().close()
+        if not self._lock_file.closed:
+            self._lock_file.close()
@@ -0,0 +1,183 @@
+"""
+Media URL resolution shared by the serializers.
+
+Storage.url() is cheap for local files but not for the cloud backends:
+Cloudinary builds the URL through its SDK, and S3/R2 signs it when
+querystring auth is on. List endpoints call it for every row, and the same
+file shows up again and again (brand logos, thumbnails). storage_url()
+memoizes it per (storage, file name) in a bounded, process-local LRU.
+Entries expire after MEDIA_URL_CACHE_SECONDS, and sooner for signed URLs,
+so a cached signature is never served past half its lifetime.
+
+absolute_url() turns a storage URL into the absolute form the apps expect:
+through the request's host when there is one, else against an absolute
+MEDIA_URL, else unchanged.
+
+resolve_many() resolves a page of files in one pass: one lock round trip
+for what is cached, storage.url() only for the misses.
+MediaListSerializer uses it to prime the cache before rendering rows of
+a serializer that lists its file fields in `media_fields`.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import serializers
+
+_lock = threading.Lock()
+_urls = OrderedDict()  # (storage key, name) -> (url, expires at)
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _storage_key(storage):
+    cls = type(storage)
+    return f'{cls.__module__}.{cls.__qualname__}:{getattr(storage, "base_url", "") or ""}'
+
+
+def _ttl():
+    ttl = settings.MEDIA_URL_CACHE_SECONDS
+    if getattr(settings, 'AWS_QUERYSTRING_AUTH', False):
+        ttl = min(ttl, getattr(settings, 'AWS_QUERYSTRING_EXPIRE', 3600) / 2)
+    return ttl
+
+
+def _lookup(keys, now):
+    # Caller holds _lock
+    found = {}
+    for key in keys:
+        entry = _urls.get(key)
+        if entry and entry[1] > now:
+            _urls.move_to_end(key)
+            found[key] = entry[0]
+    _stats['hits'] += len(found)
+    _stats['misses'] += len(keys) - len(found)
+    return found
+
+
+def _store(urls, now):
+    # Caller holds _lock
+    expires = now + _ttl()
+    for key, url in urls.items():
+        _urls[key] = (url, expires)
+        _urls.move_to_end(key)
+    while len(_urls) > settings.MEDIA_URL_CACHE_SIZE:
+        _urls.popitem(last=False)
+
+
+def storage_url(storage, name):
+    """storage.url(name), memoized."""
+    key = (_storage_key(storage), name)
+    now = time.monotonic()
+    with _lock:
+        found = _lookup([key], now)
+    if key in found:
+        return found[key]
+    url = storage.url(name)
+    with _lock:
+        _store({key: url}, now)
+    return url
+
+
+def absolute_url(url, request=None):
+    if not url:
+        return None
+    if url.startswith('http://') or url.startswith('https://'):
+        return url
+    if request:
+        try:
+            return request.build_absolute_uri(url)
+        except Exception:
+            pass
+    base = getattr(settings, 'MEDIA_URL', '/')
+    if base.startswith('http://') or base.startswith('https://'):
+        if url.startswith('/'):
+            return f"{base.rstrip('/')}{url}"
+        return f"{base.rstrip('/')}/{url}"
+    return url
+
+
+def media_url(file, request=None):
+    """Absolute URL of a FieldFile, or None when it is empty or its storage cannot build one."""
+    if not file:
+        return None
+    try:
+        return absolute_url(storage_url(file.storage, file.name), request)
+    except Exception:
+        return None
+
+
+def resolve_many(files):
+    """
+    Storage URLs of many FieldFiles as {(storage key, name): url}: one locked
+    pass for the cached ones, storage.url() only for the rest. Empty files and
+    ones the storage fails on are left out.
+    """
+    wanted = {}
+    for file in files:
+        if file:
+            wanted.setdefault((_storage_key(file.storage), file.name), file)
+    now = time.monotonic()
+    with _lock:
+        resolved = _lookup(list(wanted), now)
+    missing = {}
+    for key, file in wanted.items():
+        if key not in resolved:
+            try:
+                missing[key] = file.storage.url(file.name)
+            except Exception:
+                continue
+    if missing:
+        with _lock:
+            _store(missing, now)
+        resolved.update(missing)
+    return resolved
+
+
+def stats():
+    with _lock:
+        return dict(_stats, size=len(_urls))
+
+
+def clear():
+    with _lock:
+        _urls.clear()
+        _stats.update(hits=0, misses=0)
+
+
+@receiver(setting_changed)
+def _clear_on_storage_settings(setting, **kwargs):
+    if setting in ('MEDIA_URL', 'MEDIA_ROOT', 'STORAGES', 'AWS_S3_CUSTOM_DOMAIN'):
+        clear()
+
+
+class MediaListSerializer(serializers.ListSerializer):
+    """Primes the URL cache for the whole page before the rows are rendered."""
+
+    def to_representation(self, data):
+        rows = data.all() if hasattr(data, 'all') else data
+        fields = getattr(self.child, 'media_fields', ())
+        if fields:
+            rows = list(rows)
+            resolve_many(getattr(row, field) for row in rows for field in fields)
+        return super().to_representation(rows)
+
+
+class MediaUrlMixin:
+    """Serializer helpers for file fields; set `media_fields` and Meta.list_serializer_class = MediaListSerializer."""
+
+    media_fields = ()
+
+    def media_url(self, file):
+        return media_url(file, self.context.get('request') if hasattr(self, 'context') else None)
+
+    def media_variants(self, instance):
+        from .image_variants import variant_urls
+
+        request = self.context.get('request') if hasattr(self, 'context') else None
+        try:
+            return {name: absolute_url(url, request) for name, url in variant_urls(instance).items()}
+        except Exception:
+            return {}
@@ -0,0 +1,292 @@
+"""
+Per-request instrumentation and a Prometheus /metrics endpoint.
+
+MetricsMiddleware records, per resolved view: request count and latency,
+DB query count and time (via connection.execute_wrapper), cache hits and
+misses (via the Instrumented* cache backends) and response size.
+
+Each process keeps its own registry and periodically writes it to
+METRICS_DIR/metrics_<pid>.json. The /metrics view merges every file in
+that directory, so a scrape of any gunicorn worker reports totals for all
+of them. Enabled with METRICS_ENABLED; METRICS_TOKEN optionally protects
+the endpoint.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.http import HttpResponse, HttpResponseNotFound
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+METRIC_HELP = {
+    'http_requests_total': ('counter', 'Requests handled, by view, method and status'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by view'),
+    'http_request_db_queries': ('histogram', 'DB queries per request by view'),
+    'http_request_db_seconds_total': ('counter', 'Time spent in DB queries by view'),
+    'http_request_cache_hits_total': ('counter', 'Cache hits during requests by view'),
+    'http_request_cache_misses_total': ('counter', 'Cache misses during requests by view'),
+    'http_response_size_bytes': ('histogram', 'Response body size by view'),
+}
+
+_request_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+class Registry:
+    """Process-local counters and histograms, keyed by (name, labels)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self._last_write = 0.0
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0, 'count': 0}
+            for i, bound in enumerate(hist['buckets']):
+                if value <= bound:
+                    hist['counts'][i] += 1
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def dump(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), dict(hist, counts=list(hist['counts']))]
+                               for (name, labels), hist in self.histograms.items()],
+            }
+
+    def write(self, directory, force=False):
+        """Persist this process's registry at most every METRICS_FLUSH_INTERVAL seconds."""
+        now = time.monotonic()
+        if not force and now - self._last_write < getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+            return
+        self._last_write = now
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump(self.dump(), fh)
+        os.replace(tmp_path, path)
+
+
+registry = Registry()
+
+
+def collect(directory):
+    """Merge every process registry file in directory into one dump."""
+    counters = {}
+    histograms = {}
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        names = []
+    for filename in names:
+        if not (filename.startswith('metrics_') and filename.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable metrics file {filename}: {e}")
+            continue
+        for name, labels, value in data.get('counters', []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, hist in data.get('histograms', []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = dict(hist, counts=list(hist['counts']))
+                continue
+            merged['counts'] = [a + b for a, b in zip(merged['counts'], hist['counts'])]
+            merged['sum'] += hist['sum']
+            merged['count'] += hist['count']
+    return counters, histograms
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    )
+    return '{' + escaped + '}'
+
+
+def render_prometheus(counters, histograms):
+    lines = []
+    seen = set()
+
+    def header(name):
+        if name in seen:
+            return
+        seen.add(name)
+        kind, help_text = METRIC_HELP.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name)
+        lines.append(f'{name}{_format_labels(labels)} {value}')
+    for (name, labels), hist in sorted(histograms.items(), key=lambda item: item[0]):
+        header(name)
+        for bound, count in zip(hist['buckets'], hist['counts']):
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+        lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {hist["count"]}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {hist["sum"]}')
+        lines.append(f'{name}_count{_format_labels(labels)} {hist["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def _view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    """Record latency, DB, cache and size metrics for each request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        def track_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats.queries += 1
+                stats.db_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(track_query))
+                response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        elapsed = time.perf_counter() - started
+
+        view = _view_label(request)
+        labels = {'view': view}
+        registry.inc('http_requests_total', {'view': view, 'method': request.method, 'status': response.status_code})
+        registry.observe('http_request_duration_seconds', labels, elapsed, LATENCY_BUCKETS)
+        registry.observe('http_request_db_queries', labels, stats.queries, QUERY_COUNT_BUCKETS)
+        registry.inc('http_request_db_seconds_total', labels, stats.db_seconds)
+        if stats.cache_hits:
+            registry.inc('http_request_cache_hits_total', labels, stats.cache_hits)
+        if stats.cache_misses:
+            registry.inc('http_request_cache_misses_total', labels, stats.cache_misses)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', labels, len(response.content), SIZE_BUCKETS)
+
+        try:
+            registry.write(settings.METRICS_DIR)
+        except OSError as e:
+            logger.warning(f"Could not write metrics file: {e}")
+        return response
+
+
+def metrics_view(request):
+    """Prometheus text exposition of the merged multi-process registry."""
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        return HttpResponseNotFound()
+    expected = getattr(settings, 'METRICS_TOKEN', '')
+    if expected:
+        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+        if auth_header != f'Bearer {expected}':
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+
+    registry.write(settings.METRICS_DIR, force=True)
+    counters, histograms = collect(settings.METRICS_DIR)
+    return HttpResponse(
+        render_prometheus(counters, histograms),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+_MISSING = object()
+
+
+class CacheMetricsMixin:
+    """Count cache hits/misses against the current request's stats."""
+
+    def get(self, key, default=None, version=None, **kwargs):
+        value = super().get(key, _MISSING, version=version, **kwargs)
+        stats = _request_stats.get()
+        if value is _MISSING:
+            if stats is not None:
+                stats.cache_misses += 1
+            return default
+        if stats is not None:
+            stats.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        stats = _request_stats.get()
+        # Backends without a native get_many fall back to get(); don't count those twice
+        token = _request_stats.set(None)
+        try:
+            found = super().get_many(keys, version=version, **kwargs)
+        finally:
+            _request_stats.reset(token)
+        if stats is not None:
+            stats.cache_hits += len(found)
+            stats.cache_misses += len(keys) - len(found)
+        return found
+
+
+class InstrumentedLocMemCache(CacheMetricsMixin, LocMemCache):
+    pass
+
+
+try:
+    from django_redis.cache import RedisCache
+except ImportError:  # django-redis is optional in local development
+    RedisCache = None
+
+if RedisCache is not None:
+    class InstrumentedRedisCache(CacheMetricsMixin, RedisCache):
+        pass
+
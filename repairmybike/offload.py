@@ -0,0 +1,150 @@
+"""
+Helpers for running blocking code from async views under ASGI.
+
+The Descope and Razorpay SDKs are synchronous HTTP clients. Calling them
+from a coroutine would stall the event loop, so offload() runs a call on a
+dedicated, bounded thread pool (OFFLOAD_MAX_WORKERS) with an optional
+timeout, and OffloadedClient exposes a client's methods as awaitables:
+
+    descope = async_descope_client()
+    jwt_response = await descope.validate_session(token)
+    order = await async_razorpay_client().order.create(data)
+
+aserialize() fetches a queryset with the async ORM and serializes the
+rows in memory; the queryset must select_related/annotate everything the
+serializer reads, since lazy loads are not allowed in async code.
+
+async_get() routes GET requests to an async handler and everything else
+to the existing sync DRF view, so a read path can go async without
+touching the write endpoints that share its URL. Before the async handler
+runs, the sync view's DRF authentication, permission and throttle checks
+run in a thread, so both paths enforce the same DEFAULT_THROTTLE_CLASSES
+and see the same request.user.
+"""
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.views.decorators.csrf import csrf_exempt
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'OFFLOAD_MAX_WORKERS', 16),
+                    thread_name_prefix='offload',
+                )
+    return _executor
+
+
+async def offload(func, *args, timeout=None, **kwargs):
+    """Run a blocking callable on the offload pool and await its result."""
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+    if timeout is None:
+        timeout = getattr(settings, 'OFFLOAD_TIMEOUT', None)
+    if timeout:
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            # The worker thread keeps running; only the caller gives up
+            logger.warning(f"Offloaded call {getattr(func, '__qualname__', func)} timed out after {timeout}s")
+            raise
+    return await future
+
+
+class OffloadedClient:
+    """
+    Proxy over a sync SDK client: attribute access walks the client
+    (client.otp, client.order, ...) and calling a method returns a
+    coroutine that runs it through offload().
+    """
+
+    def __init__(self, target, timeout=None):
+        self._target = target
+        self._timeout = timeout
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if callable(attr):
+            @functools.wraps(attr)
+            async def call(*args, **kwargs):
+                return await offload(attr, *args, timeout=self._timeout, **kwargs)
+            return call
+        if isinstance(attr, (str, bytes, int, float, bool, type(None), dict, list, tuple)):
+            return attr
+        return OffloadedClient(attr, timeout=self._timeout)
+
+
+def async_descope_client(**kwargs):
+    from descope import DescopeClient
+
+    client = DescopeClient(project_id=settings.DESCOPE_PROJECT_ID, **kwargs)
+    return OffloadedClient(client)
+
+
+def async_razorpay_client():
+    import razorpay
+
+    client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+    return OffloadedClient(client)
+
+
+async def aserialize(serializer_class, queryset, request):
+    objects = [obj async for obj in queryset]
+    return serializer_class(objects, many=True, context={'request': request}).data
+
+
+def drf_initial(sync_view, request, *args, **kwargs):
+    """
+    Run the authentication, permission and throttle checks of a DRF
+    as_view() callable without dispatching to a handler. Returns the
+    rendered error response (401/403/429), or None when the request may
+    proceed; request.user is set either way.
+    """
+    view = sync_view.cls(**sync_view.initkwargs)
+    if getattr(sync_view, 'actions', None) is not None:
+        view.action_map = sync_view.actions
+    view.args, view.kwargs = args, kwargs
+    view.request = view.initialize_request(request, *args, **kwargs)
+    view.headers = view.default_response_headers
+    try:
+        view.initial(view.request, *args, **kwargs)
+    except Exception as exc:
+        response = view.finalize_response(view.request, view.handle_exception(exc), *args, **kwargs)
+        return response.render()
+    return None
+
+
+def async_get(async_handler, sync_view):
+    """
+    Serve GET with async_handler after sync_view's DRF auth, permission and
+    throttle checks; delegate other methods (and HEAD/OPTIONS) to sync_view
+    in a thread, keeping CSRF exemption for writes.
+    """
+    @transaction.non_atomic_requests
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET':
+            denied = await sync_to_async(drf_initial)(sync_view, request, *args, **kwargs)
+            if denied is not None:
+                return denied
+            return await async_handler(request, *args, **kwargs)
+        return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+    view.async_handler = async_handler
+    view.sync_view = sync_view
+    return view
@@ -0,0 +1,243 @@
+"""
+Per-endpoint DB query budgets.
+
+BUDGETS is the declarative table checked by QueryBudgetTests: one row per
+(URL name, method) with the most queries the endpoint may issue at each of
+the two fixture scales. BudgetFixture builds the data those requests run
+against; grow() adds the same number of rows to every collection, so a
+query count that rises between the two scales points at an N+1.
+
+New endpoints under the API prefixes in BUDGETED_PREFIXES must get a row
+here, or an entry in EXEMPT saying why they are not budgeted.
+"""
+from collections import namedtuple
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from authentication.models import User, UserSession
+from bookings.models import Booking, BookingService, Customer
+from services.models import Service, ServiceCategory, ServicePricing
+from spare_parts.models import (
+    Cart,
+    CartItem,
+    Order,
+    OrderItem,
+    SparePart,
+    SparePartBrand,
+    SparePartCategory,
+    SparePartFitment,
+    SparePartImage,
+)
+from subscriptions.models import Plan, Subscription
+from vehicles.models import VehicleBrand, VehicleModel, VehicleType
+
+BUDGETED_PREFIXES = (
+    'api/vehicles/',
+    'api/services/',
+    'api/bookings/',
+    'api/staff/',
+    'api/spare-parts/',
+    'api/subscriptions/',
+)
+
+# URL names under BUDGETED_PREFIXES that are deliberately not measured
+EXEMPT = {
+    'api-root': 'DRF browsable router index, no DB access',
+    'staff-upload': 'needs the S3/R2 media backend; covered by DirectUploadTests',
+    'staff-upload-finalize': 'needs the S3/R2 media backend; covered by DirectUploadTests',
+}
+
+Budget = namedtuple('Budget', 'url_name method max_queries kwargs params body auth')
+
+
+def _budget(url_name, method, small, large, kwargs=None, params=None, body=None, auth=False):
+    """max_queries is (at scale 1, at scale 2); kwargs/params/body take the fixture."""
+    return Budget(url_name, method, (small, large), kwargs, params, body, auth)
+
+
+BUDGETS = [
+    # vehicles
+    _budget('vehicle-type-list', 'get', 1, 1),
+    _budget('vehicle-type-detail', 'get', 1, 1, kwargs=lambda f: {'pk': f.vehicle_type.pk}),
+    _budget('vehicle-brand-list', 'get', 1, 1, params=lambda f: {'vehicle_type': f.vehicle_type.pk}),
+    _budget('vehicle-brand-detail', 'get', 1, 1, kwargs=lambda f: {'pk': f.vehicle_brand.pk}),
+    _budget('vehicle-model-list', 'get', 1, 1, params=lambda f: {'vehicle_brand': f.vehicle_brand.pk}),
+    _budget('vehicle-model-detail', 'get', 1, 1, kwargs=lambda f: {'pk': f.vehicle_model.pk}),
+
+    # services
+    _budget('service-category-list', 'get', 1, 1),
+    _budget('service-category-detail', 'get', 1, 1, kwargs=lambda f: {'pk': f.service_category.pk}),
+    _budget('service-list', 'get', 1, 1),
+    _budget('service-list', 'get', 1, 1, params=lambda f: {'category_id': f.service_category.pk}),
+    _budget('service-detail', 'get', 1, 1, kwargs=lambda f: {'pk': f.service.pk}),
+    _budget('service-pricing-list', 'get', 2, 2),
+    _budget('service-pricing-by-vehicle', 'get', 1, 1, params=lambda f: {'vehicle_model_id': f.vehicle_model.pk}),
+    _budget('service-pricing-detail', 'get', 1, 1, kwargs=lambda f: {'pk': f.service_pricing.pk}),
+
+    # bookings
+    _budget('booking-list', 'get', 3, 3, params=lambda f: {'phone': f.customer.phone}),
+    _budget('booking-detail', 'get', 2, 2, kwargs=lambda f: {'pk': f.booking.pk}),
+    _budget('booking-list', 'post', 9, 9, body=lambda f: {
+        'customer_name': f.customer.name,
+        'customer_phone': f.customer.phone,
+        'vehicle_model_id': f.vehicle_model.pk,
+        'service_ids': [f.service.pk, f.other_service.pk],
+        'service_location': 'shop',
+        'appointment_date': (date.today() + timedelta(days=1)).isoformat(),
+        'appointment_time': '10:00',
+        'subscription_id': f.subscription.pk,
+    }),
+
+    # staff
+    _budget('staff-booking-list', 'get', 3, 3, auth=True),
+    _budget('staff-booking-get-stats', 'get', 2, 2, auth=True),
+    _budget('staff-booking-detail', 'get', 3, 3, auth=True, kwargs=lambda f: {'pk': f.booking.pk}),
+    _budget('staff-booking-update-status', 'patch', 5, 5, auth=True,
+            kwargs=lambda f: {'pk': f.booking.pk}, body=lambda f: {'status': 'confirmed'}),
+    _budget('staff-export', 'get', 4, 4, auth=True, kwargs=lambda f: {'dataset': 'bookings'}),
+    _budget('staff-export', 'get', 4, 4, auth=True, kwargs=lambda f: {'dataset': 'orders'},
+            params=lambda f: {'file_type': 'xlsx'}),
+
+    # spare parts
+    _budget('spare-part-category-list', 'get', 2, 2),
+    _budget('spare-part-category-detail', 'get', 1, 1, kwargs=lambda f: {'pk': f.part_category.pk}),
+    _budget('spare-part-brand-list', 'get', 1, 1),
+    _budget('spare-part-brand-detail', 'get', 1, 1, kwargs=lambda f: {'pk': f.part_brand.pk}),
+    _budget('spare-part-list', 'get', 2, 2),
+    _budget('spare-part-list', 'get', 2, 2, params=lambda f: {'q': 'Budget', 'vehicle_model': f.vehicle_model.pk}),
+    _budget('spare-part-detail', 'get', 3, 3, kwargs=lambda f: {'pk': f.part.pk}),
+    _budget('spare-part-compatibility', 'get', 2, 2, kwargs=lambda f: {'pk': f.part.pk}),
+    _budget('spare-part-cart-list', 'get', 3, 3, params=lambda f: {'session_id': f.cart.session_id}),
+    _budget('spare-part-cart-add', 'post', 6, 6, body=lambda f: {
+        'session_id': f.cart.session_id, 'spare_part_id': f.part.pk, 'quantity': 1,
+    }),
+    _budget('spare-part-cart-update-item', 'patch', 5, 5, body=lambda f: {
+        'session_id': f.cart.session_id, 'item_id': f.cart_item.pk, 'quantity': 2,
+    }),
+    _budget('spare-part-cart-remove-item', 'delete', 4, 4,
+            params=lambda f: {'session_id': f.cart.session_id, 'item_id': f.cart_item.pk}),
+    _budget('spare-part-cart-clear', 'delete', 3, 3, params=lambda f: {'session_id': f.cart.session_id}),
+    _budget('spare-part-cart-checkout', 'post', 9, 9, body=lambda f: {
+        'session_id': f.cart.session_id, 'customer_name': f.customer.name,
+        'phone': f.customer.phone, 'address': 'Budget street',
+    }),
+    _budget('spare-part-cart-buy-now', 'post', 6, 6, body=lambda f: {
+        'session_id': f.cart.session_id, 'spare_part_id': f.part.pk, 'quantity': 1,
+        'customer_name': f.customer.name, 'phone': f.customer.phone, 'address': 'Budget street',
+    }),
+    _budget('spare-part-order-list', 'get', 3, 3, params=lambda f: {'session_id': f.order.session_id}),
+    _budget('spare-part-order-detail', 'get', 3, 3, kwargs=lambda f: {'pk': f.order.pk}),
+
+    # subscriptions
+    _budget('plans-list', 'get', 2, 2),
+    _budget('plans-detail', 'get', 1, 1, kwargs=lambda f: {'pk': f.plan.pk}),
+    _budget('subscriptions-list', 'get', 2, 2, params=lambda f: {'email': f.subscription.contact_email}),
+    _budget('subscriptions-detail', 'get', 1, 1, kwargs=lambda f: {'pk': f.subscription.pk}),
+    _budget('subscriptions-cancel', 'post', 2, 2, kwargs=lambda f: {'pk': f.subscription.pk}),
+]
+
+
+class BudgetFixture:
+    """
+    Anchor rows referenced by BUDGETS, plus collections that grow() extends
+    by ROWS_PER_STEP each call (brands, models, services, pricing, bookings,
+    parts with images and fitments, cart and order items, plans and
+    subscriptions).
+    """
+
+    ROWS_PER_STEP = 5
+    STAFF_TOKEN = 'query-budget-staff-token'
+
+    def __init__(self):
+        self.scale = 0
+        self.vehicle_type = VehicleType.objects.create(name='Budget Motorcycle')
+        self.vehicle_brand = VehicleBrand.objects.create(vehicle_type=self.vehicle_type, name='Budget Brand')
+        self.vehicle_model = VehicleModel.objects.create(vehicle_brand=self.vehicle_brand, name='Budget Model')
+
+        self.service_category = ServiceCategory.objects.create(name='Budget Category')
+        self.service = Service.objects.create(service_category=self.service_category, name='Budget Service')
+        self.other_service = Service.objects.create(service_category=self.service_category, name='Budget Service 2')
+        self.service_pricing = ServicePricing.objects.create(
+            service=self.service, vehicle_model=self.vehicle_model, price=Decimal('499.00'),
+        )
+        ServicePricing.objects.create(
+            service=self.other_service, vehicle_model=self.vehicle_model, price=Decimal('299.00'),
+        )
+
+        self.plan = Plan.objects.create(name='Budget Plan', slug='budget-plan', price=Decimal('999.00'), included_visits=100)
+        self.subscription = Subscription.objects.create(
+            plan=self.plan, contact_email='budget@example.com', status='active',
+        )
+        self.customer = Customer.objects.create(name='Budget Customer', phone='+919800000001')
+        self.booking = self._booking()
+
+        self.part_category = SparePartCategory.objects.create(name='Budget Parts', slug='budget-parts')
+        self.part_brand = SparePartBrand.objects.create(name='Budget Parts Brand', slug='budget-parts-brand')
+        self.part = self._part('anchor')
+        self.cart = Cart.objects.create(session_id='budget-session')
+        self.cart_item = CartItem.objects.create(cart=self.cart, spare_part=self.part, quantity=1, unit_price=self.part.sale_price)
+        self.order = Order.objects.create(
+            session_id='budget-session', customer_name='Budget Customer', phone='+919800000001',
+            address='Budget street', amount_total=Decimal('0'),
+        )
+
+        staff = User.objects.create_user(
+            username='budget-staff', email='budget-staff@example.com', password='x', is_staff=True,
+        )
+        UserSession.objects.create(
+            user=staff,
+            token_digest=UserSession.hash_token(self.STAFF_TOKEN),
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+
+    def _booking(self):
+        booking = Booking.objects.create(
+            customer=self.customer, vehicle_model=self.vehicle_model, service_location='shop',
+            appointment_date=date.today() + timedelta(days=1), appointment_time=time(10, 0),
+            total_amount=Decimal('798.00'), subscription=self.subscription,
+        )
+        BookingService.objects.bulk_create([
+            BookingService(booking=booking, service=self.service, price=Decimal('499.00')),
+            BookingService(booking=booking, service=self.other_service, price=Decimal('299.00')),
+        ])
+        return booking
+
+    def _part(self, suffix):
+        part = SparePart.objects.create(
+            category=self.part_category, brand=self.part_brand, name=f'Budget Part {suffix}',
+            slug=f'budget-part-{suffix}', sku=f'BUDGET-{suffix}', mrp=Decimal('150.00'),
+            sale_price=Decimal('120.00'), stock_qty=1000, in_stock=True,
+        )
+        SparePartImage.objects.bulk_create([
+            SparePartImage(spare_part=part, image=f'spare_parts/images/{suffix}-{i}.jpg', sort_order=i, is_primary=(i == 1))
+            for i in range(2)
+        ])
+        SparePartFitment.objects.create(spare_part=part, vehicle_model=self.vehicle_model)
+        return part
+
+    def grow(self):
+        self.scale += 1
+        for i in range(self.ROWS_PER_STEP):
+            tag = f'{self.scale}-{i}'
+            VehicleBrand.objects.create(vehicle_type=self.vehicle_type, name=f'Budget Brand {tag}')
+            model = VehicleModel.objects.create(vehicle_brand=self.vehicle_brand, name=f'Budget Model {tag}')
+
+            ServiceCategory.objects.create(name=f'Budget Category {tag}')
+            service = Service.objects.create(service_category=self.service_category, name=f'Budget Service {tag}')
+            ServicePricing.objects.bulk_create([
+                ServicePricing(service=service, vehicle_model=self.vehicle_model, price=Decimal('199.00')),
+                ServicePricing(service=service, vehicle_model=model, price=Decimal('249.00')),
+            ])
+
+            self._booking()
+            plan = Plan.objects.create(name=f'Budget Plan {tag}', slug=f'budget-plan-{tag}', price=Decimal('499.00'))
+            Subscription.objects.create(plan=plan, contact_email=self.subscription.contact_email)
+
+            part = self._part(tag)
+            SparePartImage.objects.create(spare_part=self.part, image=f'spare_parts/images/anchor-{tag}.jpg', sort_order=10 + i)
+            SparePartFitment.objects.create(spare_part=self.part, vehicle_model=model)
+            CartItem.objects.create(cart=self.cart, spare_part=part, quantity=1, unit_price=part.sale_price)
+            OrderItem.objects.create(order=self.order, spare_part=part, quantity=1, unit_price=part.sale_price)
+        return self
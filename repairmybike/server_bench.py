@@ -0,0 +1,187 @@
+"""
+Compare the WSGI (sync gunicorn workers) and ASGI (uvicorn workers) server
+modes under concurrent load.
+
+Each mode is started as a real gunicorn process with the same number of
+workers, so both sides get roughly the same memory. The resident memory of
+the master and its workers is sampled after the run and reported with the
+throughput, so the comparison is requests/s and latency per MB, not only
+per worker. The load generator is a pool of keep-alive HTTP clients, one
+per simulated concurrent user.
+"""
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+
+MODES = {
+    'wsgi': {
+        'app': 'repairmybike.wsgi:application',
+        'worker_class': 'sync',
+        'env': {'ASYNC_VIEWS': 'False'},
+    },
+    'asgi': {
+        'app': 'repairmybike.asgi:application',
+        'worker_class': 'uvicorn_worker.UvicornWorker',
+        'env': {'ASYNC_VIEWS': 'True'},
+    },
+}
+
+# Both sides apply the DRF throttles; lift the limits so neither is measured
+# answering 429s
+BENCH_ENV = {
+    'THROTTLE_ANON_RATE': '1000000/hour',
+    'THROTTLE_USER_RATE': '1000000/hour',
+}
+
+DEFAULT_PATHS = (
+    '/health/',
+    '/api/vehicles/vehicle-types/',
+    '/api/services/service-categories/',
+    '/api/services/services/',
+)
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as fh:
+            return [int(p) for p in fh.read().split()]
+    except OSError:
+        return []
+
+
+def _rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as fh:
+            for line in fh:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree_rss_mb(pid):
+    """RSS of pid plus its direct children (gunicorn master + workers), in MB."""
+    pids = [pid] + _children(pid)
+    return round(sum(_rss_kb(p) for p in pids) / 1024, 1)
+
+
+class Server:
+    def __init__(self, mode, port, workers, extra_env=None):
+        spec = MODES[mode]
+        self.mode = mode
+        self.port = port
+        env = dict(os.environ, **BENCH_ENV, **spec['env'], **(extra_env or {}))
+        env.setdefault('DJANGO_SETTINGS_MODULE', os.environ.get('DJANGO_SETTINGS_MODULE', 'repairmybike.settings'))
+        self.process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', spec['app'],
+                '--bind', f'127.0.0.1:{port}',
+                '--workers', str(workers),
+                '--worker-class', spec['worker_class'],
+                '--timeout', '120',
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+    def wait_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'{self.mode} server exited: {self.process.stderr.read().decode()[-2000:]}')
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=2)
+                conn.request('GET', '/health/', headers={'Host': 'localhost'})
+                if conn.getresponse().status < 500:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.25)
+        raise RuntimeError(f'{self.mode} server did not become ready within {timeout}s')
+
+    def rss_mb(self):
+        return process_tree_rss_mb(self.process.pid)
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def _client_loop(port, paths, count, results, lock):
+    conn = None
+    latencies, errors = [], 0
+    for i in range(count):
+        path = paths[i % len(paths)]
+        started = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            # X-Forwarded-Proto keeps SECURE_SSL_REDIRECT from answering with 301s
+            conn.request('GET', path, headers={'Host': 'localhost', 'X-Forwarded-Proto': 'https'})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn = None
+        latencies.append((time.perf_counter() - started) * 1000)
+    with lock:
+        results['latencies'].extend(latencies)
+        results['errors'] += errors
+
+
+def run_load(port, paths, concurrency, total_requests):
+    results = {'latencies': [], 'errors': 0}
+    lock = threading.Lock()
+    per_client = max(1, total_requests // concurrency)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(_client_loop, port, paths, per_client, results, lock)
+    elapsed = time.perf_counter() - started
+    lat = np.asarray(results['latencies'])
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if len(lat) else (0, 0, 0)
+    return {
+        'concurrency': concurrency,
+        'requests': int(len(lat)),
+        'errors': results['errors'],
+        'rps': round(len(lat) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+    }
+
+
+def compare_modes(modes, workers, concurrency_levels, total_requests, paths=DEFAULT_PATHS, port=8765, extra_env=None):
+    report = {'workers': workers, 'paths': list(paths), 'modes': {}}
+    for offset, mode in enumerate(modes):
+        server = Server(mode, port + offset, workers, extra_env=extra_env)
+        try:
+            server.wait_ready()
+            # Warm caches and worker imports before measuring
+            run_load(server.port, paths, min(4, max(concurrency_levels)), 50)
+            levels = [run_load(server.port, paths, c, total_requests) for c in concurrency_levels]
+            rss = server.rss_mb()
+        finally:
+            server.stop()
+        for level in levels:
+            level['rps_per_100mb'] = round(level['rps'] / rss * 100, 1) if rss else None
+        report['modes'][mode] = {'rss_mb': rss, 'levels': levels}
+    return report
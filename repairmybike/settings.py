@@ -14,6 +14,8 @@ from pathlib import Path
 from decouple import config
 import os
 import secrets
+import tempfile
+import warnings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -50,6 +52,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'repairmybike.db_routing.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -96,14 +99,14 @@ if DATABASE_URL:
             ssl_require=True,
         )
     }
-    # Enable atomic requests for better data consistency
-    DATABASES['default']['ATOMIC_REQUESTS'] = True
+    # Off by default: write paths open their own transactions and outbound
+    # calls never run inside one (see repairmybike/transactions.py)
+    DATABASES['default']['ATOMIC_REQUESTS'] = config('ATOMIC_REQUESTS', default=False, cast=bool)
     # Add PostgreSQL-specific options
     DATABASES['default']['OPTIONS'] = {
         'sslmode': 'require',
         'connect_timeout': 10,
     }
-    print("✓ Configured PostgreSQL database from DATABASE_URL")
 else:
     DATABASES = {
         'default': {
@@ -111,7 +114,41 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
-    print("✓ Configured SQLite database (no DATABASE_URL provided)")
+
+# Read replicas: comma-separated URLs, registered as replica_1, replica_2, ...
+# Safe requests to REPLICA_READ_PREFIXES read from a healthy replica unless
+# the client wrote within REPLICA_STICKY_SECONDS (see repairmybike/db_routing.py).
+DATABASE_REPLICAS = []
+for _index, _replica_url in enumerate(
+    config('DATABASE_REPLICA_URLS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]),
+    start=1,
+):
+    _alias = f'replica_{_index}'
+    DATABASES[_alias] = dj_database_url.parse(
+        _replica_url,
+        conn_max_age=600,
+        conn_health_checks=True,
+        ssl_require=_replica_url.startswith('postgres'),
+    )
+    DATABASES[_alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ['repairmybike.db_routing.ReplicaRouter']
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+REPLICA_RETRY_SECONDS = config('REPLICA_RETRY_SECONDS', default=30, cast=int)
+REPLICA_READ_PREFIXES = (
+    '/api/vehicles/',
+    '/api/services/',
+    '/api/shop/',
+    '/api/spare-parts/categories/',
+    '/api/spare-parts/brands/',
+    '/api/spare-parts/parts/',
+    '/api/spare-parts/orders/',
+    '/api/subscriptions/plans/',
+    '/api/bookings/',
+    '/api/payments/',
+    '/api/staff/bookings/',
+)
 
 
 
@@ -127,7 +164,6 @@ if DEBUG or not REDIS_URL:
             'LOCATION': 'vehicle_repair_local',
         }
     }
-    print("✓ Configured local memory cache for development")
 else:
     # Production - use Redis cache
     try:
@@ -147,9 +183,8 @@ else:
                 'TIMEOUT': 300,
             }
         }
-        print("✓ Configured Redis cache from REDIS_URL")
     except Exception as e:
-        print(f"⚠ Redis configuration failed, falling back to local cache: {e}")
+        warnings.warn(f"Redis configuration failed, falling back to local cache: {e}")
         CACHES = {
             'default': {
                 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -157,6 +192,23 @@ else:
             }
         }
 
+# Request metrics (/metrics, Prometheus text format). Workers write their
+# registries to METRICS_DIR, which must be shared by all gunicorn workers.
+METRICS_ENABLED = config('METRICS_ENABLED', default=False, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_DIR = config('METRICS_DIR', default=os.path.join(tempfile.gettempdir(), 'repairmybike_metrics'))
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=int)
+
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'repairmybike.metrics.MetricsMiddleware')
+    _instrumented_backends = {
+        'django.core.cache.backends.locmem.LocMemCache': 'repairmybike.metrics.InstrumentedLocMemCache',
+        'django_redis.cache.RedisCache': 'repairmybike.metrics.InstrumentedRedisCache',
+    }
+    CACHES['default']['BACKEND'] = _instrumented_backends.get(
+        CACHES['default']['BACKEND'], CACHES['default']['BACKEND']
+    )
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -178,6 +230,29 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Media files (local default)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Build resized WebP variants of catalog images right after they are saved
+# (repairmybike.image_variants); build_image_variants backfills in bulk
+IMAGE_VARIANTS_ON_SAVE = config('IMAGE_VARIANTS_ON_SAVE', default=True, cast=bool)
+# Memoized storage.url() results (repairmybike.media_urls), per process
+MEDIA_URL_CACHE_SECONDS = config('MEDIA_URL_CACHE_SECONDS', default=300, cast=int)
+MEDIA_URL_CACHE_SIZE = config('MEDIA_URL_CACHE_SIZE', default=20000, cast=int)
+# Django 5.x only reads the storage backends from STORAGES
+# (DEFAULT_FILE_STORAGE is ignored); the media blocks below swap 'default'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# Presigned direct-to-bucket uploads (repairmybike.direct_uploads, S3/R2 only)
+DIRECT_UPLOAD_MAX_BYTES = config('DIRECT_UPLOAD_MAX_BYTES', default=20 * 1024 * 1024, cast=int)
+DIRECT_UPLOAD_EXPIRES = config('DIRECT_UPLOAD_EXPIRES', default=900, cast=int)
+DIRECT_UPLOAD_PENDING_PREFIX = config('DIRECT_UPLOAD_PENDING_PREFIX', default='uploads/pending/')
+# Row caps for staff export downloads (repairmybike.exports). gunicorn kills a request after
+# --timeout 120s and XLSX sends nothing until the whole file is built (~6k rows/s), CSV ~35k rows/s.
+# Larger exports run on the server with `manage.py export_data`.
+EXPORT_HTTP_MAX_ROWS = {
+    'csv': config('EXPORT_HTTP_MAX_ROWS_CSV', default=1000000, cast=int),
+    'xlsx': config('EXPORT_HTTP_MAX_ROWS_XLSX', default=200000, cast=int),
+}
 
 """
 Cloudinary media storage
@@ -191,7 +266,7 @@ if USE_CLOUDINARY:
     INSTALLED_APPS += ['cloudinary', 'cloudinary_storage']
 
     # Use Cloudinary storage backend for media
-    DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+    STORAGES['default'] = {'BACKEND': 'cloudinary_storage.storage.MediaCloudinaryStorage'}
 
     # Either provide consolidated CLOUDINARY_URL or discrete keys
     CLOUDINARY_URL = config('CLOUDINARY_URL', default='')
@@ -227,7 +302,7 @@ if USE_CLOUDFLARE_R2 and not USE_CLOUDINARY:
     # Disable auth query string for public buckets
     AWS_QUERYSTRING_AUTH = config('R2_QUERYSTRING_AUTH', default=False, cast=bool)
 
-    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+    STORAGES['default'] = {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'}
 
     # Construct MEDIA_URL for clients
     if AWS_S3_CUSTOM_DOMAIN:
@@ -236,8 +311,14 @@ if USE_CLOUDFLARE_R2 and not USE_CLOUDINARY:
         # Direct endpoint-style URL
         MEDIA_URL = f"{AWS_S3_ENDPOINT_URL}/{AWS_STORAGE_BUCKET_NAME}/"
     else:
-        # Fallback to default; warns in logs
-        print("⚠️ Cloudflare R2 is enabled but MEDIA_URL could not be constructed; check env vars.")
+        # Fallback to default
+        warnings.warn("Cloudflare R2 is enabled but MEDIA_URL could not be constructed; check env vars.")
+
+# Product image backfill (spare_parts fetch_part_images)
+BING_SEARCH_KEY = config('BING_SEARCH_KEY', default='')
+BING_SEARCH_ENDPOINT = config('BING_SEARCH_ENDPOINT', default='https://api.bing.microsoft.com/v7.0/images/search')
+IMAGE_FETCH_WORKERS = config('IMAGE_FETCH_WORKERS', default=8, cast=int)
+IMAGE_FETCH_MAX_BYTES = config('IMAGE_FETCH_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -249,6 +330,44 @@ AUTH_USER_MODEL = 'authentication.User'
 DESCOPE_PROJECT_ID = config('DESCOPE_PROJECT_ID', default='P320Gzmd6mIOt2NOn7WbViy50YyA')
 DESCOPE_MANAGEMENT_KEY = config('DESCOPE_MANAGEMENT_KEY', default='T320HLo8895TfVVsGuEztaj1onlt')
 
+# OTP delivery
+# OTP_PROVIDER: 'descope' (default) or 'fake' (local, sleeps OTP_FAKE_LATENCY_MS, for dev/benchmarks)
+OTP_PROVIDER = config('OTP_PROVIDER', default='descope')
+OTP_FAKE_LATENCY_MS = config('OTP_FAKE_LATENCY_MS', default=0, cast=int)
+# Send OTPs on a background thread pool and return a pollable request id (HTTP 202)
+OTP_ASYNC_DISPATCH = config('OTP_ASYNC_DISPATCH', default=False, cast=bool)
+OTP_DISPATCH_WORKERS = config('OTP_DISPATCH_WORKERS', default=4, cast=int)
+
+# Session activity tracking (write-behind): last_activity is rounded down to
+# GRANULARITY seconds and flushed in batches every FLUSH_INTERVAL seconds
+SESSION_ACTIVITY_GRANULARITY = config('SESSION_ACTIVITY_GRANULARITY', default=60, cast=int)
+SESSION_ACTIVITY_FLUSH_INTERVAL = config('SESSION_ACTIVITY_FLUSH_INTERVAL', default=30, cast=int)
+
+# ASGI mode (SERVER_MODE=asgi in start.sh): serve catalog list endpoints and
+# health checks from async views. Only worth enabling under uvicorn workers;
+# under WSGI every async view pays for its own event loop.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+# Thread pool used by async views for blocking SDK calls (Descope, Razorpay)
+OFFLOAD_MAX_WORKERS = config('OFFLOAD_MAX_WORKERS', default=16, cast=int)
+OFFLOAD_TIMEOUT = config('OFFLOAD_TIMEOUT', default=15, cast=float)
+
+# Health checks (/health/ liveness, /ready/ readiness). Each dependency probe
+# gets HEALTH_PROBE_TIMEOUT seconds; results are reused for HEALTH_CACHE_SECONDS
+# (storage: HEALTH_STORAGE_CACHE_SECONDS, remote storage APIs are rate-limited).
+# /ready/ returns 503 when a probe listed in HEALTH_CRITICAL_PROBES fails.
+HEALTH_PROBE_TIMEOUT = config('HEALTH_PROBE_TIMEOUT', default=2.0, cast=float)
+HEALTH_CACHE_SECONDS = config('HEALTH_CACHE_SECONDS', default=5, cast=float)
+HEALTH_STORAGE_CACHE_SECONDS = config('HEALTH_STORAGE_CACHE_SECONDS', default=60, cast=float)
+HEALTH_CRITICAL_PROBES = config('HEALTH_CRITICAL_PROBES', default='database,cache',
+                                cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+HEALTH_PROBE_WORKERS = config('HEALTH_PROBE_WORKERS', default=8, cast=int)
+HEALTH_STORAGE_PROBE_PATH = config('HEALTH_STORAGE_PROBE_PATH', default='health/probe.txt')
+
+# Public origin used by `manage.py warm_caches` (and the gunicorn post_fork
+# warmer) so precomputed catalog payloads carry the same absolute media URLs
+# a request to that host would produce
+CATALOG_BASE_URL = config('CATALOG_BASE_URL', default='')
+
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
@@ -272,8 +391,8 @@ REST_FRAMEWORK = {
         'rest_framework.throttling.UserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '100/hour',
-        'user': '1000/hour',
+        'anon': config('THROTTLE_ANON_RATE', default='100/hour'),
+        'user': config('THROTTLE_USER_RATE', default='1000/hour'),
     },
 }
 
@@ -293,6 +412,9 @@ CORS_ALLOWED_ORIGIN_REGEXES = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+# Read-your-writes pin for clients without cookies (see repairmybike/db_routing.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'x-db-pinned-until')
+CORS_EXPOSE_HEADERS = ['X-DB-Pinned-Until']
 
 # CSRF Configuration
 CSRF_TRUSTED_ORIGINS = [
@@ -324,10 +446,25 @@ if not DEBUG:
     SECURE_REFERRER_POLICY = 'strict-origin-when-cross-origin'
 
 # Logging Configuration
+# Records are queued on the request thread and written by a background
+# listener (repairmybike.log.QueueListenerHandler) as JSON lines.
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+LOG_FORMAT = config('LOG_FORMAT', default='json')  # 'json' or 'text'
+LOG_FILE = config('LOG_FILE', default=str(BASE_DIR / 'logs' / 'django.log'))
+LOG_MAX_BYTES = config('LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+LOG_BACKUP_COUNT = config('LOG_BACKUP_COUNT', default=5, cast=int)
+# Fraction of DEBUG records kept when LOG_LEVEL=DEBUG
+LOG_DEBUG_SAMPLE_RATE = config('LOG_DEBUG_SAMPLE_RATE', default=0.1, cast=float)
+# Log full request/response payloads in views that support it (never in production)
+LOG_PAYLOADS = config('LOG_PAYLOADS', default=False, cast=bool)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
+        'json': {
+            '()': 'repairmybike.log.JSONFormatter',
+        },
         'verbose': {
             'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
             'style': '{',
@@ -337,36 +474,51 @@ LOGGING = {
             'style': '{',
         },
     },
+    'filters': {
+        'sample_debug': {
+            '()': 'repairmybike.log.SamplingFilter',
+            'rate': LOG_DEBUG_SAMPLE_RATE,
+        },
+    },
     'handlers': {
         'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'level': LOG_LEVEL,
+            'class': 'repairmybike.log.LockingRotatingFileHandler',
+            'filename': LOG_FILE,
+            'maxBytes': LOG_MAX_BYTES,
+            'backupCount': LOG_BACKUP_COUNT,
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
         },
         'console': {
-            'level': 'INFO',
+            'level': LOG_LEVEL,
             'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'simple',
+        },
+        'queue': {
+            'class': 'repairmybike.log.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+            'filters': ['sample_debug'],
         },
     },
     'root': {
-        'handlers': ['console', 'file'],
-        'level': 'INFO',
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
             'propagate': False,
         },
         'authentication': {
-            'handlers': ['console', 'file'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
             'propagate': False,
         },
     },
 }
 
 # WhiteNoise Configuration
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise serves STATIC_ROOT through its middleware. The static backend lives in
+# STORAGES['staticfiles'] (STATICFILES_STORAGE is ignored by Django 5.x); switching it to
+# 'whitenoise.storage.CompressedManifestStaticFilesStorage' needs collectstatic before tests.
@@ -0,0 +1,107 @@
+"""
+Measure process startup: which imports `manage.py check` and a WSGI worker
+pay for before doing any work.
+
+Each target runs in a fresh interpreter under `python -X importtime`, so
+nothing is already cached in sys.modules. The runner reports the median
+wall time over a few runs and the total time spent importing. It also
+lists the most expensive modules by self time, and third-party packages by
+cumulative time. Those are what lazy imports can take off the boot path.
+
+    targets:
+      check  manage.py check (release phase, every management command)
+      wsgi   repairmybike.wsgi plus the URLconf, i.e. what a gunicorn
+             worker loads before it can answer its first request
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+_WSGI_SNIPPET = (
+    "import repairmybike.wsgi; "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+TARGETS = {
+    'check': ['manage.py', 'check'],
+    'wsgi': ['-c', _WSGI_SNIPPET],
+}
+
+# import time:  self [us] | cumulative | imported package
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def _local_packages():
+    base = Path(settings.BASE_DIR)
+    return {p.name for p in base.iterdir() if (p / '__init__.py').exists()}
+
+
+def summarize(rows, top=15):
+    local = _local_packages()
+    stdlib = set(sys.stdlib_module_names)
+    # Cumulative time of each package's outermost import is what deferring it saves
+    packages = defaultdict(int)
+    seen = set()
+    for module, _self_us, cumulative_us, _depth in rows:
+        package = module.split('.')[0]
+        if module == package and package not in seen:
+            seen.add(package)
+            packages[package] = cumulative_us
+    third_party = {
+        name: us for name, us in packages.items()
+        if name not in stdlib and name not in local and name != 'django' and not name.startswith('_')
+    }
+    by_self = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+    return {
+        'modules': len(rows),
+        'import_ms': round(sum(row[1] for row in rows) / 1000, 1),
+        'top_self_ms': [{'module': m, 'ms': round(s / 1000, 2)} for m, s, _c, _d in by_self],
+        'third_party_ms': [
+            {'package': name, 'ms': round(us / 1000, 2)}
+            for name, us in sorted(third_party.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        'imported': sorted(packages),
+    }
+
+
+def run_target(name, runs=3, top=15):
+    """Start the target `runs` times; return wall-time stats and the import breakdown of the last run."""
+    cmd = [sys.executable, '-X', 'importtime', *TARGETS[name]]
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'repairmybike.settings'))
+    walls, stderr = [], ''
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        walls.append((time.perf_counter() - started) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{name} exited with {proc.returncode}: {proc.stderr.strip().splitlines()[-1:]}")
+        stderr = proc.stderr
+    result = summarize(parse_importtime(stderr), top=top)
+    result.update({
+        'runs': runs,
+        'wall_ms_median': round(statistics.median(walls), 1),
+        'wall_ms_min': round(min(walls), 1),
+    })
+    return result
+
+
+def profile(targets=None, runs=3, top=15):
+    return {name: run_target(name, runs=runs, top=top) for name in (targets or TARGETS)}
@@ -0,0 +1,330 @@
+"""
+Vectorized synthetic data for benchmarks.
+
+build_plan(total_rows) splits a row budget (10k .. 10M) across the catalog
+and transactional tables. generate() draws every column with NumPy in
+chunks and inserts each chunk with bulk_create, so memory stays bounded at
+any scale. All generated rows carry the SYNTHETIC_PREFIX so they can be
+found and removed again with purge().
+"""
+import logging
+import math
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, time as dt_time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from bookings.models import Booking, BookingService, Customer
+from services.models import Service, ServiceCategory, ServicePricing
+from spare_parts.models import (
+    Cart,
+    CartItem,
+    Order,
+    OrderItem,
+    SparePart,
+    SparePartBrand,
+    SparePartCategory,
+    SparePartFitment,
+)
+from vehicles.models import VehicleBrand, VehicleModel, VehicleType
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_PREFIX = 'SYN'
+DEFAULT_CHUNK_SIZE = 5000
+SEARCH_TERMS = ('brake', 'chain', 'clutch', 'filter', 'battery', 'lamp', 'tyre', 'spark', 'mirror', 'cable')
+BOOKING_STATUSES = ('pending', 'confirmed', 'in_progress', 'completed', 'cancelled')
+
+
+@dataclass
+class ScalePlan:
+    vehicle_brands: int
+    vehicle_models: int
+    service_categories: int
+    services: int
+    pricing: int
+    part_categories: int
+    part_brands: int
+    spare_parts: int
+    fitments: int
+    customers: int
+    bookings: int
+    booking_services: int
+    orders: int
+    order_items: int
+
+    @property
+    def total_rows(self):
+        return sum(asdict(self).values())
+
+
+def build_plan(total_rows):
+    """Split total_rows across tables; the pricing matrix is services x models."""
+    services = min(max(int(math.sqrt(total_rows * 0.25) / 2), 10), 2000)
+    models = max(int(total_rows * 0.25 / services), 10)
+    spare_parts = max(int(total_rows * 0.10), 50)
+    bookings = max(int(total_rows * 0.12), 50)
+    orders = max(int(total_rows * 0.05), 20)
+    return ScalePlan(
+        vehicle_brands=max(models // 25, 4),
+        vehicle_models=models,
+        service_categories=max(services // 10, 3),
+        services=services,
+        pricing=services * models,
+        part_categories=max(spare_parts // 5000, 5),
+        part_brands=max(spare_parts // 2000, 5),
+        spare_parts=spare_parts,
+        fitments=min(max(int(total_rows * 0.15), 50), spare_parts * models),
+        customers=max(int(total_rows * 0.04), 20),
+        bookings=bookings,
+        booking_services=bookings * 2,
+        orders=orders,
+        order_items=orders * 2,
+    )
+
+
+def _chunks(total, chunk_size):
+    for start in range(0, total, chunk_size):
+        yield start, min(start + chunk_size, total)
+
+
+def _money(values):
+    return [Decimal(int(v)) for v in values]
+
+
+def _ids(queryset):
+    return np.fromiter(queryset.order_by('pk').values_list('pk', flat=True), dtype=np.int64)
+
+
+class SyntheticDataGenerator:
+    def __init__(self, plan, seed=42, chunk_size=DEFAULT_CHUNK_SIZE, stdout=None):
+        self.plan = plan
+        self.rng = np.random.default_rng(seed)
+        self.chunk_size = chunk_size
+        self.stdout = stdout
+        self.timings = {}
+
+    def _log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+        else:
+            logger.info(message)
+
+    def _insert(self, label, model, total, build_chunk):
+        """bulk_create total rows produced chunk by chunk by build_chunk(start, stop)."""
+        started = time.perf_counter()
+        for start, stop in _chunks(total, self.chunk_size):
+            model.objects.bulk_create(build_chunk(start, stop), batch_size=self.chunk_size)
+        elapsed = time.perf_counter() - started
+        self.timings[label] = {'rows': total, 'seconds': round(elapsed, 3)}
+        self._log(f"{label}: {total} rows in {elapsed:.2f}s")
+
+    def generate(self):
+        p = self.plan
+        rng = self.rng
+        prefix = SYNTHETIC_PREFIX
+
+        vehicle_type, _ = VehicleType.objects.get_or_create(name=f'{prefix} Motorcycle')
+        self._insert('vehicle_brands', VehicleBrand, p.vehicle_brands, lambda a, b: [
+            VehicleBrand(vehicle_type=vehicle_type, name=f'{prefix} Brand {i}') for i in range(a, b)
+        ])
+        brand_ids = _ids(VehicleBrand.objects.filter(vehicle_type=vehicle_type))
+
+        def models_chunk(a, b):
+            brands = rng.choice(brand_ids, size=b - a)
+            return [
+                VehicleModel(vehicle_brand_id=int(brand), name=f'{prefix} Model {i}')
+                for i, brand in zip(range(a, b), brands)
+            ]
+        self._insert('vehicle_models', VehicleModel, p.vehicle_models, models_chunk)
+        model_ids = _ids(VehicleModel.objects.filter(vehicle_brand__vehicle_type=vehicle_type))
+
+        self._insert('service_categories', ServiceCategory, p.service_categories, lambda a, b: [
+            ServiceCategory(name=f'{prefix} Category {i}') for i in range(a, b)
+        ])
+        category_ids = _ids(ServiceCategory.objects.filter(name__startswith=f'{prefix} '))
+
+        def services_chunk(a, b):
+            categories = category_ids[np.arange(a, b) % len(category_ids)]
+            ratings = np.round(rng.uniform(3.0, 5.0, size=b - a), 2)
+            return [
+                Service(
+                    service_category_id=int(category),
+                    name=f'{prefix} Service {i}',
+                    rating=Decimal(str(rating)),
+                    reviews_count=int(reviews),
+                    specifications=['Synthetic'],
+                )
+                for i, category, rating, reviews in zip(
+                    range(a, b), categories, ratings, rng.integers(0, 500, size=b - a)
+                )
+            ]
+        self._insert('services', Service, p.services, services_chunk)
+        service_ids = _ids(Service.objects.filter(name__startswith=f'{prefix} '))
+
+        # Full services x models matrix, walked in row-major order
+        def pricing_chunk(a, b):
+            idx = np.arange(a, b)
+            prices = rng.integers(199, 4999, size=b - a)
+            return [
+                ServicePricing(service_id=int(s), vehicle_model_id=int(m), price=price)
+                for s, m, price in zip(
+                    service_ids[idx // len(model_ids)], model_ids[idx % len(model_ids)], _money(prices)
+                )
+            ]
+        self._insert('pricing', ServicePricing, len(service_ids) * len(model_ids), pricing_chunk)
+
+        self._insert('part_categories', SparePartCategory, p.part_categories, lambda a, b: [
+            SparePartCategory(name=f'{prefix} Part Category {i}', slug=f'syn-part-category-{i}')
+            for i in range(a, b)
+        ])
+        self._insert('part_brands', SparePartBrand, p.part_brands, lambda a, b: [
+            SparePartBrand(name=f'{prefix} Part Brand {i}', slug=f'syn-part-brand-{i}') for i in range(a, b)
+        ])
+        part_category_ids = _ids(SparePartCategory.objects.filter(slug__startswith='syn-'))
+        part_brand_ids = _ids(SparePartBrand.objects.filter(slug__startswith='syn-'))
+
+        def parts_chunk(a, b):
+            n = b - a
+            mrp = rng.integers(150, 15000, size=n)
+            discount = rng.uniform(0.0, 0.3, size=n)
+            terms = rng.integers(0, len(SEARCH_TERMS), size=n)
+            stock = rng.integers(0, 200, size=n)
+            return [
+                SparePart(
+                    category_id=int(cat),
+                    brand_id=int(brand),
+                    name=f'{prefix} {SEARCH_TERMS[term].title()} Part {i}',
+                    slug=f'syn-part-{i}',
+                    sku=f'SYN-{i:08d}',
+                    mrp=Decimal(int(m)),
+                    sale_price=Decimal(int(m * (1 - d))),
+                    in_stock=bool(s > 0),
+                    stock_qty=int(s),
+                )
+                for i, cat, brand, m, d, term, s in zip(
+                    range(a, b),
+                    rng.choice(part_category_ids, size=n),
+                    rng.choice(part_brand_ids, size=n),
+                    mrp, discount, terms, stock,
+                )
+            ]
+        self._insert('spare_parts', SparePart, p.spare_parts, parts_chunk)
+        part_ids = _ids(SparePart.objects.filter(sku__startswith='SYN-'))
+
+        # Unique (part, model) pairs drawn from the flattened pair space
+        pair_idx = np.sort(rng.choice(len(part_ids) * len(model_ids), size=p.fitments, replace=False, shuffle=False))
+
+        def fitments_chunk(a, b):
+            idx = pair_idx[a:b]
+            return [
+                SparePartFitment(spare_part_id=int(part), vehicle_model_id=int(model))
+                for part, model in zip(part_ids[idx // len(model_ids)], model_ids[idx % len(model_ids)])
+            ]
+        self._insert('fitments', SparePartFitment, p.fitments, fitments_chunk)
+
+        self._insert('customers', Customer, p.customers, lambda a, b: [
+            Customer(name=f'{prefix} Customer {i}', phone=f'+9170{i:08d}') for i in range(a, b)
+        ])
+        customer_ids = _ids(Customer.objects.filter(name__startswith=f'{prefix} '))
+
+        today = date.today()
+
+        def bookings_chunk(a, b):
+            n = b - a
+            return [
+                Booking(
+                    customer_id=int(customer),
+                    vehicle_model_id=int(model),
+                    service_location='shop' if home == 0 else 'home',
+                    address='' if home == 0 else 'Synthetic address',
+                    appointment_date=today + timedelta(days=int(offset)),
+                    appointment_time=dt_time(hour=int(hour)),
+                    total_amount=amount,
+                    booking_status=BOOKING_STATUSES[status],
+                    notes=f'{prefix} booking {i}',
+                )
+                for i, customer, model, home, offset, hour, amount, status in zip(
+                    range(a, b),
+                    rng.choice(customer_ids, size=n),
+                    rng.choice(model_ids, size=n),
+                    rng.integers(0, 2, size=n),
+                    rng.integers(-180, 30, size=n),
+                    rng.integers(9, 19, size=n),
+                    _money(rng.integers(299, 9999, size=n)),
+                    rng.integers(0, len(BOOKING_STATUSES), size=n),
+                )
+            ]
+        self._insert('bookings', Booking, p.bookings, bookings_chunk)
+        booking_ids = _ids(Booking.objects.filter(customer__name__startswith=f'{prefix} '))
+
+        def booking_services_chunk(a, b):
+            idx = np.arange(a, b)
+            return [
+                BookingService(booking_id=int(booking), service_id=int(service), price=price)
+                for booking, service, price in zip(
+                    booking_ids[idx % len(booking_ids)],
+                    rng.choice(service_ids, size=b - a),
+                    _money(rng.integers(199, 4999, size=b - a)),
+                )
+            ]
+        self._insert('booking_services', BookingService, p.booking_services, booking_services_chunk)
+
+        def orders_chunk(a, b):
+            n = b - a
+            return [
+                Order(
+                    session_id=f'syn-session-{i}',
+                    customer_name=f'{prefix} Customer {i}',
+                    phone=f'+9180{i:08d}',
+                    address='Synthetic address',
+                    amount_total=amount,
+                )
+                for i, amount in zip(range(a, b), _money(rng.integers(150, 30000, size=n)))
+            ]
+        self._insert('orders', Order, p.orders, orders_chunk)
+        order_ids = _ids(Order.objects.filter(session_id__startswith='syn-session-'))
+
+        def order_items_chunk(a, b):
+            idx = np.arange(a, b)
+            return [
+                OrderItem(order_id=int(order), spare_part_id=int(part), quantity=int(qty), unit_price=price)
+                for order, part, qty, price in zip(
+                    order_ids[idx % len(order_ids)],
+                    rng.choice(part_ids, size=b - a),
+                    rng.integers(1, 4, size=b - a),
+                    _money(rng.integers(150, 15000, size=b - a)),
+                )
+            ]
+        self._insert('order_items', OrderItem, p.order_items, order_items_chunk)
+        return self.timings
+
+
+def has_synthetic_data():
+    return VehicleType.objects.filter(name=f'{SYNTHETIC_PREFIX} Motorcycle').exists()
+
+
+def purge():
+    """Delete every synthetic row, children first so most deletes are single statements."""
+    prefix = f'{SYNTHETIC_PREFIX} '
+    with transaction.atomic():
+        OrderItem.objects.filter(order__session_id__startswith='syn-session-').delete()
+        Order.objects.filter(session_id__startswith='syn-session-').delete()
+        CartItem.objects.filter(spare_part__sku__startswith='SYN-').delete()
+        Cart.objects.filter(session_id__startswith='syn-session-').delete()
+        BookingService.objects.filter(booking__customer__name__startswith=prefix).delete()
+        Booking.objects.filter(customer__name__startswith=prefix).delete()
+        Customer.objects.filter(name__startswith=prefix).delete()
+        SparePartFitment.objects.filter(spare_part__sku__startswith='SYN-').delete()
+        SparePart.objects.filter(sku__startswith='SYN-').delete()
+        SparePartBrand.objects.filter(slug__startswith='syn-').delete()
+        SparePartCategory.objects.filter(slug__startswith='syn-').delete()
+        ServicePricing.objects.filter(service__name__startswith=prefix).delete()
+        Service.objects.filter(name__startswith=prefix).delete()
+        ServiceCategory.objects.filter(name__startswith=prefix).delete()
+        VehicleModel.objects.filter(name__startswith=prefix).delete()
+        VehicleBrand.objects.filter(name__startswith=prefix).delete()
+        VehicleType.objects.filter(name=f'{SYNTHETIC_PREFIX} Motorcycle').delete()
@@ -0,0 +1,761 @@
+import asyncio
+from decimal import Decimal
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import mock
+from urllib.parse import unquote, urlencode, urlparse
+
+import requests
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.cache.backends.locmem import LocMemCache
+from django.contrib.auth import get_user_model
+from django.core.handlers.base import BaseHandler
+from django.db import connection, connections, transaction
+from django.db.utils import load_backend
+from django.test import AsyncRequestFactory, TestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, resolve, reverse
+from rest_framework.test import APIClient
+from rest_framework.throttling import AnonRateThrottle
+
+from authentication.activity import flush_activity
+
+from services import async_views as service_async_views
+from services.models import Service, ServiceCategory, ServicePricing
+from services.views import ServiceCategoryViewSet, ServicePricingViewSet, ServiceViewSet
+from spare_parts.models import SparePart, SparePartBrand, SparePartCategory, SparePartFitment, SparePartImage
+from vehicles import async_views as vehicle_async_views
+from vehicles.models import VehicleBrand, VehicleModel, VehicleType
+from vehicles.serializers import VehicleBrandSerializer, VehicleModelSerializer
+from vehicles.views import VehicleBrandViewSet, VehicleModelViewSet, VehicleTypeViewSet
+
+from . import (
+    benchmarks, bulk, catalog_cache, db_routing, health, image_variants, media_urls, metrics, query_budgets,
+    startup_profile, synthetic,
+)
+from .offload import OffloadedClient, async_get
+from .log import JSONFormatter, SamplingFilter
+
+SAVEPOINT_SQL = re.compile(r'^(RELEASE |ROLLBACK TO )?SAVEPOINT ', re.IGNORECASE)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir, ignore_errors=True)
+        metrics.registry.counters.clear()
+        metrics.registry.histograms.clear()
+
+    def test_metrics_disabled_returns_404(self):
+        with override_settings(METRICS_ENABLED=False):
+            self.assertEqual(self.client.get('/metrics', secure=True).status_code, 404)
+
+    def test_requests_are_recorded_and_exposed(self):
+        with override_settings(METRICS_ENABLED=True, METRICS_DIR=self.metrics_dir, METRICS_TOKEN='s3cret'), \
+                modify_settings(MIDDLEWARE={'prepend': 'repairmybike.metrics.MetricsMiddleware'}):
+            self.client.get('/api/vehicles/vehicle-types/', secure=True)
+
+            self.assertEqual(self.client.get('/metrics', secure=True).status_code, 401)
+            resp = self.client.get('/metrics', secure=True, HTTP_AUTHORIZATION='Bearer s3cret')
+
+        body = resp.content.decode()
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_db_queries_count{view="vehicle-type-list"} 1', body)
+        self.assertIn('http_response_size_bytes_count{view="vehicle-type-list"} 1', body)
+
+    def test_cache_mixin_counts_hits_and_misses(self):
+        backend = metrics.InstrumentedLocMemCache('metrics-test', {})
+        stats = metrics.RequestStats()
+        token = metrics._request_stats.set(stats)
+        try:
+            backend.set('present', 1)
+            backend.get('present')
+            backend.get('absent')
+            backend.get_many(['present', 'absent'])
+        finally:
+            metrics._request_stats.reset(token)
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (2, 2))
+        self.assertIsInstance(backend, LocMemCache)
+
+
+class LoggingPipelineTests(TestCase):
+    def test_json_formatter_includes_extra_fields(self):
+        record = logging.LogRecord('catalog', logging.INFO, __file__, 1, 'served %s', ('cache',), None)
+        record.view = 'service-list'
+        payload = json.loads(JSONFormatter().format(record))
+        self.assertEqual(payload['message'], 'served cache')
+        self.assertEqual(payload['view'], 'service-list')
+
+    def test_sampling_filter_only_drops_debug(self):
+        sampler = SamplingFilter(rate=0.0)
+        debug = logging.LogRecord('catalog', logging.DEBUG, __file__, 1, 'noisy', (), None)
+        warning = logging.LogRecord('catalog', logging.WARNING, __file__, 1, 'important', (), None)
+        self.assertFalse(sampler.filter(debug))
+        self.assertTrue(sampler.filter(warning))
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_synthetic_data_feeds_scenarios(self):
+        plan = synthetic.build_plan(2000)
+        synthetic.SyntheticDataGenerator(plan, chunk_size=500).generate()
+        self.assertEqual(ServicePricing.objects.count(), plan.services * plan.vehicle_models)
+        self.assertEqual(SparePartFitment.objects.count(), plan.fitments)
+
+        ctx = benchmarks.ScenarioContext(np.random.default_rng(0))
+        for name in benchmarks.SCENARIOS:
+            summary = benchmarks.run_scenario(name, iterations=2, ctx=ctx, warmup=0)
+            self.assertEqual(summary['errors'], 0, name)
+            self.assertIn('p95_ms', summary)
+
+        synthetic.purge()
+        self.assertFalse(synthetic.has_synthetic_data())
+
+
+class BulkUpsertTests(TestCase):
+    def setUp(self):
+        category = ServiceCategory.objects.create(name='Bulk Category')
+        self.services = [Service.objects.create(service_category=category, name=name) for name in ('Oil Change', 'Custom')]
+        brand = VehicleBrand.objects.create(vehicle_type=VehicleType.objects.create(name='Bulk Type'), name='Bulk Brand')
+        self.models = [VehicleModel.objects.create(vehicle_brand=brand, name=f'Bulk {i}') for i in range(3)]
+        ServicePricing.objects.create(service=self.services[0], vehicle_model=self.models[0], price=Decimal('999'))
+
+    def test_default_pricing_inserts_only_missing_pairs_in_chunks(self):
+        with CaptureQueriesContext(connection) as captured:
+            call_command('load_default_service_pricing', '--chunk-size', '2', stdout=StringIO())
+
+        inserts = [q['sql'] for q in captured if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)  # 5 missing pairs in chunks of 2
+        self.assertEqual(len(captured) - len(inserts), 4 + 2)  # exists + 3 reads + savepoint/release
+        self.assertEqual(ServicePricing.objects.count(), 6)
+        prices = dict(ServicePricing.objects.filter(vehicle_model=self.models[0]).values_list('service__name', 'price'))
+        self.assertEqual(prices, {'Oil Change': Decimal('999'), 'Custom': Decimal('500')})
+
+    def test_update_fields_rewrite_only_changed_rows(self):
+        objs = [ServicePricing(service=self.services[0], vehicle_model=m, price=Decimal('999')) for m in self.models]
+        objs[0].price = Decimal('1200')
+        objs.append(ServicePricing(service=self.services[0], vehicle_model=self.models[1], price=Decimal('1')))
+
+        result = bulk.bulk_upsert(ServicePricing, objs, ['service', 'vehicle_model'], update_fields=['price'])
+
+        self.assertEqual((result['created'], result['updated'], result['unchanged'], result['duplicates']), (2, 1, 0, 1))
+        again = bulk.bulk_upsert(ServicePricing, objs, ['service', 'vehicle_model'], update_fields=['price'])
+        self.assertEqual((again['created'], again['updated'], again['unchanged']), (0, 0, 3))
+        self.assertEqual(ServicePricing.objects.get(vehicle_model=self.models[0]).price, Decimal('1200'))
+
+
+class CatalogCacheWarmingTests(TestCase):
+    def test_warm_fills_every_key_with_view_payloads_in_constant_queries(self):
+        plan = synthetic.build_plan(1000)
+        synthetic.SyntheticDataGenerator(plan, chunk_size=500).generate()
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as captured:
+            summary = catalog_cache.warm_catalog(request=catalog_cache.BaseUrlRequest('https://testserver'))
+        self.assertLessEqual(len(captured), 6)
+        self.assertEqual(summary['sections']['service_pricing'], plan.vehicle_models)
+
+        brand = VehicleBrand.objects.filter(models__isnull=False).first()
+        model_id = ServicePricing.objects.values_list('vehicle_model_id', flat=True).first()
+        checks = [
+            ('/api/vehicles/vehicle-types/', {}, catalog_cache.VEHICLE_TYPES_KEY),
+            ('/api/vehicles/vehicle-models/', {'vehicle_brand': brand.pk}, catalog_cache.vehicle_models_key(brand.pk)),
+            ('/api/services/services/', {}, catalog_cache.SERVICES_ALL_KEY),
+            ('/api/services/service-pricing/by-vehicle/', {'vehicle_model_id': model_id},
+             catalog_cache.service_pricing_key(model_id)),
+        ]
+        for path, params, key in checks:
+            warmed = cache.get(key)
+            self.assertTrue(warmed, key)
+            cache.delete(key)
+            built = self.client.get(path, params, secure=True).json()['data']
+            self.assertEqual(json.loads(json.dumps(warmed, default=str)), built, key)
+
+
+class ReplicaRoutingTests(TestCase):
+    """The test database is the primary; a second SQLite file plays the replica."""
+
+    def setUp(self):
+        cache.clear()
+        db_routing.reset_health()
+        self.addCleanup(db_routing.reset_health)
+        self.replica_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.replica_dir, ignore_errors=True)
+        VehicleType.objects.create(name='Primary Type')
+
+    def _add_replica(self, alias, name):
+        # Registered on the handler only (not in settings), like a connection
+        # created at runtime, so the test case's database guard allows it
+        settings_dict = connections.configure_settings({
+            'default': {'ENGINE': 'django.db.backends.dummy'},
+            alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name},
+        })[alias]
+        connections[alias] = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, alias)
+
+        def remove():
+            connections[alias].close()
+            del connections[alias]
+        self.addCleanup(remove)
+
+    def _replica_with_rows(self, alias='replica_test'):
+        self._add_replica(alias, os.path.join(self.replica_dir, 'replica.sqlite3'))
+        with connections[alias].schema_editor() as editor:
+            editor.create_model(VehicleType)
+        VehicleType.objects.using(alias).create(name='Replica Type')
+        return alias
+
+    def _type_names(self, response):
+        return [t['name'] for t in response.json()['data']]
+
+    def test_safe_catalog_reads_go_to_replica_until_client_writes(self):
+        alias = self._replica_with_rows()
+        with override_settings(DATABASE_REPLICAS=[alias]):
+            response = self.client.get('/api/vehicles/vehicle-types/', secure=True)
+            self.assertEqual(self._type_names(response), ['Replica Type'])
+
+            write = self.client.post(
+                '/api/services/service-categories/', json.dumps({'name': 'Pinned'}),
+                content_type='application/json', secure=True,
+            )
+            self.assertEqual(write.status_code, 201)
+            self.assertIn(db_routing.PIN_COOKIE, write.cookies)
+
+            cache.clear()
+            response = self.client.get('/api/vehicles/vehicle-types/', secure=True)
+            self.assertEqual(self._type_names(response), ['Primary Type'])
+
+            # The header pins clients that do not keep cookies
+            self.client.cookies.clear()
+            cache.clear()
+            response = self.client.get(
+                '/api/vehicles/vehicle-types/', secure=True,
+                headers={db_routing.PIN_HEADER: write[db_routing.PIN_HEADER]},
+            )
+            self.assertEqual(self._type_names(response), ['Primary Type'])
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        alias = 'replica_down'
+        self._add_replica(alias, os.path.join(self.replica_dir, 'missing', 'replica.sqlite3'))
+        with override_settings(DATABASE_REPLICAS=[alias]):
+            response = self.client.get('/api/vehicles/vehicle-types/', secure=True)
+            self.assertEqual(self._type_names(response), ['Primary Type'])
+            self.assertIsNone(db_routing.pick_replica())
+
+    def test_replica_query_error_retries_on_primary(self):
+        # Connectable but schemaless, so the first query raises OperationalError
+        alias = 'replica_empty'
+        self._add_replica(alias, os.path.join(self.replica_dir, 'empty.sqlite3'))
+        with override_settings(DATABASE_REPLICAS=[alias]):
+            response = self.client.get('/api/vehicles/vehicle-types/', secure=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self._type_names(response), ['Primary Type'])
+            self.assertIsNone(db_routing.pick_replica())
+
+
+class TransactionPolicyTests(TestCase):
+    def test_outbound_async_and_health_views_opt_out_of_atomic_requests(self):
+        handler = BaseHandler()
+        self.addCleanup(connections.settings['default'].__setitem__, 'ATOMIC_REQUESTS',
+                        connections.settings['default']['ATOMIC_REQUESTS'])
+        connections.settings['default']['ATOMIC_REQUESTS'] = True
+
+        for path in ('/api/auth/phone/verify-otp/', '/api/payments/payments/razorpay/create-order/', '/health/'):
+            view = resolve(path).func
+            self.assertIs(handler.make_view_atomic(view), view, path)
+
+        async_view = async_get(
+            service_async_views.service_category_list,
+            ServiceCategoryViewSet.as_view({'get': 'list', 'post': 'create'}),
+        )
+        self.assertIs(handler.make_view_atomic(async_view), async_view)
+
+        bookings = resolve('/api/bookings/bookings/').func
+        self.assertIsNot(handler.make_view_atomic(bookings), bookings)
+
+
+@override_settings(HEALTH_PROBE_TIMEOUT=0.2, HEALTH_CACHE_SECONDS=60, HEALTH_STORAGE_CACHE_SECONDS=60)
+class HealthCheckTests(TestCase):
+    def setUp(self):
+        health.reset()
+        self.addCleanup(health.reset)
+
+    def test_readiness_reports_each_dependency_and_caches_results(self):
+        calls = []
+        with mock.patch.object(health, '_check_cache', lambda: calls.append(1)):
+            first = self.client.get('/ready/', secure=True)
+            second = self.client.get('/ready/', secure=True)
+
+        self.assertEqual(first.status_code, 200)
+        checks = first.json()['checks']
+        self.assertEqual(set(checks), {'database', 'cache', 'storage'})
+        self.assertTrue(all(c['status'] == 'ok' and not c['cached'] for c in checks.values()))
+        self.assertTrue(all(c['cached'] for c in second.json()['checks'].values()))
+        self.assertEqual(len(calls), 1)
+
+    def test_failing_or_hung_critical_probe_makes_readiness_fail_fast(self):
+        def boom():
+            raise ConnectionError('redis down')
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with mock.patch.object(health, '_check_cache', boom), \
+                mock.patch.object(health, '_check_storage', lambda: release.wait(5)):
+            started = time.perf_counter()
+            response = self.client.get('/ready/', secure=True)
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.status_code, 503)
+        body = response.json()
+        self.assertEqual(body['status'], 'unavailable')
+        self.assertEqual(body['checks']['cache']['status'], 'error')
+        self.assertIn('redis down', body['checks']['cache']['error'])
+        self.assertEqual(body['checks']['storage']['status'], 'timeout')
+        self.assertEqual(body['checks']['database']['status'], 'ok')
+        self.assertLess(elapsed, 1.0)
+
+        # Liveness never depends on the probes
+        self.assertEqual(self.client.get('/health/', secure=True).status_code, 200)
+
+
+class StartupProfileTests(TestCase):
+    def test_optional_sdks_stay_off_the_startup_path(self):
+        report = startup_profile.run_target('wsgi', runs=1)
+        self.assertGreater(report['modules'], 0)
+        self.assertTrue(report['top_self_ms'])
+        for package in ('descope', 'razorpay', 'cloudinary'):
+            self.assertNotIn(package, report['imported'])
+
+
+def _jpeg(size, name='photo.jpg'):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'JPEG', quality=95)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImageVariantsTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overridden = override_settings(MEDIA_ROOT=media)
+        overridden.enable()
+        self.addCleanup(overridden.disable)
+
+    def test_variants_are_built_after_commit_and_exposed_by_serializers(self):
+        from PIL import Image
+
+        vehicle_type = VehicleType.objects.create(name='Bike')
+        with self.captureOnCommitCallbacks(execute=True):
+            brand = VehicleBrand.objects.create(vehicle_type=vehicle_type, name='Honda', image=_jpeg((2000, 1000)))
+        brand.refresh_from_db()
+
+        self.assertEqual(brand.image_variants['source'], brand.image.name)
+        with brand.image.storage.open(brand.image_variants['thumb']) as fh:
+            thumb = Image.open(fh)
+            self.assertEqual((thumb.format, thumb.size), ('WEBP', (320, 160)))
+        data = VehicleBrandSerializer(brand).data
+        self.assertEqual(set(data['image_variants']), {'thumb', 'medium'})
+        self.assertTrue(data['image_variants']['thumb'].endswith('__thumb.webp'))
+
+        # A replaced image serves the original until its variants are rebuilt
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            brand.image = _jpeg((100, 100), 'other.jpg')
+            brand.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(VehicleBrandSerializer(brand).data['image_variants'], {})
+
+    @override_settings(IMAGE_VARIANTS_ON_SAVE=False)
+    def test_backfill_builds_missing_variants_on_a_process_pool(self):
+        part = SparePart.objects.create(
+            category=SparePartCategory.objects.create(name='Batteries', slug='batteries'),
+            brand=SparePartBrand.objects.create(name='Exide', slug='exide'),
+            name='Battery', slug='battery', sku='B1', mrp=100, sale_price=90,
+        )
+        for i in range(3):
+            SparePartImage.objects.create(spare_part=part, image=_jpeg((1200, 900), f'p{i}.jpg'), sort_order=i)
+        self.assertFalse(SparePartImage.objects.exclude(image_variants={}).exists())
+
+        report = image_variants.backfill(models=['spare_parts.SparePartImage'], workers=2)
+        again = image_variants.backfill(models=['spare_parts.SparePartImage'], workers=2)
+
+        self.assertEqual(report['spare_parts.SparePartImage'], {'built': 3, 'skipped': 0, 'failed': 0})
+        self.assertEqual(again['spare_parts.SparePartImage']['skipped'], 3)
+        for image in SparePartImage.objects.all():
+            self.assertEqual(set(image_variants.variant_urls(image)), {'thumb', 'medium'})
+
+
+class MediaUrlTests(TestCase):
+    def setUp(self):
+        media_urls.clear()
+        self.addCleanup(media_urls.clear)
+
+    def test_list_serialization_resolves_each_file_once(self):
+        from django.core.files.storage import FileSystemStorage
+
+        brand = VehicleBrand.objects.create(vehicle_type=VehicleType.objects.create(name='Bike'), name='Honda')
+        for i in range(20):
+            VehicleModel.objects.create(vehicle_brand=brand, name=f'M{i}', image=f'vehicle_models/shared{i % 2}.jpg')
+        models = VehicleModel.objects.select_related('vehicle_brand__vehicle_type')
+        request = AsyncRequestFactory().get('/api/vehicles/vehicle-models/')
+
+        original = FileSystemStorage.url
+        with mock.patch.object(FileSystemStorage, 'url', autospec=True, side_effect=original) as url:
+            first = VehicleModelSerializer(models, many=True, context={'request': request}).data
+            second = VehicleModelSerializer(models, many=True, context={'request': request}).data
+
+        self.assertEqual(url.call_count, 2)
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]['image'], 'http://testserver/media/vehicle_models/shared0.jpg')
+        self.assertEqual(media_urls.stats()['size'], 2)
+
+
+class _S3StandIn(BaseHTTPRequestHandler):
+    """Path-style S3 subset for boto3: PUT (with server-side copy), GET, HEAD and DELETE of objects."""
+
+    def _object(self):
+        return unquote(urlparse(self.path).path).lstrip('/')
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _meta(self, content_type, body):
+        return {'Content-Type': content_type, 'ETag': '"etag"', 'Last-Modified': 'Mon, 19 Oct 2026 10:00:00 GMT',
+                'Content-Length': str(len(body))}
+
+    def do_PUT(self):
+        source = self.headers.get('x-amz-copy-source')
+        if source:
+            content_type, body = self.server.objects[unquote(source).lstrip('/').split('?')[0]]
+            self.server.objects[self._object()] = (self.headers.get('Content-Type', content_type), body)
+            return self._send(200, b'<CopyObjectResult><ETag>"etag"</ETag>'
+                                   b'<LastModified>2026-10-19T10:00:00.000Z</LastModified></CopyObjectResult>')
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.objects[self._object()] = (self.headers.get('Content-Type', ''), body)
+        self._send(200, headers={'ETag': '"etag"'})
+
+    def do_GET(self):
+        if self._object() not in self.server.objects:
+            return self._send(404, b'<Error><Code>NoSuchKey</Code></Error>')
+        content_type, body = self.server.objects[self._object()]
+        self._send(200, body, {k: v for k, v in self._meta(content_type, body).items() if k != 'Content-Length'})
+
+    def do_HEAD(self):
+        if self._object() not in self.server.objects:
+            return self._send(404)
+        content_type, body = self.server.objects[self._object()]
+        self.send_response(200)
+        for name, value in self._meta(content_type, body).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_DELETE(self):
+        self.server.objects.pop(self._object(), None)
+        self._send(204)
+
+    def log_message(self, *args):
+        pass
+
+
+class DirectUploadTests(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _S3StandIn)
+        self.server.objects = {}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        s3 = {'BACKEND': 'storages.backends.s3.S3Storage', 'OPTIONS': {
+            'bucket_name': 'media', 'endpoint_url': f'http://127.0.0.1:{self.server.server_port}',
+            'access_key': 'test', 'secret_key': 'test', 'region_name': 'us-east-1',
+            'addressing_style': 'path', 'signature_version': 's3v4', 'querystring_auth': False,
+        }}
+        self.s3_settings = override_settings(STORAGES={**settings.STORAGES, 'default': s3})
+
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='staff', email='staff@example.com', password='pw', is_staff=True,
+        ))
+        brand = VehicleBrand.objects.create(vehicle_type=VehicleType.objects.create(name='Bike'), name='Honda')
+        self.model = VehicleModel.objects.create(vehicle_brand=brand, name='Shine')
+
+    def _upload(self, target, data, filename='Shine Side.jpg'):
+        issued = self.client.post('/api/staff/uploads/', {
+            'target': target, 'filename': filename, 'content_type': 'image/jpeg', 'size': len(data),
+        }, format='json')
+        self.assertEqual(issued.status_code, 201, issued.data)
+        upload = issued.data['data']
+        put = requests.put(upload['upload_url'], data=data, headers=upload['headers'], timeout=5)
+        self.assertEqual(put.status_code, 200)
+        return upload
+
+    def test_presigned_put_then_finalize_registers_the_object(self):
+        self.assertEqual(self.client.post('/api/staff/uploads/', {
+            'target': 'vehicle-model', 'filename': 'a.jpg', 'content_type': 'image/jpeg', 'size': 10,
+        }, format='json').status_code, 501)
+
+        with self.s3_settings:
+            data = _jpeg((1600, 900)).read()
+            upload = self._upload('vehicle-model', data)
+            self.assertIn('X-Amz-Signature=', upload['upload_url'])
+            self.assertRegex(upload['name'], r'^vehicle_models/shine-side-[0-9a-f]{12}\.jpg$')
+            self.assertEqual([key.rsplit('/', 1)[0] for key in self.server.objects], ['media/uploads/pending'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                done = self.client.post('/api/staff/uploads/finalize/', {
+                    'upload_token': upload['upload_token'], 'object_id': self.model.pk,
+                }, format='json')
+            self.assertEqual(done.status_code, 200, done.data)
+            self.model.refresh_from_db()
+            self.assertEqual(self.model.image.name, upload['name'])
+            self.assertEqual(self.server.objects[f"media/{upload['name']}"][1], data)
+            self.assertFalse(any(key.startswith('media/uploads/') for key in self.server.objects))
+            # The post_save hook built the WebP variants from the bucket copy
+            self.assertEqual(self.model.image_variants['source'], upload['name'])
+            self.assertIn(f"media/{self.model.image_variants['thumb']}", self.server.objects)
+
+            again = self.client.post('/api/staff/uploads/finalize/', {
+                'upload_token': upload['upload_token'], 'object_id': self.model.pk,
+            }, format='json')
+            self.assertEqual(again.status_code, 409)
+            forged = self.client.post('/api/staff/uploads/finalize/', {
+                'upload_token': upload['upload_token'][:-2] + 'xx', 'object_id': self.model.pk,
+            }, format='json')
+            self.assertEqual(forged.status_code, 400)
+            malformed = self.client.post('/api/staff/uploads/finalize/', {
+                'upload_token': upload['upload_token'], 'object_id': 'abc',
+            }, format='json')
+            self.assertEqual(malformed.status_code, 400)
+            self.assertEqual(malformed.data['message'], 'object_id must be an integer')
+
+    @override_settings(IMAGE_VARIANTS_ON_SAVE=False)
+    def test_spare_part_image_rows_are_created_on_finalize(self):
+        part = SparePart.objects.create(
+            category=SparePartCategory.objects.create(name='Batteries', slug='batteries'),
+            brand=SparePartBrand.objects.create(name='Exide', slug='exide'),
+            name='Battery', slug='battery', sku='B1', mrp=100, sale_price=90,
+        )
+        with self.s3_settings:
+            upload = self._upload('spare-part-image', _jpeg((300, 300)).read(), filename='front.jpg')
+            done = self.client.post('/api/staff/uploads/finalize/', {
+                'upload_token': upload['upload_token'], 'object_id': part.pk,
+                'alt_text': 'Front', 'is_primary': 'true', 'sort_order': '2',
+            }, format='json')
+        self.assertEqual(done.status_code, 200, done.data)
+        image = part.images.get()
+        self.assertEqual((image.image.name, image.alt_text, image.is_primary, image.sort_order),
+                         (upload['name'], 'Front', True, 2))
+        self.assertTrue(done.data['data']['url'].endswith(upload['name']))
+
+
+class QueryBudgetTests(TestCase):
+    def _measure(self, budget, fixture):
+        path = reverse(budget.url_name, kwargs=budget.kwargs(fixture) if budget.kwargs else None)
+        params = budget.params(fixture) if budget.params else {}
+        extra = {'secure': True}
+        if budget.auth:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {fixture.STAFF_TOKEN}'
+        if budget.method == 'get':
+            args = (path, params)
+        else:
+            if params:
+                path = f'{path}?{urlencode(params)}'
+            args = (path, json.dumps(budget.body(fixture)) if budget.body else None)
+            extra['content_type'] = 'application/json'
+
+        # Cold cache and no buffered session activity, so only the endpoint's own queries count
+        cache.clear()
+        flush_activity()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                response = getattr(self.client, budget.method)(*args, **extra)
+                if response.streaming:
+                    # Streamed bodies run their queries as they are consumed
+                    b''.join(response.streaming_content)
+            transaction.set_rollback(True)
+        self.assertLess(response.status_code, 400, f"{budget.url_name} {budget.method}: {getattr(response, 'content', b'')[:300]}")
+        # Views' own atomic blocks nest inside the test transaction and show up as
+        # savepoints; outside tests they are BEGIN/COMMIT, which are not counted
+        return [q['sql'] for q in captured.captured_queries if not SAVEPOINT_SQL.match(q['sql'])]
+
+    def test_endpoints_stay_within_query_budgets(self):
+        fixture = query_budgets.BudgetFixture()
+        measured = {}
+        for scale in (1, 2):
+            fixture.grow()
+            for i, budget in enumerate(query_budgets.BUDGETS):
+                queries = self._measure(budget, fixture)
+                label = f'{budget.method.upper()} {budget.url_name} (row {i}, scale {scale})'
+                sql = '\n'.join(queries)
+                with self.subTest(label):
+                    self.assertLessEqual(
+                        len(queries), budget.max_queries[scale - 1],
+                        f'{label} issued {len(queries)} queries:\n{sql}',
+                    )
+                    if scale == 2:
+                        self.assertLessEqual(
+                            len(queries), measured[i],
+                            f'{label} query count grew from {measured[i]} with data size:\n{sql}',
+                        )
+                measured[i] = len(queries)
+
+    def test_every_endpoint_is_budgeted_or_exempt(self):
+        def walk(patterns, prefix=''):
+            for pattern in patterns:
+                route = prefix + str(pattern.pattern)
+                if isinstance(pattern, URLResolver):
+                    yield from walk(pattern.url_patterns, route)
+                elif isinstance(pattern, URLPattern) and pattern.name:
+                    yield route, pattern.name
+
+        names = {
+            name for route, name in walk(get_resolver().url_patterns)
+            if route.startswith(query_budgets.BUDGETED_PREFIXES)
+        }
+        budgeted = {budget.url_name for budget in query_budgets.BUDGETS}
+        self.assertEqual(names - budgeted - set(query_budgets.EXEMPT), set())
+
+
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vehicle_type = VehicleType.objects.create(name='Async Motorcycle')
+        VehicleBrand.objects.create(vehicle_type=self.vehicle_type, name='Async Brand')
+
+    async def test_async_catalog_view_matches_sync_payload(self):
+        path = '/api/vehicles/vehicle-brands/'
+        request = AsyncRequestFactory().get(path, {'vehicle_type': self.vehicle_type.pk}, secure=True)
+        async_response = await vehicle_async_views.vehicle_brand_list(request)
+
+        await cache.aclear()
+        sync_response = await self.async_client.get(path, {'vehicle_type': self.vehicle_type.pk}, secure=True)
+
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(json.loads(async_response.content), sync_response.json())
+
+        missing = await vehicle_async_views.vehicle_brand_list(AsyncRequestFactory().get(path))
+        self.assertEqual(missing.status_code, 400)
+
+    def _catalog_views(self):
+        """(path, params, async_get view, sync view) for the six async catalog endpoints."""
+        brand = VehicleBrand.objects.get(vehicle_type=self.vehicle_type)
+        vehicle_model = VehicleModel.objects.create(vehicle_brand=brand, name='Async Model')
+        category = ServiceCategory.objects.create(name='Async General')
+        service = Service.objects.create(service_category=category, name='Async Oil change')
+        ServicePricing.objects.create(service=service, vehicle_model=vehicle_model, price=Decimal('450.00'))
+        endpoints = [
+            ('/api/vehicles/vehicle-types/', {}, vehicle_async_views.vehicle_type_list,
+             VehicleTypeViewSet.as_view({'get': 'list'})),
+            ('/api/vehicles/vehicle-brands/', {'vehicle_type': self.vehicle_type.pk},
+             vehicle_async_views.vehicle_brand_list, VehicleBrandViewSet.as_view({'get': 'list'})),
+            ('/api/vehicles/vehicle-models/', {'vehicle_brand': brand.pk},
+             vehicle_async_views.vehicle_model_list, VehicleModelViewSet.as_view({'get': 'list'})),
+            ('/api/services/service-categories/', {}, service_async_views.service_category_list,
+             ServiceCategoryViewSet.as_view({'get': 'list'})),
+            ('/api/services/services/', {'category_id': category.pk}, service_async_views.service_list,
+             ServiceViewSet.as_view({'get': 'list'})),
+            ('/api/services/service-pricing/by-vehicle/', {'vehicle_model_id': vehicle_model.pk},
+             service_async_views.service_pricing_by_vehicle, ServicePricingViewSet.as_view({'get': 'by_vehicle'})),
+        ]
+        return [(path, params, async_get(handler, sync_view), sync_view)
+                for path, params, handler, sync_view in endpoints]
+
+    async def test_all_async_catalog_views_match_sync_payloads(self):
+        factory = AsyncRequestFactory()
+        for path, params, async_view, sync_view in await sync_to_async(self._catalog_views)():
+            with self.subTest(path=path):
+                await cache.aclear()
+                async_response = await async_view(factory.get(path, params))
+                await cache.aclear()
+                sync_response = (await sync_to_async(sync_view)(factory.get(path, params))).render()
+
+                self.assertEqual(async_response.status_code, 200)
+                payload = json.loads(async_response.content)
+                self.assertEqual(payload, json.loads(sync_response.content))
+                self.assertTrue(payload['data'])
+
+    async def test_async_catalog_views_apply_drf_throttles(self):
+        factory = AsyncRequestFactory()
+        views = await sync_to_async(self._catalog_views)()
+        with mock.patch.object(AnonRateThrottle, 'THROTTLE_RATES', {'anon': '1/hour', 'user': '1/hour'}):
+            for path, params, async_view, _sync_view in views:
+                with self.subTest(path=path):
+                    # Throttle history lives in the default cache
+                    await cache.aclear()
+                    self.assertEqual((await async_view(factory.get(path, params))).status_code, 200)
+                    throttled = await async_view(factory.get(path, params))
+                    self.assertEqual(throttled.status_code, 429)
+                    self.assertIn('Retry-After', throttled.headers)
+
+    async def test_category_name_filter_is_not_cached_as_all_services(self):
+        factory = AsyncRequestFactory()
+        await sync_to_async(self._catalog_views)()
+        other = await ServiceCategory.objects.acreate(name='Async Tyres')
+        await Service.objects.acreate(service_category=other, name='Async Puncture')
+        sync_view = ServiceViewSet.as_view({'get': 'list'})
+
+        async def sync_list(request):
+            return (await sync_to_async(sync_view)(request)).render()
+
+        path = '/api/services/services/'
+        for view in (service_async_views.service_list, sync_list):
+            with self.subTest(view=view.__name__):
+                await cache.aclear()
+                filtered = await view(factory.get(path, {'category': 'Async Tyres'}))
+                self.assertEqual([s['name'] for s in json.loads(filtered.content)['data']], ['Async Puncture'])
+                self.assertIsNone(await cache.aget(catalog_cache.SERVICES_ALL_KEY))
+
+                listed = await view(factory.get(path))
+                names = {s['name'] for s in json.loads(listed.content)['data']}
+                self.assertEqual(names, {'Async Oil change', 'Async Puncture'})
+
+    async def test_async_get_delegates_writes_to_sync_view(self):
+        view = async_get(
+            service_async_views.service_category_list,
+            ServiceCategoryViewSet.as_view({'get': 'list', 'post': 'create'}),
+        )
+        factory = AsyncRequestFactory()
+        created = await view(factory.post(
+            '/api/services/service-categories/', {'name': 'Async Category'}, content_type='application/json',
+        ))
+        listed = await view(factory.get('/api/services/service-categories/'))
+
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual([c['name'] for c in json.loads(listed.content)['data']], ['Async Category'])
+
+    async def test_offloaded_client_runs_off_the_event_loop(self):
+        class Orders:
+            def create(self, data):
+                return threading.current_thread().name, data
+
+            def slow(self):
+                time.sleep(0.2)
+
+        class Sdk:
+            order = Orders()
+
+        client = OffloadedClient(Sdk(), timeout=0.05)
+        thread_name, data = await client.order.create({'amount': 100})
+        self.assertTrue(thread_name.startswith('offload'))
+        self.assertEqual(data, {'amount': 100})
+        with self.assertRaises(asyncio.TimeoutError):
+            await client.order.slow()
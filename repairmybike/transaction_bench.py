@@ -0,0 +1,210 @@
+"""
+Compare blanket ATOMIC_REQUESTS with the per-view transaction policy.
+
+'blanket' reproduces the old configuration: every sync view runs inside
+transaction.atomic(), ignoring non-atomic markers. 'selective' is the
+current default (see repairmybike/transactions.py). Each workload is
+driven by a pool of test clients against the configured database (filled
+by generate_synthetic_data). For every policy and workload the runner
+reports throughput, latency percentiles and how long the database
+connection spent inside a transaction per request. For writes that is
+how long row locks are held; for reads it is how long a snapshot stays
+pinned.
+
+The otp_verify workload swaps the Descope client for one that sleeps for
+outbound_ms, so the cost of a transaction held across an outbound call
+shows up without network access.
+"""
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from django.core.handlers.base import BaseHandler
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.test import Client
+from asgiref.sync import iscoroutinefunction
+import descope
+from descope import REFRESH_SESSION_TOKEN_NAME, SESSION_TOKEN_NAME
+
+from authentication.models import User
+
+from . import benchmarks
+
+POLICIES = ('blanket', 'selective')
+BENCH_DESCOPE_USER = 'bench-transactions'
+BENCH_PHONE = '+919999000000'
+
+_tokens = itertools.count(1)
+
+
+def _catalog_steps(ctx, n):
+    return benchmarks.scenario_catalog_browse(ctx, n) + [('health', 'get', '/health/', None)]
+
+
+def _otp_steps(ctx, n):
+    return [('otp_verify', 'post', '/api/auth/phone/verify-otp/', {'phone_number': BENCH_PHONE, 'otp_code': '123456'})]
+
+
+WORKLOADS = {
+    'catalog_read': _catalog_steps,
+    'checkout': benchmarks.scenario_checkout,
+    'otp_verify': _otp_steps,
+}
+
+
+class TransactionTimer:
+    """Accumulate the time connections spend outside autocommit, across threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.seconds = 0.0
+        self.transactions = 0
+
+    @contextmanager
+    def installed(self):
+        original = BaseDatabaseWrapper.set_autocommit
+        timer = self
+
+        def set_autocommit(conn, autocommit, *args, **kwargs):
+            if not autocommit and conn.get_autocommit():
+                timer.local.started = time.perf_counter()
+            result = original(conn, autocommit, *args, **kwargs)
+            started = getattr(timer.local, 'started', None)
+            if autocommit and started is not None:
+                with timer.lock:
+                    timer.seconds += time.perf_counter() - started
+                    timer.transactions += 1
+                timer.local.started = None
+            return result
+
+        BaseDatabaseWrapper.set_autocommit = set_autocommit
+        try:
+            yield self
+        finally:
+            BaseDatabaseWrapper.set_autocommit = original
+
+
+@contextmanager
+def request_policy(policy):
+    if policy == 'selective':
+        yield
+        return
+
+    original = BaseHandler.make_view_atomic
+
+    def make_view_atomic(handler, view):
+        # Async views cannot be wrapped; ATOMIC_REQUESTS refused them outright
+        return view if iscoroutinefunction(view) else transaction.atomic(using=DEFAULT_DB_ALIAS)(view)
+
+    BaseHandler.make_view_atomic = make_view_atomic
+    try:
+        yield
+    finally:
+        BaseHandler.make_view_atomic = original
+
+
+@contextmanager
+def slow_descope(outbound_ms):
+    class SlowDescopeClient:
+        def __init__(self, *args, **kwargs):
+            self.otp = self
+
+        def verify_code(self, method, login_id, code):
+            time.sleep(outbound_ms / 1000)
+            n = next(_tokens)
+            return {
+                'user': {'userId': BENCH_DESCOPE_USER},
+                SESSION_TOKEN_NAME: {'jwt': f'bench-session-{n}-{time.time_ns()}'},
+                REFRESH_SESSION_TOKEN_NAME: {'jwt': f'bench-refresh-{n}'},
+            }
+
+    # The auth views import the SDK at call time, so patch it at the source
+    original = descope.DescopeClient
+    descope.DescopeClient = SlowDescopeClient
+    try:
+        yield
+    finally:
+        descope.DescopeClient = original
+        User.objects.filter(descope_user_id=BENCH_DESCOPE_USER).delete()
+
+
+def run_workload(name, ctx, iterations, threads):
+    build = WORKLOADS[name]
+    build_lock = threading.Lock()
+    results = {'latencies': [], 'errors': 0}
+    results_lock = threading.Lock()
+    counter = itertools.count()
+
+    def client_loop(count):
+        client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+        latencies, errors = [], 0
+        try:
+            for _ in range(count):
+                with build_lock:
+                    steps = build(ctx, next(counter))
+                for step, method, path, payload in steps:
+                    kwargs = {'secure': True, 'REMOTE_ADDR': benchmarks._next_remote_addr()}
+                    if payload is not None:
+                        kwargs.update(data=json.dumps(payload), content_type='application/json')
+                    started = time.perf_counter()
+                    response = getattr(client, method)(path, **kwargs)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    errors += int(response.status_code >= 400)
+        finally:
+            connections.close_all()
+        with results_lock:
+            results['latencies'].extend(latencies)
+            results['errors'] += errors
+
+    per_thread = max(1, iterations // threads)
+    workers = [threading.Thread(target=client_loop, args=(per_thread,)) for _ in range(threads)]
+    timer = TransactionTimer()
+    with timer.installed():
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+    lat = np.asarray(results['latencies'], dtype=float)
+    requests = int(len(lat))
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if requests else (0, 0, 0)
+    return {
+        'requests': requests,
+        'errors': results['errors'],
+        'rps': round(requests / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'transactions': timer.transactions,
+        'tx_ms_per_request': round(timer.seconds * 1000 / requests, 2) if requests else 0.0,
+    }
+
+
+def compare_policies(workloads, iterations=200, threads=4, outbound_ms=50, policies=POLICIES, seed=7):
+    ctx = benchmarks.ScenarioContext(np.random.default_rng(seed))
+    report = {
+        'meta': {
+            'database': connections['default'].vendor,
+            'iterations': iterations,
+            'threads': threads,
+            'outbound_ms': outbound_ms,
+        },
+        'policies': {},
+    }
+    with slow_descope(outbound_ms):
+        # Warm caches and connections once so neither policy pays for them
+        for name in workloads:
+            run_workload(name, ctx, threads, threads)
+        for policy in policies:
+            with request_policy(policy):
+                report['policies'][policy] = {
+                    name: run_workload(name, ctx, iterations, threads) for name in workloads
+                }
+    return report
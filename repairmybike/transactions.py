@@ -0,0 +1,23 @@
+"""
+Per-view transaction policy.
+
+ATOMIC_REQUESTS is off by default: reads run in autocommit, and each write
+path opens its own `transaction.atomic()` block around its database work
+only (booking create, cart checkout/buy now, payment verify, staff status
+updates), taking row locks where stock or status is read-modify-written.
+
+Views that call out to Descope or Razorpay, async views and health checks
+are marked non-atomic, so they never hold a transaction open across a
+network call even when ATOMIC_REQUESTS is switched back on. Django also
+refuses ATOMIC_REQUESTS for async views, so the marker keeps ASYNC_VIEWS
+usable in that configuration.
+"""
+from django.db import transaction
+
+
+class NonAtomicRequestsMixin:
+    """Exclude an APIView/ViewSet from ATOMIC_REQUESTS."""
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        return transaction.non_atomic_requests(super().as_view(*args, **kwargs))
@@ -2,12 +2,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from .health import health_check, readiness_check
+from .health import async_health_check, async_readiness_check, health_check, readiness_check
+from .metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('health/', health_check, name='health_check'),
-    path('ready/', readiness_check, name='readiness_check'),
+    path('health/', async_health_check if settings.ASYNC_VIEWS else health_check, name='health_check'),
+    path('ready/', async_readiness_check if settings.ASYNC_VIEWS else readiness_check, name='readiness_check'),
+    path('metrics', metrics_view, name='metrics'),
     path('api/auth/', include('authentication.urls')),
     path('api/vehicles/', include('vehicles.urls')),
     path('api/services/', include('services.urls')),
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import ServiceCategory, Service, ServicePricing
+from .models import CatalogSyncState, ServiceCategory, Service, ServicePricing
 
 
 @admin.register(ServiceCategory)
@@ -50,3 +50,9 @@ class ServicePricingAdmin(admin.ModelAdmin):
         "vehicle_model__vehicle_brand__name",
     )
     readonly_fields = ("created_at", "updated_at")
+
+
+@admin.register(CatalogSyncState)
+class CatalogSyncStateAdmin(admin.ModelAdmin):
+    list_display = ("dataset", "digest", "rows", "applied_at")
+    readonly_fields = ("dataset", "digest", "snapshot", "rows", "applied_at")
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'services'
+
+    def ready(self):
+        from repairmybike.image_variants import track
+
+        track(self.get_model('Service'), 'images')
@@ -0,0 +1,88 @@
+"""
+Async GET handlers for the service catalog lists, used when ASYNC_VIEWS is
+on (see urls.py). Querysets come from the sync viewsets so both paths keep
+the same annotations, and the cache keys are shared.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+from repairmybike import catalog_cache
+from repairmybike.offload import aserialize
+
+from .serializers import ServiceCategorySerializer, ServiceSerializer, ServicePricingSerializer
+from .views import ServiceCategoryViewSet, ServiceViewSet, ServicePricingViewSet
+
+logger = logging.getLogger(__name__)
+
+
+async def service_category_list(request):
+    cache_key = catalog_cache.SERVICE_CATEGORIES_KEY
+    data = await cache.aget(cache_key)
+    if not data:
+        data = await aserialize(ServiceCategorySerializer, ServiceCategoryViewSet.queryset.all(), request)
+        if settings.LOG_PAYLOADS:
+            logger.debug(f"Service categories payload: {data}")
+        # Cache for 1 hour
+        await cache.aset(cache_key, data, catalog_cache.CATALOG_TIMEOUT)
+    return JsonResponse({
+        'error': False,
+        'message': 'Service categories retrieved successfully',
+        'data': data
+    })
+
+
+async def service_list(request):
+    category_id = request.GET.get('category_id')
+    queryset = ServiceViewSet.queryset.all()
+    category_name = request.GET.get('category')
+    if category_name:
+        queryset = queryset.filter(service_category__name=category_name)
+    if category_id:
+        queryset = queryset.filter(service_category_id=category_id)
+
+    if category_name:
+        # The cached lists are keyed by category id only; name filters are built per request
+        cache_key = None
+    elif category_id:
+        cache_key = catalog_cache.services_category_key(category_id)
+    else:
+        cache_key = catalog_cache.SERVICES_ALL_KEY
+
+    data = await cache.aget(cache_key) if cache_key else None
+    if not data:
+        data = await aserialize(ServiceSerializer, queryset, request)
+        if settings.LOG_PAYLOADS:
+            logger.debug(f"Services payload: {data}")
+        if cache_key:
+            # Cache for 1 hour
+            await cache.aset(cache_key, data, catalog_cache.CATALOG_TIMEOUT)
+    return JsonResponse({
+        'error': False,
+        'message': 'Services retrieved successfully',
+        'data': data
+    })
+
+
+async def service_pricing_by_vehicle(request):
+    vehicle_model_id = request.GET.get('vehicle_model_id')
+    if not vehicle_model_id:
+        return JsonResponse({
+            'error': True,
+            'message': 'vehicle_model_id query parameter is required'
+        }, status=400)
+
+    cache_key = catalog_cache.service_pricing_key(vehicle_model_id)
+    data = await cache.aget(cache_key)
+    if not data:
+        queryset = ServicePricingViewSet.queryset.filter(vehicle_model_id=vehicle_model_id)
+        data = await aserialize(ServicePricingSerializer, queryset, request)
+        # Cache for 30 minutes
+        await cache.aset(cache_key, data, catalog_cache.PRICING_TIMEOUT)
+    return JsonResponse({
+        'error': False,
+        'message': 'Service pricing retrieved successfully',
+        'data': data
+    })
@@ -0,0 +1,325 @@
+"""
+Idempotent catalog sync for the release phase (`manage.py sync_catalog`).
+
+The seed data embedded in the load_* commands is split into datasets:
+service categories, services, vehicles (types/brands/models) and default
+service pricing. Each dataset is reduced to a snapshot, {natural key:
+values}, and hashed. CatalogSyncState keeps the digest and snapshot last
+applied per dataset:
+
+  * same digest: the dataset is skipped without touching its tables, so a
+    deploy that changes no seed data pays three small queries in total;
+  * new digest: the snapshot is diffed against the stored one. Added keys
+    are inserted if missing, changed keys get the changed fields written,
+    and removed keys are deleted only with prune=True. Otherwise they are
+    reported as stale and kept in the stored snapshot until a pruning run.
+    All writes go through repairmybike.bulk.
+
+Rows edited in the admin are left alone unless the dataset itself changes
+that row. The first run (no stored state) only inserts what is missing. The
+pricing dataset folds the service and vehicle model counts into its digest,
+so new services or models get default prices on the next sync. A changed
+default price rewrites only rows still at the previous default.
+"""
+import hashlib
+import json
+import logging
+import time
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from repairmybike.bulk import DEFAULT_CHUNK_SIZE, bulk_upsert
+from vehicles.models import VehicleBrand, VehicleModel, VehicleType
+
+from .models import CatalogSyncState, Service, ServiceCategory, ServicePricing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRICE_KEY = ('*',)
+
+
+def _digest(snapshot, fingerprint=None):
+    payload = json.dumps(
+        {'rows': sorted([list(key), values] for key, values in snapshot.items()), 'fingerprint': fingerprint},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _load_snapshot(stored):
+    return {tuple(key): values for key, values in stored}
+
+
+def diff(old, new):
+    """Split two snapshots into added {key: values}, changed {key: (old, new)} and removed [key]."""
+    added = {key: values for key, values in new.items() if key not in old}
+    changed = {key: (old[key], values) for key, values in new.items() if key in old and old[key] != values}
+    removed = [key for key in old if key not in new]
+    return added, changed, removed
+
+
+def _tally(stats, result):
+    stats['created'] += result['created']
+    stats['updated'] += result['updated']
+
+
+class Dataset:
+    name = None
+
+    def snapshot(self):
+        raise NotImplementedError
+
+    def fingerprint(self):
+        """Extra state folded into the digest (default: none)."""
+        return None
+
+    def apply(self, old, new, prune, chunk_size):
+        raise NotImplementedError
+
+
+class ServiceCategoryDataset(Dataset):
+    name = 'service_categories'
+
+    def snapshot(self):
+        from services.management.commands.load_service_categories import CATEGORIES
+
+        return {(name,): {'description': description} for name, description in CATEGORIES.items()}
+
+    def apply(self, old, new, prune, chunk_size):
+        added, changed, removed = diff(old, new)
+        stats = {'created': 0, 'updated': 0, 'deleted': 0, 'stale': 0}
+        objs = [ServiceCategory(name=name, **values) for (name,), values in added.items()]
+        _tally(stats, bulk_upsert(ServiceCategory, objs, ['name'], chunk_size=chunk_size))
+        objs = [ServiceCategory(name=name, **values) for (name,), (_old, values) in changed.items()]
+        _tally(stats, bulk_upsert(ServiceCategory, objs, ['name'], update_fields=['description'], chunk_size=chunk_size))
+        if removed and prune:
+            stats['deleted'] = ServiceCategory.objects.filter(name__in=[name for (name,) in removed]).delete()[1].get(
+                ServiceCategory._meta.label, 0)
+        else:
+            stats['stale'] = len(removed)
+        return stats
+
+
+class ServiceDataset(Dataset):
+    name = 'services'
+
+    def snapshot(self):
+        from services.management.commands.load_major_services import SERVICES_MAP
+
+        rows = {}
+        for category_name, services in SERVICES_MAP.items():
+            for item in services:
+                service_name, description = item if isinstance(item, tuple) else (item, '')
+                rows[(category_name, service_name)] = {'description': description}
+        return rows
+
+    def apply(self, old, new, prune, chunk_size):
+        added, changed, removed = diff(old, new)
+        stats = {'created': 0, 'updated': 0, 'deleted': 0, 'stale': 0}
+        wanted = {category for category, _name in new}
+        # Categories normally come from service_categories; create any that are missing bare
+        bulk_upsert(ServiceCategory, [ServiceCategory(name=name) for name in sorted(wanted)], ['name'])
+        # Removed keys are only looked up: a category pruned by service_categories must not come back empty
+        names = wanted | {category for category, _name in removed}
+        category_ids = dict(ServiceCategory.objects.filter(name__in=names).values_list('name', 'id'))
+
+        def build(key, values):
+            category, name = key
+            return Service(service_category_id=category_ids[category], name=name, **values)
+
+        scope = Service.objects.filter(service_category_id__in=category_ids.values())
+        _tally(stats, bulk_upsert(Service, [build(k, v) for k, v in added.items()],
+                                  ['service_category', 'name'], existing=scope, chunk_size=chunk_size))
+        _tally(stats, bulk_upsert(Service, [build(k, new_v) for k, (_old, new_v) in changed.items()],
+                                  ['service_category', 'name'], update_fields=['description'],
+                                  existing=scope, chunk_size=chunk_size))
+        if removed and prune:
+            gone = set(removed)
+            ids = [
+                pk for pk, category, name in scope.values_list('id', 'service_category__name', 'name')
+                if (category, name) in gone
+            ]
+            stats['deleted'] = Service.objects.filter(id__in=ids).delete()[1].get(Service._meta.label, 0)
+        else:
+            stats['stale'] = len(removed)
+        return stats
+
+
+class VehicleDataset(Dataset):
+    name = 'vehicles'
+
+    def snapshot(self):
+        from vehicles.management.commands.load_motorcycle_data import data as motorcycles
+        from vehicles.management.commands.load_scooter_data import SCOOTER_DATA
+
+        rows = {}
+        for type_name, brands in (('Motor Cycle', motorcycles), ('Scooter', SCOOTER_DATA)):
+            for brand_name, models in brands.items():
+                for model_name in models:
+                    rows[(type_name, brand_name, model_name)] = {}
+        return rows
+
+    def apply(self, old, new, prune, chunk_size):
+        added, _changed, removed = diff(old, new)
+        stats = {'created': 0, 'updated': 0, 'deleted': 0, 'stale': 0}
+
+        type_names = sorted({t for t, _b, _m in added})
+        _tally(stats, bulk_upsert(VehicleType, [VehicleType(name=t) for t in type_names], ['name']))
+        type_ids = dict(VehicleType.objects.filter(name__in=type_names).values_list('name', 'id'))
+
+        brand_keys = sorted({(t, b) for t, b, _m in added})
+        _tally(stats, bulk_upsert(
+            VehicleBrand, [VehicleBrand(vehicle_type_id=type_ids[t], name=b) for t, b in brand_keys],
+            ['vehicle_type', 'name'], existing=VehicleBrand.objects.filter(vehicle_type_id__in=type_ids.values()),
+        ))
+        brand_ids = {
+            (t, b): pk for pk, t, b in VehicleBrand.objects.filter(vehicle_type_id__in=type_ids.values())
+            .values_list('id', 'vehicle_type__name', 'name')
+        }
+        _tally(stats, bulk_upsert(
+            VehicleModel, [VehicleModel(vehicle_brand_id=brand_ids[(t, b)], name=m) for t, b, m in added],
+            ['vehicle_brand', 'name'], existing=VehicleModel.objects.filter(vehicle_brand_id__in=brand_ids.values()),
+            chunk_size=chunk_size,
+        ))
+
+        if not removed:
+            return stats
+        if not prune:
+            stats['stale'] = len(removed)
+            return stats
+        gone = set(removed)
+        ids = [
+            pk for pk, t, b, m in VehicleModel.objects.filter(
+                vehicle_brand__vehicle_type__name__in={t for t, _b, _m in gone},
+            ).values_list('id', 'vehicle_brand__vehicle_type__name', 'vehicle_brand__name', 'name')
+            if (t, b, m) in gone
+        ]
+        stats['deleted'] = VehicleModel.objects.filter(id__in=ids).delete()[1].get(VehicleModel._meta.label, 0)
+        # Brands and types the dataset dropped entirely go too, once nothing else hangs off them
+        kept_brands = {(t, b) for t, b, _m in new}
+        for t, b in {(t, b) for t, b, _m in gone} - kept_brands:
+            VehicleBrand.objects.filter(vehicle_type__name=t, name=b, models__isnull=True).delete()
+        kept_types = {t for t, _b, _m in new}
+        VehicleType.objects.filter(name__in={t for t, _b, _m in gone} - kept_types, brands__isnull=True).delete()
+        return stats
+
+
+class ServicePricingDataset(Dataset):
+    name = 'service_pricing'
+
+    def snapshot(self):
+        from services.management.commands.load_default_service_pricing import DEFAULT_PRICE, PRICE_LOOKUP
+
+        rows = {(name,): {'price': str(price)} for name, price in PRICE_LOOKUP.items()}
+        rows[DEFAULT_PRICE_KEY] = {'price': str(DEFAULT_PRICE)}
+        return rows
+
+    def fingerprint(self):
+        return {
+            'services': Service.objects.aggregate(n=Count('id'), last=Max('id')),
+            'vehicle_models': VehicleModel.objects.aggregate(n=Count('id'), last=Max('id')),
+        }
+
+    def apply(self, old, new, prune, chunk_size):
+        stats = fill_default_pricing(
+            {name: Decimal(values['price']) for (name,), values in new.items() if (name,) != DEFAULT_PRICE_KEY},
+            Decimal(new[DEFAULT_PRICE_KEY]['price']), chunk_size=chunk_size,
+        )
+        if old:
+            stats['updated'] += _reprice_defaults(old, new)
+        return stats
+
+
+def _effective_price(snapshot, name):
+    return Decimal(snapshot.get((name,), snapshot[DEFAULT_PRICE_KEY])['price'])
+
+
+def _reprice_defaults(old, new):
+    """Move rows still at the previous default price to the new one; customized prices stay."""
+    now = timezone.now()
+    pricing = ServicePricing.objects.annotate(service_key=Lower('service__name'))
+    named = {key[0] for key in (old.keys() | new.keys()) if key != DEFAULT_PRICE_KEY}
+    updated = 0
+    for name in sorted(named):
+        before, after = _effective_price(old, name), _effective_price(new, name)
+        if before != after:
+            ids = pricing.filter(service_key=name, price=before).values('id')
+            updated += ServicePricing.objects.filter(id__in=ids).update(price=after, updated_at=now)
+    before, after = Decimal(old[DEFAULT_PRICE_KEY]['price']), Decimal(new[DEFAULT_PRICE_KEY]['price'])
+    if before != after:
+        ids = pricing.exclude(service_key__in=named).filter(price=before).values('id')
+        updated += ServicePricing.objects.filter(id__in=ids).update(price=after, updated_at=now)
+    return updated
+
+
+def fill_default_pricing(price_lookup, default_price, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Insert a default price for every Service x VehicleModel pair that has none."""
+    vehicle_model_ids = list(VehicleModel.objects.values_list('id', flat=True))
+    service_prices = [
+        (service_id, Decimal(price_lookup.get(name.lower(), default_price)))
+        for service_id, name in Service.objects.values_list('id', 'name')
+    ]
+    matrix = (
+        ServicePricing(service_id=service_id, vehicle_model_id=vehicle_model_id, price=price)
+        for service_id, price in service_prices
+        for vehicle_model_id in vehicle_model_ids
+    )
+    result = bulk_upsert(ServicePricing, matrix, ['service', 'vehicle_model'], chunk_size=chunk_size)
+    result.update(deleted=0, stale=0)
+    return result
+
+
+DATASETS = [ServiceCategoryDataset(), ServiceDataset(), VehicleDataset(), ServicePricingDataset()]
+
+
+def sync(names=None, force=False, prune=False, dry_run=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Apply every changed dataset (in dependency order) and return a report
+    {dataset: {'status': 'unchanged'|'applied'|'pending', ...}}.
+    """
+    selected = [d for d in DATASETS if not names or d.name in names]
+    states = {s.dataset: s for s in CatalogSyncState.objects.filter(dataset__in=[d.name for d in selected])}
+    report = {}
+    for dataset in selected:
+        started = time.perf_counter()
+        state = states.get(dataset.name)
+        new = dataset.snapshot()
+        digest = _digest(new, dataset.fingerprint())
+        old = _load_snapshot(state.snapshot) if state is not None else {}
+        added, changed, removed = diff(old, new)
+        # Stale keys kept from an earlier sync stay pending until a --prune run
+        if state is not None and state.digest == digest and not force and not (prune and removed):
+            report[dataset.name] = {'status': 'unchanged', 'digest': digest}
+            continue
+
+        if dry_run:
+            report[dataset.name] = {
+                'status': 'pending', 'digest': digest,
+                'added': len(added), 'changed': len(changed), 'removed': len(removed),
+            }
+            continue
+
+        with transaction.atomic():
+            stats = dataset.apply(old, new, prune, chunk_size)
+            # Remember unpruned keys so a later --prune can still find them
+            applied = {**{key: old[key] for key in removed}, **new} if stats['stale'] else new
+            CatalogSyncState.objects.update_or_create(
+                dataset=dataset.name,
+                defaults={
+                    'digest': digest,
+                    'snapshot': sorted([list(key), values] for key, values in applied.items()),
+                    'rows': len(new),
+                },
+            )
+        report[dataset.name] = {
+            'status': 'applied', 'digest': digest,
+            'created': stats['created'], 'updated': stats['updated'],
+            'deleted': stats['deleted'], 'stale': stats['stale'],
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        logger.debug(f"Catalog dataset {dataset.name} applied: {report[dataset.name]}")
+    return report
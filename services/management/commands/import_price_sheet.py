@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services import price_import
+
+
+class Command(BaseCommand):
+    help = (
+        "Import service x vehicle-model prices from an .xlsx or .csv sheet (long or wide layout). "
+        "The sheet is streamed in batches, validated, diffed against ServicePricing and applied in bulk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the .xlsx or .csv sheet')
+        parser.add_argument('--sheet', help='Worksheet name (.xlsx only); default: the active sheet')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change, then roll back')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Apply the valid rows even when some rows are invalid')
+        parser.add_argument('--no-create-vehicles', action='store_true',
+                            help='Treat unknown vehicle types/brands/models as errors instead of creating them')
+        parser.add_argument('--batch-size', type=int, default=price_import.DEFAULT_BATCH_SIZE,
+                            help='Sheet rows per batch')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        try:
+            report = price_import.import_price_sheet(
+                options['path'], dry_run=options['dry_run'], skip_invalid=options['skip_invalid'],
+                create_vehicles=not options['no_create_vehicles'], batch_size=options['batch_size'],
+                sheet=options['sheet'],
+            )
+        except (price_import.PriceSheetError, OSError, KeyError) as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+
+        for error in report['errors']:
+            self.stdout.write(self.style.ERROR(f"  line {error['row']}: {error['error']}"))
+        if report['invalid'] > len(report['errors']):
+            self.stdout.write(f"  ... {report['invalid'] - len(report['errors'])} more invalid rows")
+
+        summary = (
+            f"{report['rows']} rows in {report['batches']} batches: {report['created']} created, "
+            f"{report['updated']} updated, {report['unchanged']} unchanged, {report['duplicates']} duplicates, "
+            f"{report['invalid']} invalid, {report['vehicles_created']} vehicle rows created "
+            f"({report['seconds']:.2f}s, {report['rows_per_second']:.0f} rows/s, max RSS {report['max_rss_mb']} MB)"
+        )
+        if report['status'] == 'applied':
+            self.stdout.write(self.style.SUCCESS(f"Applied: {summary}"))
+        elif report['status'] == 'dry_run':
+            self.stdout.write(self.style.WARNING(f"Dry run, nothing written: {summary}"))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f"Rejected, nothing written: {summary}. Fix the rows above or rerun with --skip-invalid."
+            ))
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if report['status'] == 'rejected':
+            raise CommandError(f"{report['invalid']} invalid rows")
@@ -1,10 +1,13 @@
 from django.core.management.base import BaseCommand
-from decimal import Decimal
 
-from services.models import Service, ServicePricing
+from repairmybike.bulk import DEFAULT_CHUNK_SIZE
+from services.catalog_sync import fill_default_pricing
 from vehicles.models import VehicleModel
 
 
+# Price for services missing from PRICE_LOOKUP
+DEFAULT_PRICE = 500
+
 PRICE_LOOKUP = {
     # Engine Services
     "oil change": 600,
@@ -87,22 +90,17 @@ class Command(BaseCommand):
         "using a predefined default price table. Existing pricing rows are left intact."
     )
 
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per bulk insert')
+
     def handle(self, *args, **options):
-        vehicle_models = list(VehicleModel.objects.all())
-        if not vehicle_models:
+        if not VehicleModel.objects.exists():
             self.stdout.write(self.style.WARNING("No vehicle models found. Populate vehicles first."))
             return
 
-        created = 0
-        for service in Service.objects.all():
-            # lookup price; if not found, use fallback 500
-            price_value = PRICE_LOOKUP.get(service.name.lower(), 500)
-            for vm in vehicle_models:
-                _, created_flag = ServicePricing.objects.get_or_create(
-                    service=service,
-                    vehicle_model=vm,
-                    defaults={"price": Decimal(price_value)},
-                )
-                if created_flag:
-                    created += 1
-        self.stdout.write(self.style.SUCCESS(f"ServicePricing rows created: {created}"))
\ No newline at end of file
+        result = fill_default_pricing(PRICE_LOOKUP, DEFAULT_PRICE, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"ServicePricing rows created: {result['created']} "
+            f"({result['unchanged']} already priced) in {result['seconds']:.2f}s, "
+            f"{result['rows_per_second']:.0f} rows/s"
+        ))
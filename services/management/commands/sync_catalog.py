@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from repairmybike.bulk import DEFAULT_CHUNK_SIZE
+from services import catalog_sync
+
+
+class Command(BaseCommand):
+    help = (
+        "Sync the embedded catalog seed data (service categories, services, vehicles, default pricing). "
+        "Datasets whose digest matches the last applied one are skipped; changed ones are applied as "
+        "bulk diffs. Replaces running the individual load_* commands on every deploy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', action='append', choices=[d.name for d in catalog_sync.DATASETS],
+                            help='Dataset to sync (repeatable); default: all')
+        parser.add_argument('--force', action='store_true', help='Apply even when the digest is unchanged')
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete rows whose keys were removed from the dataset since the last sync')
+        parser.add_argument('--dry-run', action='store_true', help='Report pending changes without writing')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per bulk statement')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = catalog_sync.sync(
+            names=options['dataset'], force=options['force'], prune=options['prune'],
+            dry_run=options['dry_run'], chunk_size=options['chunk_size'],
+        )
+        for name, result in report.items():
+            if result['status'] == 'unchanged':
+                self.stdout.write(f"{name}: unchanged ({result['digest'][:12]})")
+            elif result['status'] == 'pending':
+                self.stdout.write(self.style.WARNING(
+                    f"{name}: would apply {result['added']} added, {result['changed']} changed, "
+                    f"{result['removed']} removed keys"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{name}: created {result['created']}, updated {result['updated']}, "
+                    f"deleted {result['deleted']} in {result['seconds']:.2f}s"
+                ))
+                if result['stale']:
+                    self.stdout.write(self.style.WARNING(
+                        f"  {result['stale']} keys were removed from the dataset; rerun with --prune to delete them"
+                    ))
+        self.stdout.write(self.style.SUCCESS(f"Catalog sync finished in {time.perf_counter() - started:.2f}s"))
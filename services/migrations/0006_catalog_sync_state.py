@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0005_alter_service_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(max_length=50, unique=True)),
+                ('digest', models.CharField(max_length=64)),
+                ('snapshot', models.JSONField(default=list)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('applied_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'catalog_sync_state',
+                'ordering': ['dataset'],
+            },
+        ),
+    ]
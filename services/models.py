@@ -30,6 +30,8 @@ class Service(models.Model):
     specifications = models.JSONField(default=list)
     # Single primary image uploaded via backend (optional)
     images = models.ImageField(upload_to='services/images/', blank=True, null=True)
+    # Resized WebP copies of images, see repairmybike.image_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -56,4 +58,19 @@ class ServicePricing(models.Model):
         unique_together = ['service', 'vehicle_model']
     
     def __str__(self):
-        return f"{self.service.name} - {self.vehicle_model.name} - ₹{self.price}"
\ No newline at end of file
+        return f"{self.service.name} - {self.vehicle_model.name} - ₹{self.price}"
+
+class CatalogSyncState(models.Model):
+    """Last catalog dataset applied by `manage.py sync_catalog` (see services/catalog_sync.py)."""
+    dataset = models.CharField(max_length=50, unique=True)
+    digest = models.CharField(max_length=64)
+    snapshot = models.JSONField(default=list)
+    rows = models.PositiveIntegerField(default=0)
+    applied_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'catalog_sync_state'
+        ordering = ['dataset']
+
+    def __str__(self):
+        return f"{self.dataset} @ {self.digest[:12]}"
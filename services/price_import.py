@@ -0,0 +1,353 @@
+"""
+Streaming import of service x vehicle-model price sheets.
+
+A sheet is .xlsx (read with openpyxl in read-only mode) or .csv (pandas in
+chunks), in either of two layouts:
+
+  long:  vehicle_type, brand, model, service, price   (one row per pair)
+  wide:  vehicle_type, brand, model, <service>, <service>, ...
+         (one row per vehicle model; an empty cell means "no price")
+
+Rows are processed batch_size at a time, so memory stays flat however long
+the sheet is. Per batch:
+
+  1. prices are parsed and range-checked and keys checked for blanks, all
+     vectorized with pandas/NumPy. Services are matched by name,
+     case-insensitively, and must already exist;
+  2. vehicle types, brands and models are matched case-insensitively.
+     Missing ones are created, unless create_vehicles=False, in which case
+     they are errors;
+  3. duplicate pairs keep the last row (within a batch by dropping the
+     earlier ones, across batches because later batches overwrite). The batch is diffed against the
+     existing ServicePricing rows for its own keys and written with
+     bulk_upsert: new pairs are inserted and changed prices updated.
+
+The whole import runs in one transaction. A dry run, or a sheet with
+invalid rows unless skip_invalid is set, is rolled back at the end. The
+report (counts, first errors) is the same either way. Cached pricing,
+services and vehicle lists for whatever changed are dropped on commit.
+"""
+import logging
+import time
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.db import transaction
+
+from repairmybike import catalog_cache
+from repairmybike.bulk import bulk_upsert
+from vehicles.models import VehicleBrand, VehicleModel, VehicleType
+
+from .models import Service, ServicePricing
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+# ServicePricing.price is DecimalField(max_digits=10, decimal_places=2)
+MAX_PRICE = 10 ** 8
+
+AMBIGUOUS = -1
+
+VEHICLE_COLUMNS = ['vehicle_type', 'brand', 'model']
+LONG_COLUMNS = VEHICLE_COLUMNS + ['service', 'price']
+HEADER_ALIASES = {
+    'type': 'vehicle_type',
+    'vehicle_brand': 'brand',
+    'vehicle_model': 'model',
+    'service_name': 'service',
+}
+
+
+class PriceSheetError(ValueError):
+    """The sheet cannot be read at all (unknown format, missing columns)."""
+
+
+def _header(value):
+    name = str(value if value is not None else '').strip()
+    key = name.lower().replace(' ', '_')
+    return HEADER_ALIASES.get(key, key), name
+
+
+def _frames_from_csv(path, batch_size):
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=batch_size, skipinitialspace=True)
+    for chunk in reader:
+        # Header is line 1, so data row i (0-based across chunks) is line i + 2
+        chunk.insert(0, '_row', chunk.index + 2)
+        yield chunk
+
+
+def _frames_from_xlsx(path, batch_size, sheet=None):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = list(header)
+        batch, line = [], 1
+        for values in rows:
+            line += 1
+            if all(v is None or v == '' for v in values):
+                continue
+            batch.append((line, *values[:len(header)]))
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=['_row', *header], dtype=object)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=['_row', *header], dtype=object)
+    finally:
+        workbook.close()
+
+
+def read_batches(path, batch_size=DEFAULT_BATCH_SIZE, sheet=None):
+    """Yield long-format DataFrames (_row + LONG_COLUMNS, all strings) of at most batch_size sheet rows."""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        frames = _frames_from_csv(path, batch_size)
+    elif suffix in ('.xlsx', '.xlsm'):
+        frames = _frames_from_xlsx(path, batch_size, sheet=sheet)
+    else:
+        raise PriceSheetError(f"Unsupported sheet type '{suffix}'; use .xlsx or .csv")
+
+    layout = None
+    for frame in frames:
+        renamed = {}
+        for column in frame.columns[1:]:
+            key, original = _header(column)
+            renamed[column] = key if key in LONG_COLUMNS else original
+        frame = frame.rename(columns=renamed)
+        frame = frame.loc[:, frame.columns != '']
+        if layout is None:
+            missing = [c for c in VEHICLE_COLUMNS if c not in frame.columns]
+            if missing:
+                raise PriceSheetError(f"Missing columns: {', '.join(missing)}")
+            layout = 'long' if {'service', 'price'} <= set(frame.columns) else 'wide'
+            if layout == 'wide' and len(frame.columns) <= 1 + len(VEHICLE_COLUMNS):
+                raise PriceSheetError("No service columns found (expected 'service' and 'price', or one column per service)")
+
+        if layout == 'wide':
+            services = [c for c in frame.columns if c not in ('_row', *VEHICLE_COLUMNS) and c]
+            frame = frame.melt(id_vars=['_row', *VEHICLE_COLUMNS], value_vars=services,
+                               var_name='service', value_name='price')
+            frame = frame[frame['price'].notna() & (frame['price'].astype(str).str.strip() != '')]
+
+        frame = frame[['_row', *LONG_COLUMNS]].copy()
+        for column in LONG_COLUMNS:
+            values = frame[column].astype(object)
+            frame[column] = values.where(values.notna(), '').astype(str).str.strip()
+        yield frame.reset_index(drop=True)
+
+
+class VehicleResolver:
+    """Case-insensitive (type, brand, model) -> VehicleModel id, creating missing rows in bulk."""
+
+    def __init__(self, create=True):
+        self.create = create
+        self.created = 0
+        self.types = {}
+        self.brands = {}
+        self.models = {}
+        self._load_types()
+        self._load_brands()
+        self._load_models()
+        # For cache invalidation: new types, and parents that gained children
+        self.types_changed = False
+        self.touched_types = set()
+        self.touched_brands = set()
+
+    def _load_types(self):
+        self.types.update((name.lower(), pk) for pk, name in VehicleType.objects.values_list('id', 'name'))
+
+    def _load_brands(self, type_ids=None):
+        rows = VehicleBrand.objects.all() if type_ids is None else VehicleBrand.objects.filter(vehicle_type_id__in=type_ids)
+        self.brands.update(((t, name.lower()), pk) for pk, t, name in rows.values_list('id', 'vehicle_type_id', 'name'))
+
+    def _load_models(self, brand_ids=None):
+        rows = VehicleModel.objects.all() if brand_ids is None else VehicleModel.objects.filter(vehicle_brand_id__in=brand_ids)
+        self.models.update(((b, name.lower()), pk) for pk, b, name in rows.values_list('id', 'vehicle_brand_id', 'name'))
+
+    def resolve(self, frame):
+        """Return a float Series of model ids aligned with frame (NaN where blank, or unknown and not created)."""
+        keys = frame.loc[(frame[VEHICLE_COLUMNS] != '').all(axis=1), VEHICLE_COLUMNS].drop_duplicates()
+        keys = list(keys.itertuples(index=False, name=None))
+
+        if self.create:
+            new_types = {t.lower(): t for t, _b, _m in keys if t.lower() not in self.types}
+            if new_types:
+                result = bulk_upsert(VehicleType, [VehicleType(name=name) for name in new_types.values()], ['name'])
+                self.created += result['created']
+                self.types_changed = True
+                self._load_types()
+
+            new_brands = {}
+            for t, b, _m in keys:
+                type_id = self.types[t.lower()]
+                if (type_id, b.lower()) not in self.brands:
+                    new_brands[(type_id, b.lower())] = VehicleBrand(vehicle_type_id=type_id, name=b)
+            if new_brands:
+                result = bulk_upsert(VehicleBrand, list(new_brands.values()), ['vehicle_type', 'name'])
+                self.created += result['created']
+                type_ids = {type_id for type_id, _name in new_brands}
+                self.touched_types.update(type_ids)
+                self._load_brands(type_ids)
+
+            new_models = {}
+            for t, b, m in keys:
+                brand_id = self.brands[(self.types[t.lower()], b.lower())]
+                if (brand_id, m.lower()) not in self.models:
+                    new_models[(brand_id, m.lower())] = VehicleModel(vehicle_brand_id=brand_id, name=m)
+            if new_models:
+                result = bulk_upsert(VehicleModel, list(new_models.values()), ['vehicle_brand', 'name'])
+                self.created += result['created']
+                brand_ids = {brand_id for brand_id, _name in new_models}
+                self.touched_brands.update(brand_ids)
+                self._load_models(brand_ids)
+
+        ids = {}
+        for t, b, m in keys:
+            brand_id = self.brands.get((self.types.get(t.lower()), b.lower()))
+            ids[(t, b, m)] = self.models.get((brand_id, m.lower()))
+        index = pd.MultiIndex.from_frame(frame[VEHICLE_COLUMNS])
+        return pd.Series(index.map(ids), index=frame.index, dtype=float)
+
+
+def _service_ids():
+    """Lower-cased service name -> id; names shared by several categories map to AMBIGUOUS."""
+    ids = {}
+    for pk, name in Service.objects.values_list('id', 'name'):
+        ids[name.lower()] = AMBIGUOUS if name.lower() in ids else pk
+    return ids
+
+
+def _validate(frame, service_ids):
+    """Vectorized checks; returns (price ndarray, service id Series, error message Series or None per row)."""
+    price = pd.to_numeric(frame['price'].str.replace(',', '', regex=False), errors='coerce').to_numpy(dtype=float)
+    service_id = frame['service'].str.lower().map(service_ids)
+
+    messages = pd.Series(None, index=frame.index, dtype=object)
+    checks = [
+        ((frame[LONG_COLUMNS[:-1]] == '').any(axis=1).to_numpy(), 'vehicle_type, brand, model and service are required'),
+        (np.isnan(price), 'price is not a number'),
+        (~np.isnan(price) & ((price < 0) | (price >= MAX_PRICE)), f'price must be between 0 and {MAX_PRICE}'),
+        (service_id.isna().to_numpy() & (frame['service'] != '').to_numpy(), 'unknown service'),
+        ((service_id == AMBIGUOUS).to_numpy(), 'service name exists in several categories'),
+    ]
+    # Report the first failing check per row
+    for mask, message in reversed(checks):
+        messages[mask] = message
+    return np.round(price, 2), service_id, messages
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def import_price_sheet(path, dry_run=False, skip_invalid=False, create_vehicles=True,
+                       batch_size=DEFAULT_BATCH_SIZE, sheet=None):
+    started = time.perf_counter()
+    report = {
+        'rows': 0, 'invalid': 0, 'duplicates': 0,
+        'created': 0, 'updated': 0, 'unchanged': 0,
+        'vehicles_created': 0, 'batches': 0, 'errors': [],
+    }
+    touched_models, touched_services = set(), set()
+
+    with transaction.atomic():
+        service_ids = _service_ids()
+        vehicles = VehicleResolver(create=create_vehicles)
+
+        for frame in read_batches(path, batch_size=batch_size, sheet=sheet):
+            report['batches'] += 1
+            report['rows'] += len(frame)
+            price, service_id, messages = _validate(frame, service_ids)
+            # Rows already invalid must not create vehicles
+            pending = messages.isna()
+            model_id = vehicles.resolve(frame[pending]).reindex(frame.index)
+            messages[pending & model_id.isna()] = 'unknown vehicle model'
+
+            bad = messages.notna().to_numpy()
+            if bad.any():
+                report['invalid'] += int(bad.sum())
+                room = MAX_REPORTED_ERRORS - len(report['errors'])
+                if room > 0:
+                    report['errors'].extend(
+                        {'row': int(row), 'error': message}
+                        for row, message in zip(frame['_row'][bad][:room], messages[bad][:room])
+                    )
+
+            good = pd.DataFrame({
+                'service_id': service_id[~bad].astype('int64').to_numpy(),
+                'vehicle_model_id': model_id[~bad].astype('int64').to_numpy(),
+                'price': price[~bad],
+            })
+            deduped = good.drop_duplicates(['service_id', 'vehicle_model_id'], keep='last')
+            report['duplicates'] += len(good) - len(deduped)
+            if deduped.empty:
+                continue
+
+            objs = [
+                ServicePricing(service_id=s, vehicle_model_id=m, price=Decimal(f'{p:.2f}'))
+                for s, m, p in deduped.itertuples(index=False)
+            ]
+            batch_services = deduped['service_id'].unique().tolist()
+            batch_models = deduped['vehicle_model_id'].unique().tolist()
+            result = bulk_upsert(
+                ServicePricing, objs, ['service', 'vehicle_model'], update_fields=['price'],
+                existing=ServicePricing.objects.filter(service_id__in=batch_services, vehicle_model_id__in=batch_models),
+                chunk_size=batch_size,
+            )
+            for key in ('created', 'updated', 'unchanged'):
+                report[key] += result[key]
+            if result['created'] or result['updated']:
+                touched_models.update(batch_models)
+                touched_services.update(batch_services)
+
+        report['vehicles_created'] = vehicles.created
+        rejected = report['invalid'] and not skip_invalid
+        if dry_run or rejected:
+            transaction.set_rollback(True)
+            report['status'] = 'dry_run' if dry_run else 'rejected'
+        else:
+            report['status'] = 'applied'
+            transaction.on_commit(lambda: _invalidate(touched_models, touched_services, vehicles))
+
+    elapsed = time.perf_counter() - started
+    report.update({
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(report['rows'] / elapsed, 1) if elapsed else 0.0,
+        'max_rss_mb': _max_rss_mb(),
+    })
+    logger.info(
+        f"Price sheet {Path(path).name}: {report['status']}, {report['rows']} rows, "
+        f"{report['created']} created, {report['updated']} updated, {report['invalid']} invalid"
+    )
+    return report
+
+
+def _invalidate(model_ids, service_ids, vehicles):
+    keys = [catalog_cache.service_pricing_key(pk) for pk in model_ids]
+    if service_ids:
+        # Service payloads carry the lowest price across vehicle models
+        keys.append(catalog_cache.SERVICES_ALL_KEY)
+        category_ids = Service.objects.filter(id__in=service_ids).values_list('service_category_id', flat=True).distinct()
+        keys.extend(catalog_cache.services_category_key(pk) for pk in category_ids)
+    if vehicles.types_changed:
+        keys.append(catalog_cache.VEHICLE_TYPES_KEY)
+    keys.extend(catalog_cache.vehicle_brands_key(pk) for pk in vehicles.touched_types)
+    keys.extend(catalog_cache.vehicle_models_key(pk) for pk in vehicles.touched_brands)
+    if keys:
+        cache.delete_many(keys)
@@ -1,17 +1,17 @@
 from rest_framework import serializers
 from django.conf import settings
+from repairmybike.image_variants import variant_urls
+from repairmybike.media_urls import MediaListSerializer, storage_url
 from .models import ServiceCategory, Service, ServicePricing
-try:
-    from cloudinary.utils import cloudinary_url as _cloudinary_url
-except Exception:
-    _cloudinary_url = None
 
 
 class ServiceCategorySerializer(serializers.ModelSerializer):
     service_count = serializers.SerializerMethodField()
     
     def get_service_count(self, obj):
-        return obj.get_service_count()
+        # Annotated by ServiceCategoryViewSet; fall back to a COUNT query otherwise
+        count = getattr(obj, 'service_count', None)
+        return count if count is not None else obj.get_service_count()
     
     class Meta:
         model = ServiceCategory
@@ -20,20 +20,25 @@ class ServiceCategorySerializer(serializers.ModelSerializer):
 
 
 class ServiceSerializer(serializers.ModelSerializer):
+    media_fields = ('images',)
     category_name = serializers.CharField(source='service_category.name', read_only=True)
     price = serializers.SerializerMethodField()
     images = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     
     def get_price(self, obj):
         # Get the lowest price across all vehicle models
+        if hasattr(obj, 'min_price'):
+            return float(obj.min_price) if obj.min_price is not None else 0.0
         pricing = obj.pricing.order_by('price').first()
         return float(pricing.price) if pricing else 0.0
     
     class Meta:
         model = Service
+        list_serializer_class = MediaListSerializer
         fields = [
             'id', 'service_category', 'category_name', 'name', 'description',
-            'rating', 'reviews_count', 'specifications', 'images', 'price',
+            'rating', 'reviews_count', 'specifications', 'images', 'image_variants', 'price',
             'is_featured', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -51,7 +56,7 @@ class ServiceSerializer(serializers.ModelSerializer):
         try:
             if hasattr(raw, 'url'):
                 # If the file exists, return its URL
-                return [raw.url] if getattr(raw, 'name', None) else []
+                return [storage_url(raw.storage, raw.name)] if getattr(raw, 'name', None) else []
         except Exception:
             pass
 
@@ -62,7 +67,7 @@ class ServiceSerializer(serializers.ModelSerializer):
                 img = getattr(item, 'image', None)
                 if img and getattr(img, 'name', None):
                     try:
-                        urls.append(img.url)
+                        urls.append(storage_url(img.storage, img.name))
                     except Exception:
                         continue
             return urls
@@ -85,6 +90,13 @@ class ServiceSerializer(serializers.ModelSerializer):
 
         return []
 
+    def get_image_variants(self, obj):
+        # Same URL form as images; empty until variants are built for the current file
+        try:
+            return variant_urls(obj)
+        except Exception:
+            return {}
+
 
 class ServicePricingSerializer(serializers.ModelSerializer):
     service_id = serializers.IntegerField(source='service.id', read_only=True)
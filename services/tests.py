@@ -1,3 +1,135 @@
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+import openpyxl
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from services import catalog_sync, price_import
+from services.management.commands import (
+    load_default_service_pricing, load_major_services, load_service_categories,
+)
+from services.models import Service, ServiceCategory, ServicePricing
+from vehicles.models import VehicleBrand, VehicleModel, VehicleType
+
+
+class CatalogSyncTests(TestCase):
+    def test_unchanged_datasets_are_skipped_and_changes_applied_as_diffs(self):
+        first = catalog_sync.sync()
+        self.assertTrue(all(r['status'] == 'applied' for r in first.values()))
+        self.assertGreater(first['service_pricing']['created'], 0)
+
+        with CaptureQueriesContext(connection) as captured:
+            second = catalog_sync.sync()
+        self.assertTrue(all(r['status'] == 'unchanged' for r in second.values()))
+        self.assertLessEqual(len(captured), 3)
+
+        oil = ServicePricing.objects.filter(service__name='Oil change')
+        custom = oil.first()
+        custom.price = Decimal('999')
+        custom.save()
+
+        categories = dict(load_service_categories.CATEGORIES)
+        categories['Air Filter'] = 'Cleaning, replacement'
+        del categories['Cooling System']
+        prices = dict(load_default_service_pricing.PRICE_LOOKUP, **{'oil change': 650})
+        with mock.patch.object(load_service_categories, 'CATEGORIES', categories), \
+                mock.patch.object(load_default_service_pricing, 'PRICE_LOOKUP', prices):
+            pending = catalog_sync.sync(dry_run=True)
+            self.assertEqual(
+                (pending['service_categories']['changed'], pending['service_categories']['removed']), (1, 1),
+            )
+            applied = catalog_sync.sync(names=['service_categories', 'service_pricing'])
+            pruned = catalog_sync.sync(names=['service_categories'], prune=True)
+            settled = catalog_sync.sync(names=['service_categories'], prune=True)
+
+        self.assertEqual(applied['service_categories']['updated'], 1)
+        self.assertEqual(applied['service_categories']['stale'], 1)
+        self.assertEqual(ServiceCategory.objects.get(name='Air Filter').description, 'Cleaning, replacement')
+        self.assertEqual(applied['service_pricing']['updated'], oil.count() - 1)
+        self.assertEqual(ServicePricing.objects.get(pk=custom.pk).price, Decimal('999'))
+        self.assertEqual(set(oil.exclude(pk=custom.pk).values_list('price', flat=True)), {Decimal('650')})
+
+        # Stale keys stay pending until a pruning run deletes them
+        self.assertEqual(pruned['service_categories']['deleted'], 1)
+        self.assertFalse(ServiceCategory.objects.filter(name='Cooling System').exists())
+        self.assertEqual(settled['service_categories']['status'], 'unchanged')
+
+    def test_prune_of_a_dropped_category_does_not_recreate_it(self):
+        catalog_sync.sync()
+        categories = dict(load_service_categories.CATEGORIES)
+        del categories['Cooling System']
+        services_map = dict(load_major_services.SERVICES_MAP)
+        del services_map['Cooling System']
+        with mock.patch.object(load_service_categories, 'CATEGORIES', categories), \
+                mock.patch.object(load_major_services, 'SERVICES_MAP', services_map):
+            pruned = catalog_sync.sync(names=['service_categories', 'services'], prune=True)
+
+        self.assertEqual(pruned['service_categories']['deleted'], 1)
+        self.assertEqual(pruned['services']['stale'], 0)
+        self.assertFalse(ServiceCategory.objects.filter(name='Cooling System').exists())
+        self.assertFalse(Service.objects.filter(service_category__name='Cooling System').exists())
+
+
+class PriceImportTests(TestCase):
+    def setUp(self):
+        category = ServiceCategory.objects.create(name='General')
+        self.oil = Service.objects.create(service_category=category, name='Oil change')
+        self.brakes = Service.objects.create(service_category=category, name='Brake service')
+        brand = VehicleBrand.objects.create(vehicle_type=VehicleType.objects.create(name='Bike'), name='Honda')
+        self.shine = VehicleModel.objects.create(vehicle_brand=brand, name='Shine')
+        ServicePricing.objects.create(service=self.oil, vehicle_model=self.shine, price=Decimal('500'))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _csv(self, text):
+        path = os.path.join(self.tmp.name, 'prices.csv')
+        with open(path, 'w') as fh:
+            fh.write(text)
+        return path
+
+    def test_long_csv_is_validated_and_applied_in_batches(self):
+        path = self._csv(
+            'Vehicle Type,Brand,Model,Service,Price\n'
+            'bike,honda,shine,oil change,600\n'
+            'Bike,Honda,Shine,Oil change,"1,650.50"\n'
+            'Bike,Honda,Unicorn,Brake service,350\n'
+            'Bike,Honda,Shine,Tyre fitting,100\n'
+            'Bike,Honda,Shine,Brake service,-5\n'
+        )
+        dry = price_import.import_price_sheet(path, dry_run=True, batch_size=2)
+        rejected = price_import.import_price_sheet(path, batch_size=2)
+        self.assertEqual((dry['status'], rejected['status']), ('dry_run', 'rejected'))
+        self.assertEqual(
+            [(e['row'], e['error']) for e in dry['errors']],
+            [(5, 'unknown service'), (6, 'price must be between 0 and 100000000')],
+        )
+        self.assertEqual(ServicePricing.objects.count(), 1)
+        self.assertFalse(VehicleModel.objects.filter(name='Unicorn').exists())
+
+        applied = price_import.import_price_sheet(path, skip_invalid=True, batch_size=2)
+        self.assertEqual(applied['status'], 'applied')
+        self.assertEqual((applied['created'], applied['updated'], applied['vehicles_created']), (1, 1, 1))
+        self.assertEqual(ServicePricing.objects.get(service=self.oil, vehicle_model=self.shine).price, Decimal('1650.50'))
+        self.assertEqual(ServicePricing.objects.get(vehicle_model__name='Unicorn').price, Decimal('350'))
+
+    def test_wide_xlsx_and_unknown_vehicles(self):
+        path = os.path.join(self.tmp.name, 'prices.xlsx')
+        workbook = openpyxl.Workbook()
+        workbook.active.append(['Type', 'Brand', 'Model', 'Oil change', 'Brake service'])
+        workbook.active.append(['Bike', 'Honda', 'Shine', 500, 320])
+        workbook.active.append(['Scooter', 'Honda', 'Activa', 450, None])
+        workbook.save(path)
+
+        report = price_import.import_price_sheet(path, skip_invalid=True, create_vehicles=False)
+        self.assertEqual((report['rows'], report['created'], report['unchanged']), (3, 1, 1))
+        self.assertEqual(report['errors'], [{'row': 3, 'error': 'unknown vehicle model'}])
+        self.assertEqual(ServicePricing.objects.get(service=self.brakes).price, Decimal('320'))
+        self.assertFalse(VehicleType.objects.filter(name='Scooter').exists())
 
-# Create your tests here.
+        with self.assertRaises(price_import.PriceSheetError):
+            price_import.import_price_sheet(self._csv('brand,model,price\nHonda,Shine,1\n'))
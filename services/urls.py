@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from repairmybike.offload import async_get
+from . import async_views
 from .views import ServiceCategoryViewSet, ServiceViewSet, ServicePricingViewSet
 
 router = DefaultRouter()
@@ -9,4 +12,21 @@ router.register(r'service-pricing', ServicePricingViewSet, basename='service-pri
 
 urlpatterns = [
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
+
+if settings.ASYNC_VIEWS:
+    # Async GET takes precedence over the router; POST still creates through the viewsets
+    urlpatterns = [
+        path('service-categories/', async_get(
+            async_views.service_category_list,
+            ServiceCategoryViewSet.as_view({'get': 'list', 'post': 'create'})
+        ), name='service-category-list'),
+        path('services/', async_get(
+            async_views.service_list,
+            ServiceViewSet.as_view({'get': 'list', 'post': 'create'})
+        ), name='service-list'),
+        path('service-pricing/by-vehicle/', async_get(
+            async_views.service_pricing_by_vehicle,
+            ServicePricingViewSet.as_view({'get': 'by_vehicle'})
+        ), name='service-pricing-by-vehicle'),
+    ] + urlpatterns
@@ -1,26 +1,29 @@
+import logging
+
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.conf import settings
 from django.core.cache import cache
+from django.db.models import Count, Min
+from repairmybike import catalog_cache
 from .models import ServiceCategory, Service, ServicePricing
 from .serializers import ServiceCategorySerializer, ServiceSerializer, ServicePricingSerializer
 
+logger = logging.getLogger(__name__)
+
 
 class ServiceCategoryViewSet(viewsets.ModelViewSet):
-    queryset = ServiceCategory.objects.all()
+    queryset = ServiceCategory.objects.annotate(service_count=Count('services'))
     serializer_class = ServiceCategorySerializer
     permission_classes = []  # Temporarily removed for testing
     
     def list(self, request, *args, **kwargs):
-        print("🔍 ServiceCategoryViewSet.list() called")
-        print(f"📊 Request method: {request.method}")
-        print(f"🌐 Request headers: {dict(request.headers)}")
-        
-        cache_key = 'service_categories_list'
+        cache_key = catalog_cache.SERVICE_CATEGORIES_KEY
         cached_data = cache.get(cache_key)
         
         if cached_data:
-            print(f"✅ Returning cached data: {len(cached_data)} categories")
+            logger.debug(f"Service categories served from cache: {len(cached_data)} categories")
             return Response({
                 'error': False,
                 'message': 'Service categories retrieved successfully',
@@ -28,15 +31,14 @@ class ServiceCategoryViewSet(viewsets.ModelViewSet):
             })
         
         queryset = self.get_queryset()
-        print(f"📋 Queryset count: {queryset.count()}")
-        
         serializer = self.get_serializer(queryset, many=True)
-        print(f"📝 Serialized data: {serializer.data}")
+        if settings.LOG_PAYLOADS:
+            logger.debug(f"Service categories payload: {serializer.data}")
         
         # Cache for 1 hour
-        cache.set(cache_key, serializer.data, 3600)
+        cache.set(cache_key, serializer.data, catalog_cache.CATALOG_TIMEOUT)
         
-        print(f"✅ Returning fresh data: {len(serializer.data)} categories")
+        logger.debug(f"Service categories built: {len(serializer.data)} categories")
         return Response({
             'error': False,
             'message': 'Service categories retrieved successfully',
@@ -45,7 +47,7 @@ class ServiceCategoryViewSet(viewsets.ModelViewSet):
 
 
 class ServiceViewSet(viewsets.ModelViewSet):
-    queryset = Service.objects.all()
+    queryset = Service.objects.select_related('service_category').annotate(min_price=Min('pricing__price'))
     serializer_class = ServiceSerializer
     permission_classes = []  # Temporarily removed for testing
     
@@ -59,19 +61,20 @@ class ServiceViewSet(viewsets.ModelViewSet):
         return queryset
     
     def list(self, request, *args, **kwargs):
-        print("🔍 ServiceViewSet.list() called")
-        print(f"📊 Request method: {request.method}")
-        print(f"🌐 Request headers: {dict(request.headers)}")
-        
         category_id = request.query_params.get('category_id')
-        print(f"🏷️ Category ID filter: {category_id}")
         
-        if category_id:
-            cache_key = f'services_category_{category_id}'
+        if request.query_params.get('category'):
+            # The cached lists are keyed by category id only; name filters are built per request
+            queryset = self.get_queryset()
+            if category_id:
+                queryset = queryset.filter(service_category_id=category_id)
+            cache_key = None
+        elif category_id:
+            cache_key = catalog_cache.services_category_key(category_id)
             cached_data = cache.get(cache_key)
             
             if cached_data:
-                print(f"✅ Returning cached data for category {category_id}: {len(cached_data)} services")
+                logger.debug(f"Services for category {category_id} served from cache: {len(cached_data)} services")
                 return Response({
                     'error': False,
                     'message': 'Services retrieved successfully',
@@ -79,13 +82,12 @@ class ServiceViewSet(viewsets.ModelViewSet):
                 })
             
             queryset = self.get_queryset().filter(service_category_id=category_id)
-            print(f"📋 Filtered queryset count: {queryset.count()}")
         else:
-            cache_key = 'services_all'
+            cache_key = catalog_cache.SERVICES_ALL_KEY
             cached_data = cache.get(cache_key)
             
             if cached_data:
-                print(f"✅ Returning cached data for all services: {len(cached_data)} services")
+                logger.debug(f"All services served from cache: {len(cached_data)} services")
                 return Response({
                     'error': False,
                     'message': 'Services retrieved successfully',
@@ -93,15 +95,16 @@ class ServiceViewSet(viewsets.ModelViewSet):
                 })
             
             queryset = self.get_queryset()
-            print(f"📋 All services queryset count: {queryset.count()}")
         
         serializer = self.get_serializer(queryset, many=True)
-        print(f"📝 Serialized data: {serializer.data}")
+        if settings.LOG_PAYLOADS:
+            logger.debug(f"Services payload: {serializer.data}")
         
-        # Cache for 1 hour
-        cache.set(cache_key, serializer.data, 3600)
+        if cache_key:
+            # Cache for 1 hour
+            cache.set(cache_key, serializer.data, catalog_cache.CATALOG_TIMEOUT)
         
-        print(f"✅ Returning fresh data: {len(serializer.data)} services")
+        logger.debug(f"Services built: {len(serializer.data)} services")
         return Response({
             'error': False,
             'message': 'Services retrieved successfully',
@@ -126,7 +129,7 @@ class ServicePricingViewSet(viewsets.ReadOnlyModelViewSet):
                 'message': 'vehicle_model_id query parameter is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        cache_key = f'service_pricing_vehicle_{vehicle_model_id}'
+        cache_key = catalog_cache.service_pricing_key(vehicle_model_id)
         cached_data = cache.get(cache_key)
         
         if cached_data:
@@ -140,7 +143,7 @@ class ServicePricingViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         
         # Cache for 30 minutes
-        cache.set(cache_key, serializer.data, 1800)
+        cache.set(cache_key, serializer.data, catalog_cache.PRICING_TIMEOUT)
         
         return Response({
             'error': False,
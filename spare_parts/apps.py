@@ -4,4 +4,9 @@ from django.apps import AppConfig
 class SparePartsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "spare_parts"
-    verbose_name = "Spare Parts"
\ No newline at end of file
+    verbose_name = "Spare Parts"
+
+    def ready(self):
+        from repairmybike.image_variants import track
+
+        track(self.get_model("SparePartImage"), "image")
@@ -0,0 +1,452 @@
+"""
+JSON Lines import and export of the spare-parts catalog.
+
+One JSON object per line, told apart by "type":
+
+  {"type": "category", "slug": "battery", "name": "Battery", "description": "", "image": null}
+  {"type": "brand", "slug": "amaron", "name": "Amaron", "logo": null}
+  {"type": "part", "sku": "AP-BTZ4", "name": "...", "slug": "...", "category": "battery",
+   "brand": "amaron", "mrp": "3200.00", "sale_price": "2999.00", "specs": {...}, ...,
+   "fitments": [{"vehicle_type": "Scooter", "brand": "HONDA", "model": "Activa 125", "notes": ""}],
+   "images": [{"image": "spare_parts/images/ab12.png", "alt_text": "", "is_primary": true, "sort_order": 0}]}
+
+Categories and brands are keyed by slug and parts by SKU. A part refers to
+its category and brand by slug, so those lines must come first (or already
+exist). Fitments name the vehicle by type/brand/model, matched
+case-insensitively against existing vehicles. Images are metadata only:
+the storage name must already exist, and no file is copied.
+
+A line is the full record: omitted part fields get the model default.
+"fitments" and "images", when present, replace the part's current set;
+when absent they are left alone.
+
+import_catalog() streams the file chunk_size lines at a time. Lookups
+(category and brand slugs, SKUs, vehicle models) are dictionaries built
+with one query per table up front. Each chunk is written with bulk_upsert
+and bulk_create/bulk_update/delete, so the query count follows the chunk
+count and not the line count. The import runs in one transaction. A dry
+run, or a file with invalid lines unless skip_invalid is set, is rolled
+back at the end. export_catalog() writes the same format in primary-key
+order, with one fitment and one image query per chunk of parts, so an
+export imports back unchanged.
+"""
+import gzip
+import io
+import json
+import logging
+import sys
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.text import slugify
+
+from repairmybike.bulk import bulk_upsert
+from vehicles.models import VehicleModel
+
+from .models import SparePart, SparePartBrand, SparePartCategory, SparePartFitment, SparePartImage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+CATEGORY_FIELDS = ['slug', 'name', 'description', 'image']
+BRAND_FIELDS = ['slug', 'name', 'logo']
+# Every editable column of SparePart except the keys resolved separately
+PART_FIELDS = [
+    'sku', 'name', 'slug', 'short_description', 'description', 'specs',
+    'warranty_months_total', 'warranty_free_months', 'warranty_pro_rata_months',
+    'mrp', 'sale_price', 'currency', 'in_stock', 'stock_qty', 'ean',
+    'weight_grams', 'length_mm', 'width_mm', 'height_mm',
+    'rating_average', 'rating_count', 'active',
+]
+IMAGE_FIELDS = ['image', 'alt_text', 'is_primary', 'sort_order']
+
+
+class CatalogFileError(ValueError):
+    """The file cannot be opened or read."""
+
+
+class _LineError(ValueError):
+    pass
+
+
+def _open(path, mode):
+    """path, or '-' for stdin/stdout; .gz is (de)compressed on the fly."""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8') if 'r' in mode else sys.stdout
+    if str(path).endswith('.gz'):
+        return gzip.open(path, f'{mode}t', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _clean(model, names, record):
+    """Model-field validation of record's values; a missing key takes the field default."""
+    values = {}
+    for name in names:
+        field = model._meta.get_field(name)
+        value = record[name] if name in record else field.get_default()
+        try:
+            values[name] = field.clean(value, None)
+        except ValidationError as e:
+            raise _LineError(f"{name}: {' '.join(e.messages)}")
+    return values
+
+
+def _vehicle_key(vehicle_type, brand, model):
+    return tuple(str(v or '').strip().lower() for v in (vehicle_type, brand, model))
+
+
+class CatalogImporter:
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.report = {
+            'lines': 0, 'invalid': 0, 'duplicates': 0, 'chunks': 0, 'errors': [],
+            'categories': {'created': 0, 'updated': 0, 'unchanged': 0},
+            'brands': {'created': 0, 'updated': 0, 'unchanged': 0},
+            'parts': {'created': 0, 'updated': 0, 'unchanged': 0},
+            'fitments': {'created': 0, 'updated': 0, 'deleted': 0},
+            'images': {'created': 0, 'updated': 0, 'deleted': 0},
+        }
+
+    def load(self):
+        """The lookup dictionaries, one query per table."""
+        self.categories, self.category_names = {}, {}
+        for pk, slug, name in SparePartCategory.objects.values_list('id', 'slug', 'name'):
+            self.categories[slug] = pk
+            self.category_names[name] = slug
+        self.brands, self.brand_names = {}, {}
+        for pk, slug, name in SparePartBrand.objects.values_list('id', 'slug', 'name'):
+            self.brands[slug] = pk
+            self.brand_names[name] = slug
+        self.parts, self.part_slugs = {}, {}
+        for pk, sku, slug in SparePart.objects.values_list('id', 'sku', 'slug').iterator(chunk_size=10000):
+            self.parts[sku] = pk
+            self.part_slugs[slug] = sku
+        self.vehicles = {}
+        rows = VehicleModel.objects.values_list(
+            'id', 'vehicle_brand__vehicle_type__name', 'vehicle_brand__name', 'name',
+        )
+        for pk, vehicle_type, brand, model in rows:
+            key = _vehicle_key(vehicle_type, brand, model)
+            # Names that differ only in case cannot be told apart
+            self.vehicles[key] = None if key in self.vehicles else pk
+
+    def _error(self, line, message):
+        self.report['invalid'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'line': line, 'error': message})
+
+    def _add(self, key, result):
+        for name in ('created', 'updated', 'unchanged'):
+            self.report[key][name] += result[name]
+
+    # Categories and brands
+
+    def _owners(self, model, fields, lines, names, label):
+        """Validate category/brand lines into {slug: unsaved instance}; a slug repeated in the chunk keeps its last line."""
+        objs = {}
+        for line, record in lines:
+            try:
+                record.setdefault('slug', slugify(record.get('name') or ''))
+                values = _clean(model, fields, record)
+                owner = names.get(values['name'])
+                if owner is not None and owner != values['slug']:
+                    raise _LineError(f"{label} name '{values['name']}' already belongs to slug '{owner}'")
+            except _LineError as e:
+                self._error(line, str(e))
+                continue
+            if values['slug'] in objs:
+                self.report['duplicates'] += 1
+                names.pop(objs[values['slug']].name, None)
+            names[values['name']] = values['slug']
+            objs[values['slug']] = model(**values)
+        return objs
+
+    def _write_owners(self, model, fields, objs, lookup, key):
+        if not objs:
+            return
+        result = bulk_upsert(
+            model, list(objs.values()), ['slug'], update_fields=fields[1:],
+            existing=model.objects.filter(slug__in=list(objs)), chunk_size=self.chunk_size,
+        )
+        self._add(key, result)
+        missing = [slug for slug in objs if slug not in lookup]
+        if missing:
+            lookup.update(model.objects.filter(slug__in=missing).values_list('slug', 'id'))
+
+    # Parts
+
+    def _part(self, record):
+        if 'slug' not in record and record.get('name') and record.get('sku'):
+            record['slug'] = slugify(f"{record['name']} {record['sku']}")[:220]
+        values = _clean(SparePart, PART_FIELDS, record)
+        category_id = self.categories.get(record.get('category'))
+        if category_id is None:
+            raise _LineError(f"unknown category '{record.get('category')}'")
+        brand_id = self.brands.get(record.get('brand'))
+        if brand_id is None:
+            raise _LineError(f"unknown brand '{record.get('brand')}'")
+        owner = self.part_slugs.get(values['slug'])
+        if owner is not None and owner != values['sku']:
+            raise _LineError(f"slug '{values['slug']}' already belongs to SKU '{owner}'")
+
+        fitments = None
+        if record.get('fitments') is not None:
+            fitments = {}
+            for fitment in record['fitments']:
+                if not isinstance(fitment, dict):
+                    raise _LineError('fitments must be objects')
+                key = _vehicle_key(fitment.get('vehicle_type'), fitment.get('brand'), fitment.get('model'))
+                vehicle_model_id = self.vehicles.get(key)
+                if vehicle_model_id is None:
+                    state = 'ambiguous' if key in self.vehicles else 'unknown'
+                    raise _LineError(f"{state} vehicle model '{' / '.join(key)}'")
+                fitments[vehicle_model_id] = _clean(SparePartFitment, ['notes'], fitment)['notes']
+
+        images = None
+        if record.get('images') is not None:
+            images = {}
+            for image in record['images']:
+                if not isinstance(image, dict) or not image.get('image'):
+                    raise _LineError('images need an "image" storage name')
+                values_image = _clean(SparePartImage, IMAGE_FIELDS, image)
+                images[values_image['image']] = values_image
+
+        return SparePart(category_id=category_id, brand_id=brand_id, **values), fitments, images
+
+    def _write_parts(self, lines):
+        parsed = {}
+        for line, record in lines:
+            try:
+                obj, fitments, images = self._part(record)
+            except _LineError as e:
+                self._error(line, f"{record.get('sku') or 'part'}: {e}")
+                continue
+            # A SKU repeated in the chunk keeps its last line
+            if obj.sku in parsed:
+                self.report['duplicates'] += 1
+                self.part_slugs.pop(parsed[obj.sku][0].slug, None)
+            self.part_slugs[obj.slug] = obj.sku
+            parsed[obj.sku] = (obj, fitments, images)
+        if not parsed:
+            return
+
+        result = bulk_upsert(
+            SparePart, [obj for obj, _f, _i in parsed.values()], ['sku'],
+            update_fields=['category', 'brand', *PART_FIELDS[1:]],
+            existing=SparePart.objects.filter(sku__in=list(parsed)), chunk_size=self.chunk_size,
+        )
+        self._add('parts', result)
+        missing = [sku for sku in parsed if sku not in self.parts]
+        if missing:
+            self.parts.update(SparePart.objects.filter(sku__in=missing).values_list('sku', 'id'))
+
+        fitments = {self.parts[sku]: f for sku, (_o, f, _i) in parsed.items() if f is not None}
+        images = {self.parts[sku]: i for sku, (_o, _f, i) in parsed.items() if i is not None}
+        if fitments:
+            self._write_fitments(fitments)
+        if images:
+            self._write_images(images)
+
+    def _write_fitments(self, wanted):
+        """wanted: {part id: {vehicle model id: notes}}, each the part's complete set."""
+        stale = [
+            pk for pk, part_id, vehicle_model_id in SparePartFitment.objects.filter(
+                spare_part_id__in=list(wanted),
+            ).values_list('id', 'spare_part_id', 'vehicle_model_id')
+            if vehicle_model_id not in wanted[part_id]
+        ]
+        if stale:
+            SparePartFitment.objects.filter(pk__in=stale).delete()
+            self.report['fitments']['deleted'] += len(stale)
+        objs = [
+            SparePartFitment(spare_part_id=part_id, vehicle_model_id=vehicle_model_id, notes=notes)
+            for part_id, models in wanted.items() for vehicle_model_id, notes in models.items()
+        ]
+        if objs:
+            result = bulk_upsert(
+                SparePartFitment, objs, ['spare_part', 'vehicle_model'], update_fields=['notes'],
+                existing=SparePartFitment.objects.filter(spare_part_id__in=list(wanted)),
+                chunk_size=self.chunk_size,
+            )
+            self.report['fitments']['created'] += result['created']
+            self.report['fitments']['updated'] += result['updated']
+
+    def _write_images(self, wanted):
+        """wanted: {part id: {storage name: values}}, each the part's complete set. Matched by storage name."""
+        current = {}
+        stale = []
+        rows = SparePartImage.objects.filter(spare_part_id__in=list(wanted)).order_by('id').values_list(
+            'id', 'spare_part_id', *IMAGE_FIELDS,
+        )
+        for pk, part_id, *values in rows:
+            key = (part_id, values[0])
+            if values[0] not in wanted[part_id] or key in current:
+                stale.append(pk)
+            else:
+                current[key] = (pk, dict(zip(IMAGE_FIELDS, values)))
+
+        to_create, to_update = [], []
+        for part_id, images in wanted.items():
+            for name, values in images.items():
+                if (part_id, name) not in current:
+                    to_create.append(SparePartImage(spare_part_id=part_id, **values))
+                    continue
+                pk, existing = current[(part_id, name)]
+                if existing != values:
+                    to_update.append(SparePartImage(pk=pk, spare_part_id=part_id, **values))
+        if stale:
+            SparePartImage.objects.filter(pk__in=stale).delete()
+        # bulk_create skips post_save, so variants come from `manage.py build_image_variants`
+        SparePartImage.objects.bulk_create(to_create, batch_size=self.chunk_size)
+        SparePartImage.objects.bulk_update(to_update, IMAGE_FIELDS[1:], batch_size=self.chunk_size)
+        counts = self.report['images']
+        counts['created'] += len(to_create)
+        counts['updated'] += len(to_update)
+        counts['deleted'] += len(stale)
+
+    def write_chunk(self, lines):
+        by_type = {'category': [], 'brand': [], 'part': []}
+        for line, record in lines:
+            by_type[record['type']].append((line, record))
+        self._write_owners(
+            SparePartCategory, CATEGORY_FIELDS,
+            self._owners(SparePartCategory, CATEGORY_FIELDS, by_type['category'],
+                         self.category_names, 'category'),
+            self.categories, 'categories',
+        )
+        self._write_owners(
+            SparePartBrand, BRAND_FIELDS,
+            self._owners(SparePartBrand, BRAND_FIELDS, by_type['brand'], self.brand_names, 'brand'),
+            self.brands, 'brands',
+        )
+        self._write_parts(by_type['part'])
+        self.report['chunks'] += 1
+
+    def read(self, fh):
+        """Yield chunks of (line number, record); unparseable lines are reported and skipped."""
+        chunk = []
+        for number, text in enumerate(fh, start=1):
+            if not text.strip():
+                continue
+            self.report['lines'] += 1
+            try:
+                record = json.loads(text)
+            except ValueError as e:
+                self._error(number, f'invalid JSON: {e}')
+                continue
+            if not isinstance(record, dict) or record.get('type') not in ('category', 'brand', 'part'):
+                self._error(number, 'expected an object with "type" category, brand or part')
+                continue
+            chunk.append((number, record))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def import_catalog(path, dry_run=False, skip_invalid=False, chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None):
+    """Import a JSONL catalog file; on_progress(report) is called after every chunk. Returns the report."""
+    started = time.perf_counter()
+    importer = CatalogImporter(chunk_size=chunk_size)
+    report = importer.report
+    try:
+        fh = _open(path, 'r')
+    except OSError as e:
+        raise CatalogFileError(str(e))
+
+    try:
+        with transaction.atomic():
+            importer.load()
+            for chunk in importer.read(fh):
+                importer.write_chunk(chunk)
+                if on_progress:
+                    elapsed = time.perf_counter() - started
+                    report['seconds'] = round(elapsed, 3)
+                    on_progress(report)
+            rejected = report['invalid'] and not skip_invalid
+            if dry_run or rejected:
+                transaction.set_rollback(True)
+                report['status'] = 'dry_run' if dry_run else 'rejected'
+            else:
+                report['status'] = 'applied'
+    except (OSError, UnicodeDecodeError, EOFError) as e:
+        raise CatalogFileError(str(e))
+    finally:
+        if path != '-':
+            fh.close()
+
+    elapsed = time.perf_counter() - started
+    report.update({
+        'seconds': round(elapsed, 3),
+        'lines_per_second': round(report['lines'] / elapsed, 1) if elapsed else 0.0,
+    })
+    logger.info(
+        f"Spare parts import {path}: {report['status']}, {report['lines']} lines, "
+        f"parts {report['parts']}, {report['invalid']} invalid"
+    )
+    return report
+
+
+def _dumps(record):
+    # Decimals go out as strings so prices keep their scale
+    return json.dumps(record, ensure_ascii=False, default=str) + '\n'
+
+
+def export_records(chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield every category, brand and part record in primary-key order."""
+    for values in SparePartCategory.objects.order_by('pk').values_list(*CATEGORY_FIELDS):
+        yield {'type': 'category', **dict(zip(CATEGORY_FIELDS, values))}
+    for values in SparePartBrand.objects.order_by('pk').values_list(*BRAND_FIELDS):
+        yield {'type': 'brand', **dict(zip(BRAND_FIELDS, values))}
+
+    rows = SparePart.objects.order_by('pk').values_list(
+        'pk', 'category__slug', 'brand__slug', *PART_FIELDS,
+    ).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from _part_records(chunk)
+            chunk = []
+    if chunk:
+        yield from _part_records(chunk)
+
+
+def _part_records(chunk):
+    ids = [row[0] for row in chunk]
+    fitments = {pk: [] for pk in ids}
+    for part_id, vehicle_type, brand, model, notes in SparePartFitment.objects.filter(
+        spare_part_id__in=ids,
+    ).order_by('id').values_list(
+        'spare_part_id', 'vehicle_model__vehicle_brand__vehicle_type__name',
+        'vehicle_model__vehicle_brand__name', 'vehicle_model__name', 'notes',
+    ):
+        fitments[part_id].append({'vehicle_type': vehicle_type, 'brand': brand, 'model': model, 'notes': notes})
+    images = {pk: [] for pk in ids}
+    for part_id, *values in SparePartImage.objects.filter(spare_part_id__in=ids).order_by(
+        'sort_order', 'id',
+    ).values_list('spare_part_id', *IMAGE_FIELDS):
+        images[part_id].append(dict(zip(IMAGE_FIELDS, values)))
+
+    for pk, category, brand, *values in chunk:
+        record = {'type': 'part', **dict(zip(PART_FIELDS, values))}
+        record.update(category=category, brand=brand, fitments=fitments[pk], images=images[pk])
+        yield record
+
+
+def export_catalog(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write the catalog to path ('-' for stdout, .gz compressed); returns per-type record counts."""
+    counts = {'category': 0, 'brand': 0, 'part': 0}
+    fh = _open(path, 'w')
+    try:
+        for record in export_records(chunk_size=chunk_size):
+            fh.write(_dumps(record))
+            counts[record['type']] += 1
+    finally:
+        if path != '-':
+            fh.close()
+    return counts
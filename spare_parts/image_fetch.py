@@ -0,0 +1,229 @@
+"""
+Concurrent product-image backfill for spare parts (fetch_part_images).
+
+Each part is one task on a bounded thread pool: search, then download and
+store up to `count` images. All HTTP goes through one pooled
+requests.Session that retries connection errors, 429 and 5xx responses with
+exponential backoff (honouring Retry-After).
+
+Stored files are content-addressed (spare_parts/images/<sha256>.<ext>), so
+an image shared by several parts, or fetched again on a later run, is
+uploaded once: the first task to see a digest stores it, concurrent tasks
+with the same digest wait for that upload, and a digest already in storage
+is reused without uploading. Worker threads never touch the database. The
+calling thread inserts SparePartImage rows with bulk_create as results come
+in, marking the first image of a part that had none as primary.
+"""
+import hashlib
+import logging
+import mimetypes
+import pathlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .models import SparePartImage
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DIR = 'spare_parts/images'
+INSERT_BATCH_SIZE = 200
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def build_session(pool_size, retries=3, backoff=0.5):
+    """A Session whose connection pool fits pool_size threads, with retry/backoff on GET."""
+    retry = Retry(
+        total=retries, connect=retries, read=retries, status=retries,
+        backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET']), respect_retry_after_header=True, raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = 'repairmybike-image-fetch/1.0'
+    return session
+
+
+def _detect_extension(url, content_type):
+    # Prefer MIME type, then the URL, then .jpg
+    if content_type:
+        guessed = mimetypes.guess_extension(content_type.split(';')[0].strip())
+        if guessed:
+            return '.jpg' if guessed == '.jpe' else guessed
+    return pathlib.PurePosixPath(url.split('?', 1)[0]).suffix.lower() or '.jpg'
+
+
+class BingImageSearch:
+    def __init__(self, api_key, session, endpoint=None, timeout=15):
+        self.api_key = api_key
+        self.session = session
+        self.endpoint = endpoint or settings.BING_SEARCH_ENDPOINT
+        self.timeout = timeout
+
+    def __call__(self, query, count):
+        response = self.session.get(
+            self.endpoint,
+            params={'q': query, 'safeSearch': 'Strict', 'count': count, 'imageType': 'Photo'},
+            headers={'Ocp-Apim-Subscription-Key': self.api_key},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        urls = [item.get('contentUrl') or item.get('thumbnailUrl') for item in response.json().get('value', [])]
+        return [url for url in urls if url][:count]
+
+
+class ImageFetcher:
+    """Runs search -> download -> store for many parts; see the module docstring."""
+
+    def __init__(self, search, session, workers=8, count=3, max_bytes=None, timeout=15, storage=None):
+        self.search = search
+        self.session = session
+        self.workers = workers
+        self.count = count
+        self.max_bytes = max_bytes or settings.IMAGE_FETCH_MAX_BYTES
+        self.timeout = timeout
+        self.storage = storage or default_storage
+        self._lock = threading.Lock()
+        self._stored = {}  # digest -> Future resolving to the storage name
+        self.stats = {
+            'parts': 0, 'searched': 0, 'search_failed': 0, 'downloaded': 0, 'download_failed': 0,
+            'store_failed': 0, 'uploaded': 0, 'deduplicated': 0, 'images_created': 0, 'bytes': 0,
+        }
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def download(self, url):
+        """Return (content, extension); raises when the response is not a usable image."""
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and not content_type.startswith('image/'):
+                raise ValueError(f'not an image ({content_type})')
+            chunks, size = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ValueError(f'larger than {self.max_bytes} bytes')
+                chunks.append(chunk)
+        if not size:
+            raise ValueError('empty body')
+        return b''.join(chunks), _detect_extension(url, content_type)
+
+    def store(self, content, ext):
+        """Store content once per digest and return its storage name."""
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            pending = self._stored.get(digest)
+            owner = pending is None
+            if owner:
+                pending = self._stored[digest] = Future()
+        if not owner:
+            self._count('deduplicated')
+            return pending.result()
+
+        try:
+            name = f'{IMAGE_DIR}/{digest}{ext}'
+            if self.storage.exists(name):
+                self._count('deduplicated')
+            else:
+                name = self.storage.save(name, ContentFile(content))
+                self._count('uploaded')
+                self._count('bytes', len(content))
+        except BaseException as e:
+            pending.set_exception(e)
+            with self._lock:
+                # Let a later task retry the upload
+                del self._stored[digest]
+            raise
+        pending.set_result(name)
+        return name
+
+    def fetch_part(self, part_id, query, dry_run=False):
+        """Worker task: returns (part_id, [(url, storage name or None)])."""
+        try:
+            urls = self.search(query, self.count)
+        except Exception as e:
+            self._count('search_failed')
+            logger.warning(f"Image search failed for part {part_id} ({query!r}): {e}")
+            return part_id, None
+        self._count('searched')
+        if dry_run:
+            return part_id, [(url, None) for url in urls]
+
+        images = []
+        for url in urls:
+            try:
+                content, ext = self.download(url)
+            except Exception as e:
+                self._count('download_failed')
+                logger.warning(f"Image download failed for part {part_id} from {url}: {e}")
+                continue
+            self._count('downloaded')
+            try:
+                images.append((url, self.store(content, ext)))
+            except Exception as e:
+                self._count('store_failed')
+                logger.error(f"Storing image for part {part_id} from {url} failed: {e}")
+        return part_id, images
+
+    def run(self, parts, query_template, dry_run=False, on_result=None):
+        """
+        Fetch images for parts (an iterable of SparePart with brand loaded).
+        on_result(part, images) is called on the calling thread as each part completes.
+        Returns the stats dict.
+        """
+        parts = {part.id: part for part in parts}
+        self.stats['parts'] = len(parts)
+        existing = {}
+        for part_id, name in SparePartImage.objects.filter(spare_part_id__in=list(parts)).values_list('spare_part_id', 'image'):
+            existing.setdefault(part_id, set()).add(name)
+
+        pending_rows = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-fetch') as executor:
+            futures = [
+                executor.submit(self.fetch_part, part.id, query_template.format(
+                    brand=part.brand.name if part.brand else '', name=part.name, sku=part.sku,
+                ), dry_run)
+                for part in parts.values()
+            ]
+            for future in as_completed(futures):
+                part_id, images = future.result()
+                part = parts[part_id]
+                if images and not dry_run:
+                    pending_rows.extend(self._rows(part, images, existing.setdefault(part_id, set())))
+                    if len(pending_rows) >= INSERT_BATCH_SIZE:
+                        self._insert(pending_rows)
+                        pending_rows = []
+                if on_result:
+                    on_result(part, images)
+        self._insert(pending_rows)
+        return self.stats
+
+    def _rows(self, part, images, known):
+        rows = []
+        first_order = len(known)
+        for url, name in images:
+            # Same picture found twice for one part, or already attached on an earlier run
+            if name in known:
+                continue
+            known.add(name)
+            rows.append(SparePartImage(
+                spare_part=part, image=name, alt_text=part.name[:200],
+                is_primary=first_order == 0 and not rows, sort_order=first_order + len(rows),
+            ))
+        return rows
+
+    def _insert(self, rows):
+        if rows:
+            SparePartImage.objects.bulk_create(rows, batch_size=INSERT_BATCH_SIZE)
+            self.stats['images_created'] += len(rows)
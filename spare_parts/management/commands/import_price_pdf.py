@@ -0,0 +1,57 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...price_pdf import DEFAULT_PAGES_PER_TASK, TABLE_SETTINGS, PriceListError, import_price_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        "Update spare-part MRP, sale price and stock from a supplier PDF price list. Tables are extracted "
+        "page by page on a process pool, matched to parts by SKU or EAN and applied with one bulk update."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Supplier price list (.pdf)')
+        parser.add_argument('--dry-run', action='store_true', help='Print the diff without writing it')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Extraction processes (default: one per core)')
+        parser.add_argument('--pages-per-task', type=int, default=DEFAULT_PAGES_PER_TASK,
+                            help='Pages each worker extracts per task')
+        parser.add_argument('--strategy', choices=sorted(TABLE_SETTINGS), default='lines',
+                            help="'lines' for ruled tables, 'text' for tables aligned with whitespace only")
+        parser.add_argument('--show', type=int, default=20, help='Changed parts to print')
+        parser.add_argument('--output', help='Write the JSON report, including the full diff, to this file')
+
+    def handle(self, *args, **options):
+        try:
+            report = import_price_pdf(
+                options['path'], dry_run=options['dry_run'], workers=max(1, options['workers'] or 1),
+                pages_per_task=max(1, options['pages_per_task']), strategy=options['strategy'],
+            )
+        except (PriceListError, OSError) as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+
+        for change in report['diff'][:options['show']]:
+            fields = ', '.join(f"{field} {old} -> {new}" for field, (old, new) in change['changes'].items())
+            self.stdout.write(f"  {change['sku']}: {fields}")
+        if report['changed'] > options['show']:
+            self.stdout.write(f"  ... {report['changed'] - options['show']} more changed parts")
+        for error in report['errors'][:options['show']]:
+            self.stdout.write(self.style.ERROR(f"  page {error['page']}: {error['error']} {error['row']}"))
+
+        summary = (
+            f"{report['pages']} pages, {report['rows']} rows: {report['matched']} matched, "
+            f"{report['changed']} changed, {report['unchanged']} unchanged, {report['unmatched']} unmatched, "
+            f"{report['invalid']} invalid ({report['seconds']:.2f}s, {report['pages_per_second']:.1f} pages/s)"
+        )
+        if report['status'] == 'applied':
+            self.stdout.write(self.style.SUCCESS(f"Applied: {summary}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"Dry run, nothing written: {summary}"))
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(json.dumps(report, indent=2, sort_keys=True, default=str) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...catalog_io import DEFAULT_CHUNK_SIZE, CatalogFileError, import_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Import spare-part categories, brands, parts, fitments and image metadata from a JSON Lines file "
+        "(see export_spare_parts). The file is streamed in chunks and upserted in bulk by slug / SKU."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSONL file (.jsonl or .jsonl.gz), or '-' for stdin")
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change, then roll back')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Apply the valid lines even when some lines are invalid')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Lines per bulk write')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def _progress(self, report):
+        parts = report['parts']
+        self.stdout.write(
+            f"  {report['lines']} lines, chunk {report['chunks']}: parts {parts['created']} created, "
+            f"{parts['updated']} updated, {parts['unchanged']} unchanged, {report['invalid']} invalid "
+            f"({report['seconds']:.1f}s)"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            report = import_catalog(
+                options['path'], dry_run=options['dry_run'], skip_invalid=options['skip_invalid'],
+                chunk_size=options['chunk_size'], on_progress=self._progress,
+            )
+        except CatalogFileError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+
+        for error in report['errors']:
+            self.stdout.write(self.style.ERROR(f"  line {error['line']}: {error['error']}"))
+        if report['invalid'] > len(report['errors']):
+            self.stdout.write(f"  ... {report['invalid'] - len(report['errors'])} more invalid lines")
+
+        counts = '; '.join(
+            f"{key} " + ', '.join(f"{n} {state}" for state, n in report[key].items())
+            for key in ('categories', 'brands', 'parts', 'fitments', 'images')
+        )
+        summary = (
+            f"{report['lines']} lines in {report['chunks']} chunks ({counts}), "
+            f"{report['duplicates']} duplicates, {report['invalid']} invalid "
+            f"({report['seconds']:.2f}s, {report['lines_per_second']:.0f} lines/s)"
+        )
+        if report['status'] == 'applied':
+            self.stdout.write(self.style.SUCCESS(f"Applied: {summary}"))
+        elif report['status'] == 'dry_run':
+            self.stdout.write(self.style.WARNING(f"Dry run, nothing written: {summary}"))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f"Rejected, nothing written: {summary}. Fix the lines above or rerun with --skip-invalid."
+            ))
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if report['status'] == 'rejected':
+            raise CommandError(f"{report['invalid']} invalid lines")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spare_parts', '0002_order_orderitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sparepartimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -78,6 +78,8 @@ class SparePart(models.Model):
 class SparePartImage(models.Model):
     spare_part = models.ForeignKey(SparePart, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='spare_parts/images/')
+    # Resized WebP copies of image, see repairmybike.image_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     alt_text = models.CharField(max_length=200, blank=True)
     is_primary = models.BooleanField(default=False)
     sort_order = models.IntegerField(default=0)
@@ -0,0 +1,297 @@
+"""
+Price and stock updates from supplier PDF price lists.
+
+Suppliers send their battery and part price lists as PDF tables. Parsing a
+page with pdfplumber is CPU-bound pure Python, so pages are split into
+batches of pages_per_task and extracted on a process pool. Workers only
+parse, never touch the database, and return the table rows of their pages.
+executor.map() keeps the page order, which lets a table that runs over
+several pages reuse the header row seen on an earlier page.
+
+Header cells are matched against COLUMN_ALIASES (SKU / part no, EAN /
+barcode, MRP, price, stock). Each row is matched to a SparePart by SKU,
+else by EAN, through dictionaries loaded with one query. The resulting
+mrp / sale_price / stock_qty changes are diffed against the current
+values. Applying re-reads the affected parts under select_for_update and
+writes only the fields that still differ, one bulk_update per set of
+changed fields. A row that matches no part, or whose numbers do not
+parse, is reported and skipped. When one part appears twice, the last row
+wins.
+"""
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGES_PER_TASK = 4
+MAX_REPORTED = 100
+# SparePart.mrp / sale_price are DecimalField(max_digits=10, decimal_places=2)
+MAX_PRICE = Decimal(10 ** 8)
+
+COLUMN_ALIASES = {
+    'sku': ('sku', 'part no', 'part number', 'part code', 'item code', 'code'),
+    'ean': ('ean', 'barcode', 'ean code', 'gtin'),
+    'mrp': ('mrp', 'list price', 'm.r.p'),
+    'sale_price': ('price', 'sale price', 'selling price', 'dealer price', 'net price', 'offer price', 'dp'),
+    'stock_qty': ('stock', 'qty', 'stock qty', 'quantity', 'available', 'available qty'),
+}
+PRICE_FIELDS = ('mrp', 'sale_price', 'stock_qty')
+
+TABLE_SETTINGS = {
+    # Ruled tables (cell borders drawn)
+    'lines': {'vertical_strategy': 'lines', 'horizontal_strategy': 'lines'},
+    # Tables laid out with whitespace only
+    'text': {'vertical_strategy': 'text', 'horizontal_strategy': 'text'},
+}
+
+_NUMBER = re.compile(r'-?\d[\d,]*(?:\.\d+)?')
+
+
+class PriceListError(ValueError):
+    """The PDF cannot be opened or has no recognisable price table."""
+
+
+def _normalize_header(value):
+    return re.sub(r'[\s_]+', ' ', str(value or '').replace('\n', ' ')).strip().lower().rstrip('.:')
+
+
+def header_map(row):
+    """{column: cell index} when row looks like a header with a key and a value column, else None."""
+    cells = [_normalize_header(c) for c in row]
+    found = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for index, cell in enumerate(cells):
+            if cell in aliases or any(cell.startswith(f'{alias} (') for alias in aliases):
+                found.setdefault(column, index)
+                break
+    has_key = 'sku' in found or 'ean' in found
+    has_value = any(field in found for field in PRICE_FIELDS)
+    return found if has_key and has_value else None
+
+
+def parse_number(value, integer=False):
+    """'₹ 3,200.00', 'Rs. 2999/-' -> Decimal('3200.00'); blank or '-' -> None. Raises ValueError when unreadable."""
+    text = str(value or '').strip()
+    if not text or text in ('-', '--', 'NA', 'N/A'):
+        return None
+    match = _NUMBER.search(text)
+    if not match:
+        raise ValueError(f"'{text}' is not a number")
+    number = match.group().replace(',', '')
+    if integer:
+        return int(Decimal(number))
+    try:
+        return Decimal(number).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"'{text}' is not a number")
+
+
+def extract_pages(path, page_numbers, strategy='lines'):
+    """Table rows of the given 1-based pages as [(page, [cells...]), ...]. Runs in a worker process."""
+    import pdfplumber
+
+    rows = []
+    with pdfplumber.open(path, pages=page_numbers) as pdf:
+        for page in pdf.pages:
+            for table in page.extract_tables(TABLE_SETTINGS[strategy]):
+                for cells in table:
+                    if any(cell not in (None, '') for cell in cells):
+                        rows.append((page.page_number, [str(c).strip() if c is not None else '' for c in cells]))
+            # pdfplumber caches layout objects per page
+            page.close()
+    return rows
+
+
+def page_count(path):
+    import pypdfium2
+
+    try:
+        pdf = pypdfium2.PdfDocument(path)
+    except pypdfium2.PdfiumError as e:
+        raise PriceListError(str(e))
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def iter_rows(path, total, workers=None, pages_per_task=DEFAULT_PAGES_PER_TASK, strategy='lines'):
+    """Yield (page, cells) for every table row of the first `total` pages, in page order, extracting on a process pool."""
+    batches = [list(range(start, min(start + pages_per_task, total + 1)))
+               for start in range(1, total + 1, pages_per_task)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(batches) or 1))
+    if workers == 1:
+        for batch in batches:
+            yield from extract_pages(path, batch, strategy)
+        return
+    # Forked children must not share this process's database sockets (a test transaction keeps its own)
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for rows in executor.map(extract_pages, [path] * len(batches), batches, [strategy] * len(batches)):
+            yield from rows
+
+
+def _key(value):
+    return re.sub(r'\s+', '', str(value or '')).upper()
+
+
+class PriceListImporter:
+    def __init__(self):
+        from .models import SparePart
+
+        self.by_sku, self.by_ean, self.current = {}, {}, {}
+        rows = SparePart.objects.values_list('id', 'sku', 'ean', 'in_stock', *PRICE_FIELDS)
+        for pk, sku, ean, in_stock, *values in rows:
+            self.by_sku[_key(sku)] = pk
+            if ean:
+                self.by_ean[_key(ean)] = pk
+            self.current[pk] = (sku, in_stock, dict(zip(PRICE_FIELDS, values)))
+        self.updates = {}
+        self.report = {
+            'pages': 0, 'rows': 0, 'headers': 0, 'matched': 0, 'unmatched': 0, 'invalid': 0,
+            'duplicates': 0, 'skipped': 0, 'unmatched_rows': [], 'errors': [],
+        }
+
+    def _note(self, key, page, cells, message=None):
+        self.report['unmatched' if key == 'unmatched_rows' else 'invalid'] += 1
+        if len(self.report[key]) < MAX_REPORTED:
+            entry = {'page': page, 'row': cells}
+            if message:
+                entry['error'] = message
+            self.report[key].append(entry)
+
+    def feed(self, rows):
+        """Consume (page, cells) rows; the last header seen applies until the next one."""
+        columns = None
+        for page, cells in rows:
+            header = header_map(cells)
+            if header:
+                columns = header
+                self.report['headers'] += 1
+                continue
+            if columns is None:
+                # Cover pages, notes, tables before the first price header
+                self.report['skipped'] += 1
+                continue
+            self.report['rows'] += 1
+            self._row(page, cells, columns)
+
+    def _row(self, page, cells, columns):
+        def cell(column):
+            index = columns.get(column)
+            return cells[index] if index is not None and index < len(cells) else ''
+
+        pk = self.by_sku.get(_key(cell('sku'))) if cell('sku') else None
+        if pk is None and cell('ean'):
+            pk = self.by_ean.get(_key(cell('ean')))
+        if pk is None:
+            self._note('unmatched_rows', page, cells)
+            return
+
+        values = {}
+        try:
+            for field in PRICE_FIELDS:
+                if field in columns:
+                    value = parse_number(cell(field), integer=field == 'stock_qty')
+                    if value is not None:
+                        if value < 0 or (field != 'stock_qty' and value >= MAX_PRICE):
+                            raise ValueError(f'{field} {value} out of range')
+                        values[field] = value
+        except ValueError as e:
+            self._note('errors', page, cells, str(e))
+            return
+        merged = {**self.current[pk][2], **self.updates.get(pk, {}), **values}
+        if merged['sale_price'] > merged['mrp']:
+            self._note('errors', page, cells, f"sale price {merged['sale_price']} above MRP {merged['mrp']}")
+            return
+
+        self.report['matched'] += 1
+        if pk in self.updates:
+            self.report['duplicates'] += 1
+        self.updates.setdefault(pk, {}).update(values)
+
+    def diff(self):
+        """[{'sku', 'id', 'changes': {field: [old, new]}}] for the parts whose values change."""
+        changes = []
+        for pk, values in self.updates.items():
+            sku, _in_stock, current = self.current[pk]
+            changed = {f: [current[f], v] for f, v in values.items() if current[f] != v}
+            if changed:
+                changes.append({'id': pk, 'sku': sku, 'changes': changed})
+        return sorted(changes, key=lambda c: c['sku'])
+
+    def apply(self, changes, batch_size=1000):
+        """Write the diff against freshly locked rows, only the fields that still differ. Returns the rows written."""
+        from .models import SparePart
+
+        now = timezone.now()
+        groups = defaultdict(list)
+        with transaction.atomic():
+            # The snapshot taken in __init__ may be minutes old by now (staff edits, orders taking stock)
+            fresh = {
+                pk: (in_stock, dict(zip(PRICE_FIELDS, values)))
+                for pk, in_stock, *values in SparePart.objects.select_for_update().filter(
+                    pk__in=[c['id'] for c in changes],
+                ).order_by().values_list('id', 'in_stock', *PRICE_FIELDS)
+            }
+            for change in changes:
+                if change['id'] not in fresh:
+                    continue
+                in_stock, current = fresh[change['id']]
+                values = {f: new for f, (_old, new) in change['changes'].items() if current[f] != new}
+                merged = {**current, **values}
+                if merged['sale_price'] > merged['mrp']:
+                    logger.warning(
+                        f"Price list: skipped {change['sku']}, sale price {merged['sale_price']} "
+                        f"above current MRP {merged['mrp']}"
+                    )
+                    continue
+                # A new stock figure also sets the in_stock flag the storefront filters on
+                if 'stock_qty' in values and (merged['stock_qty'] > 0) != in_stock:
+                    values['in_stock'] = merged['stock_qty'] > 0
+                if values:
+                    groups[tuple(sorted(values))].append(SparePart(pk=change['id'], updated_at=now, **values))
+            for fields, objs in groups.items():
+                SparePart.objects.bulk_update(objs, [*fields, 'updated_at'], batch_size=batch_size)
+        return sum(len(objs) for objs in groups.values())
+
+
+def import_price_pdf(path, dry_run=False, workers=None, pages_per_task=DEFAULT_PAGES_PER_TASK, strategy='lines'):
+    """Extract, match, diff and (unless dry_run) apply one supplier PDF. Returns the report with the diff."""
+    started = time.perf_counter()
+    total = page_count(path)
+    importer = PriceListImporter()
+    importer.feed(iter_rows(path, total, workers=workers, pages_per_task=pages_per_task, strategy=strategy))
+    report = importer.report
+    report['pages'] = total
+    if not report['headers']:
+        raise PriceListError(
+            'no price table header found (expected a SKU or EAN column next to MRP, price or stock)'
+        )
+    changes = importer.diff()
+    if not dry_run and changes:
+        importer.apply(changes)
+    elapsed = time.perf_counter() - started
+    report.update({
+        'status': 'dry_run' if dry_run else 'applied',
+        'changed': len(changes),
+        'unchanged': len(importer.updates) - len(changes),
+        'diff': changes,
+        'seconds': round(elapsed, 3),
+        'pages_per_second': round(report['pages'] / elapsed, 1) if elapsed else 0.0,
+    })
+    logger.info(
+        f"Price list {os.path.basename(path)}: {report['status']}, {report['pages']} pages, "
+        f"{report['matched']} matched, {report['changed']} changed, {report['unmatched']} unmatched"
+    )
+    return report
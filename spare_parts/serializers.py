@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from django.conf import settings
+from repairmybike.media_urls import MediaListSerializer, MediaUrlMixin
 from .models import (
     SparePartCategory,
     SparePartBrand,
@@ -13,109 +13,57 @@ from .models import (
 )
 
 
-class SparePartCategorySerializer(serializers.ModelSerializer):
+class SparePartCategorySerializer(MediaUrlMixin, serializers.ModelSerializer):
+    media_fields = ('image',)
     image = serializers.SerializerMethodField()
 
     class Meta:
         model = SparePartCategory
+        list_serializer_class = MediaListSerializer
         fields = ['id', 'name', 'slug', 'description', 'image', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-    def _abs_url(self, url: str):
-        if not url:
-            return None
-        if url.startswith('http://') or url.startswith('https://'):
-            return url
-        request = self.context.get('request') if hasattr(self, 'context') else None
-        if request:
-            try:
-                return request.build_absolute_uri(url)
-            except Exception:
-                pass
-        base = getattr(settings, 'MEDIA_URL', '/')
-        if base.startswith('http://') or base.startswith('https://'):
-            if url.startswith('/'):
-                return f"{base.rstrip('/')}{url}"
-            return f"{base.rstrip('/')}/{url}"
-        return url
-
     def get_image(self, obj):
-        try:
-            return self._abs_url(obj.image.url) if obj.image else None
-        except Exception:
-            return None
+        return self.media_url(obj.image)
 
 
-class SparePartBrandSerializer(serializers.ModelSerializer):
+class SparePartBrandSerializer(MediaUrlMixin, serializers.ModelSerializer):
+    media_fields = ('logo',)
     logo = serializers.SerializerMethodField()
 
     class Meta:
         model = SparePartBrand
+        list_serializer_class = MediaListSerializer
         fields = ['id', 'name', 'slug', 'logo', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-    def _abs_url(self, url: str):
-        if not url:
-            return None
-        if url.startswith('http://') or url.startswith('https://'):
-            return url
-        request = self.context.get('request') if hasattr(self, 'context') else None
-        if request:
-            try:
-                return request.build_absolute_uri(url)
-            except Exception:
-                pass
-        base = getattr(settings, 'MEDIA_URL', '/')
-        if base.startswith('http://') or base.startswith('https://'):
-            if url.startswith('/'):
-                return f"{base.rstrip('/')}{url}"
-            return f"{base.rstrip('/')}/{url}"
-        return url
-
     def get_logo(self, obj):
-        try:
-            return self._abs_url(obj.logo.url) if obj.logo else None
-        except Exception:
-            return None
+        return self.media_url(obj.logo)
 
 
-class SparePartImageSerializer(serializers.ModelSerializer):
+class SparePartImageSerializer(MediaUrlMixin, serializers.ModelSerializer):
+    media_fields = ('image',)
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = SparePartImage
-        fields = ['id', 'image', 'alt_text', 'is_primary', 'sort_order']
+        list_serializer_class = MediaListSerializer
+        fields = ['id', 'image', 'image_variants', 'alt_text', 'is_primary', 'sort_order']
         read_only_fields = ['id']
 
-    def _abs_url(self, url: str):
-        if not url:
-            return None
-        if url.startswith('http://') or url.startswith('https://'):
-            return url
-        request = self.context.get('request') if hasattr(self, 'context') else None
-        if request:
-            try:
-                return request.build_absolute_uri(url)
-            except Exception:
-                pass
-        base = getattr(settings, 'MEDIA_URL', '/')
-        if base.startswith('http://') or base.startswith('https://'):
-            if url.startswith('/'):
-                return f"{base.rstrip('/')}{url}"
-            return f"{base.rstrip('/')}/{url}"
-        return url
-
     def get_image(self, obj):
-        try:
-            return self._abs_url(obj.image.url) if obj.image else None
-        except Exception:
-            return None
+        return self.media_url(obj.image)
 
+    def get_image_variants(self, obj):
+        return self.media_variants(obj)
 
-class SparePartListSerializer(serializers.ModelSerializer):
+
+class SparePartListSerializer(MediaUrlMixin, serializers.ModelSerializer):
     brand_name = serializers.CharField(source='brand.name', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     thumbnail = serializers.SerializerMethodField()
+    thumbnail_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = SparePart
@@ -123,35 +71,22 @@ class SparePartListSerializer(serializers.ModelSerializer):
             'id', 'name', 'slug', 'sku', 'brand', 'brand_name', 'category', 'category_name',
             'short_description', 'mrp', 'sale_price', 'currency', 'in_stock', 'stock_qty',
             'warranty_months_total', 'warranty_free_months', 'warranty_pro_rata_months',
-            'rating_average', 'rating_count', 'thumbnail', 'created_at', 'updated_at'
+            'rating_average', 'rating_count', 'thumbnail', 'thumbnail_variants', 'created_at', 'updated_at'
         ]
 
-    def _abs_url(self, url: str):
-        if not url:
-            return None
-        if url.startswith('http://') or url.startswith('https://'):
-            return url
-        request = self.context.get('request') if hasattr(self, 'context') else None
-        if request:
-            try:
-                return request.build_absolute_uri(url)
-            except Exception:
-                pass
-        base = getattr(settings, 'MEDIA_URL', '/')
-        if base.startswith('http://') or base.startswith('https://'):
-            if url.startswith('/'):
-                return f"{base.rstrip('/')}{url}"
-            return f"{base.rstrip('/')}/{url}"
-        return url
+    def _thumbnail_image(self, obj):
+        # Prefer explicitly marked primary image; otherwise fall back to first by sort_order.
+        # Works from prefetched images when the view provides them.
+        images = sorted(obj.images.all(), key=lambda img: img.sort_order)
+        return next((img for img in images if img.is_primary), None) or (images[0] if images else None)
 
     def get_thumbnail(self, obj):
-        # Prefer explicitly marked primary image; otherwise fall back to first by sort_order
-        primary = obj.images.filter(is_primary=True).first()
-        candidate = primary or obj.images.order_by('sort_order').first() or obj.images.first()
-        try:
-            return self._abs_url(candidate.image.url) if candidate and candidate.image else None
-        except Exception:
-            return None
+        candidate = self._thumbnail_image(obj)
+        return self.media_url(candidate.image) if candidate else None
+
+    def get_thumbnail_variants(self, obj):
+        candidate = self._thumbnail_image(obj)
+        return self.media_variants(candidate) if candidate else {}
 
 
 class SparePartDetailSerializer(serializers.ModelSerializer):
@@ -172,7 +107,10 @@ class SparePartDetailSerializer(serializers.ModelSerializer):
 
     def get_fitments(self, obj):
         items = []
-        for f in obj.fitments.select_related('vehicle_model__vehicle_brand__vehicle_type').all():
+        fitments = obj.fitments.all()
+        if 'fitments' not in getattr(obj, '_prefetched_objects_cache', {}):
+            fitments = fitments.select_related('vehicle_model__vehicle_brand__vehicle_type')
+        for f in fitments:
             items.append({
                 'vehicle_model_id': f.vehicle_model.id,
                 'model': f.vehicle_model.name,
@@ -0,0 +1,283 @@
+import io
+import json
+import os
+import tempfile
+import threading
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import TestCase
+
+from spare_parts.catalog_io import export_catalog, import_catalog
+from spare_parts.image_fetch import BingImageSearch, ImageFetcher, build_session
+from spare_parts.price_pdf import PriceListImporter, import_price_pdf
+from spare_parts.models import (
+    SparePart,
+    SparePartBrand,
+    SparePartCategory,
+    SparePartFitment,
+    SparePartImage,
+)
+from vehicles.models import VehicleBrand, VehicleModel, VehicleType
+
+PNG_A = b'\x89PNG\r\n\x1a\n' + b'a' * 64
+PNG_B = b'\x89PNG\r\n\x1a\n' + b'b' * 64
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Search API + image host: P1 finds a, a copy of a and a flaky image; P2 finds a, b and a 404."""
+    results = {
+        'P1': ['/img/a.png', '/img/a-copy.png', '/img/flaky.png'],
+        'P2': ['/img/a.png', '/img/b.png', '/img/missing.png'],
+    }
+    bodies = {'/img/a.png': PNG_A, '/img/a-copy.png': PNG_A, '/img/b.png': PNG_B, '/img/flaky.png': PNG_B}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        server = self.server
+        with server.lock:
+            server.hits[url.path] = server.hits.get(url.path, 0) + 1
+            hits = server.hits[url.path]
+        if url.path == '/search':
+            query = parse_qs(url.query)['q'][0]
+            paths = next((paths for sku, paths in self.results.items() if sku in query), [])
+            body = json.dumps({'value': [{'contentUrl': server.base + p} for p in paths]}).encode()
+            return self._send(200, 'application/json', body)
+        if url.path == '/img/flaky.png' and hits == 1:
+            return self._send(503, 'text/plain', b'busy')
+        if url.path in self.bodies:
+            return self._send(200, 'image/png', self.bodies[url.path])
+        return self._send(404, 'text/plain', b'not found')
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageFetchTests(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        self.server.base = f'http://127.0.0.1:{self.server.server_port}'
+        self.server.hits, self.server.lock = {}, threading.Lock()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+
+        category = SparePartCategory.objects.create(name='Batteries', slug='batteries')
+        brand = SparePartBrand.objects.create(name='Exide', slug='exide')
+        self.parts = [
+            SparePart.objects.create(category=category, brand=brand, name=f'Battery {sku}', slug=sku.lower(),
+                                     sku=sku, mrp=100, sale_price=90)
+            for sku in ('P1', 'P2')
+        ]
+
+    def _fetch(self):
+        session = build_session(pool_size=4, retries=2, backoff=0)
+        fetcher = ImageFetcher(
+            BingImageSearch('key', session, endpoint=f'{self.server.base}/search'), session,
+            workers=4, count=3, storage=FileSystemStorage(location=self.media.name),
+        )
+        with session:
+            return fetcher.run(self.parts, '{brand} {name} {sku}')
+
+    def test_images_are_fetched_concurrently_and_stored_once_per_content(self):
+        stats = self._fetch()
+
+        self.assertEqual((stats['searched'], stats['downloaded'], stats['download_failed']), (2, 5, 1))
+        # a.png was found three times and flaky.png (same bytes as b.png) retried after a 503
+        self.assertEqual((stats['uploaded'], stats['deduplicated']), (2, 3))
+        self.assertEqual(self.server.hits['/img/flaky.png'], 2)
+        images = SparePartImage.objects.order_by('spare_part__sku', 'sort_order')
+        self.assertEqual(
+            [(i.spare_part.sku, i.sort_order, i.is_primary) for i in images],
+            [('P1', 0, True), ('P1', 1, False), ('P2', 0, True), ('P2', 1, False)],
+        )
+        self.assertEqual(len({i.image.name for i in images}), 2)
+
+        # A rerun reuses stored files and attaches nothing twice
+        again = self._fetch()
+        self.assertEqual((again['uploaded'], again['images_created']), (0, 0))
+        self.assertEqual(SparePartImage.objects.count(), 4)
+
+
+class CatalogJsonlTests(TestCase):
+    def setUp(self):
+        honda = VehicleBrand.objects.create(vehicle_type=VehicleType.objects.create(name='Scooter'), name='HONDA')
+        self.activa = VehicleModel.objects.create(vehicle_brand=honda, name='Activa 125')
+        self.dio = VehicleModel.objects.create(vehicle_brand=honda, name='Dio')
+        category = SparePartCategory.objects.create(name='Battery', slug='battery', description='Batteries')
+        brand = SparePartBrand.objects.create(name='Amaron', slug='amaron')
+        for n in range(5):
+            part = SparePart.objects.create(
+                category=category, brand=brand, name=f'Battery {n}', slug=f'battery-{n}', sku=f'B{n}',
+                mrp=Decimal('3200.00'), sale_price=Decimal('2999.50'), specs={'capacity_ah': n, 'voltage_v': 12},
+            )
+            SparePartFitment.objects.create(spare_part=part, vehicle_model=self.activa, notes='front')
+            SparePartImage.objects.create(spare_part=part, image=f'spare_parts/images/b{n}.png', is_primary=True)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _export(self, name):
+        path = os.path.join(self.tmp.name, name)
+        export_catalog(path, chunk_size=2)
+        return path
+
+    def _write(self, name, records):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as fh:
+            fh.writelines(json.dumps(r) + '\n' for r in records)
+        return path
+
+    def test_export_imports_back_unchanged(self):
+        path = self._export('catalog.jsonl.gz')
+        again = import_catalog(path, chunk_size=2)
+        self.assertEqual(again['status'], 'applied')
+        self.assertEqual(again['parts'], {'created': 0, 'updated': 0, 'unchanged': 5})
+        self.assertEqual(again['fitments']['created'] + again['images']['created'], 0)
+
+        with open(self._export('before.jsonl')) as fh:
+            before = fh.read()
+        SparePart.objects.all().delete()
+        SparePartBrand.objects.all().delete()
+        SparePartCategory.objects.all().delete()
+        call_command('import_spare_parts', path, '--chunk-size', '3', stdout=io.StringIO())
+        with open(self._export('after.jsonl')) as fh:
+            self.assertEqual(fh.read(), before)
+
+    def test_lines_update_replace_sets_and_invalid_lines_reject(self):
+        with open(self._export('catalog.jsonl')) as fh:
+            records = [json.loads(line) for line in fh]
+        part = records[2]
+        part.update(sale_price='2799.00', fitments=[{'vehicle_type': 'scooter', 'brand': 'Honda', 'model': 'DIO'}])
+        part['images'][0]['alt_text'] = 'Top view'
+        new = dict(part, sku='N1', slug='new-1', images=[])
+        del records[3]['fitments']
+        bad = [
+            dict(part, sku='X1', slug='x-1', brand='nobody'),
+            dict(part, sku='X2', slug='battery-0'),
+            {'type': 'part', 'sku': 'X3', 'name': 'No price', 'category': 'battery', 'brand': 'amaron'},
+        ]
+
+        rejected = import_catalog(self._write('bad.jsonl', records + [new] + bad), chunk_size=4)
+        self.assertEqual((rejected['status'], rejected['invalid']), ('rejected', 3))
+        self.assertEqual([e['line'] for e in rejected['errors']], [9, 10, 11])
+        self.assertIn("unknown brand 'nobody'", rejected['errors'][0]['error'])
+        self.assertIn("already belongs to SKU 'B0'", rejected['errors'][1]['error'])
+        self.assertFalse(SparePart.objects.filter(sku='N1').exists())
+
+        report = import_catalog(self._write('good.jsonl', records + [new] + bad), skip_invalid=True)
+        self.assertEqual(report['parts'], {'created': 1, 'updated': 1, 'unchanged': 4})
+        changed = SparePart.objects.get(sku='B0')
+        self.assertEqual(changed.sale_price, Decimal('2799.00'))
+        self.assertEqual(list(changed.fitments.values_list('vehicle_model', 'notes')), [(self.dio.pk, '')])
+        self.assertEqual(changed.images.get().alt_text, 'Top view')
+        self.assertEqual(SparePart.objects.get(sku='N1').images.count(), 0)
+        # No "fitments" key leaves the part's fitments alone
+        self.assertEqual(list(SparePart.objects.get(sku='B1').fitments.values_list('vehicle_model', flat=True)),
+                         [self.activa.pk])
+        # B0 swaps Activa for Dio; N1 copies its Dio fitment
+        self.assertEqual(report['fitments'], {'created': 2, 'updated': 0, 'deleted': 1})
+
+
+def _table_pdf(pages, widths=(90, 90, 80, 80, 60)):
+    """A minimal PDF with one ruled table per page; pages is a list of row lists."""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for rows in pages:
+        ops = ['0.5 w']
+        for r, row in enumerate(rows):
+            x, y = 40, 780 - r * 20
+            for width, text in zip(widths, row):
+                text = str(text).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+                ops += [f'{x} {y} {width} 20 re S', f'BT /F1 9 Tf {x + 3} {y + 6} Td ({text}) Tj ET']
+                x += width
+        stream = '\n'.join(ops)
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+    out, offsets = b'%PDF-1.4\n', []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return out
+
+
+class PriceListPdfTests(TestCase):
+    def setUp(self):
+        category = SparePartCategory.objects.create(name='Battery', slug='battery')
+        brand = SparePartBrand.objects.create(name='Amaron', slug='amaron')
+        for sku, ean in (('AP-BTZ4', '8901'), ('AP-BTZ5', '8902'), ('AP-ETZ9', None)):
+            SparePart.objects.create(category=category, brand=brand, name=sku, slug=sku.lower(), sku=sku, ean=ean,
+                                     mrp=Decimal('3200.00'), sale_price=Decimal('2999.00'), stock_qty=5)
+        header = ['Part No', 'EAN', 'MRP (Rs)', 'Dealer Price', 'Stock']
+        pages = [
+            [['Amaron price list, April'], header, ['ap-btz4', '', '3,400.00', 'Rs. 3,100/-', '12']],
+            # Continues the table without repeating the header
+            [['', '8902', '3200', '2999', '0'], ['AP-ETZ9', '', '3200', '2999', '5'], ['XX-1', '', '10', '9', '1']],
+            [header, ['AP-ETZ9', '', '100', '250', '1'], ['AP-BTZ4', '', 'call', '', '']],
+        ]
+        handle = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        with handle:
+            handle.write(_table_pdf(pages))
+        self.addCleanup(os.unlink, handle.name)
+        self.path = handle.name
+
+    def test_pages_are_extracted_in_parallel_matched_and_diffed(self):
+        preview = import_price_pdf(self.path, dry_run=True, workers=2, pages_per_task=1)
+        self.assertEqual(SparePart.objects.get(sku='AP-BTZ4').mrp, Decimal('3200.00'))
+        self.assertEqual((preview['pages'], preview['headers'], preview['rows']), (3, 2, 6))
+        self.assertEqual((preview['matched'], preview['unmatched'], preview['invalid']), (3, 1, 2))
+        self.assertEqual(preview['unchanged'], 1)
+        self.assertEqual(preview['diff'], [
+            {'id': SparePart.objects.get(sku='AP-BTZ4').pk, 'sku': 'AP-BTZ4', 'changes': {
+                'mrp': [Decimal('3200.00'), Decimal('3400.00')],
+                'sale_price': [Decimal('2999.00'), Decimal('3100.00')],
+                'stock_qty': [5, 12],
+            }},
+            {'id': SparePart.objects.get(sku='AP-BTZ5').pk, 'sku': 'AP-BTZ5', 'changes': {'stock_qty': [5, 0]}},
+        ])
+        self.assertIn('above MRP', preview['errors'][0]['error'])
+        self.assertIn('not a number', preview['errors'][1]['error'])
+
+        out = io.StringIO()
+        call_command('import_price_pdf', self.path, '--workers', '2', stdout=out)
+        self.assertIn('2 changed', out.getvalue())
+        matched = SparePart.objects.get(sku='AP-BTZ5')
+        self.assertEqual((matched.stock_qty, matched.in_stock), (0, False))
+        self.assertEqual(SparePart.objects.get(sku='AP-BTZ4').sale_price, Decimal('3100.00'))
+
+    def test_apply_rereads_rows_and_writes_only_changed_fields(self):
+        importer = PriceListImporter()
+        importer.feed([
+            (1, ['Part No', 'Dealer Price', 'Stock']), (1, ['AP-BTZ4', '3100', '0']), (1, ['AP-BTZ5', '2999', '7']),
+        ])
+        changes = importer.diff()
+
+        # Edited after the snapshot: an MRP change and a sale that took the last units
+        SparePart.objects.filter(sku='AP-BTZ4').update(mrp=Decimal('3500.00'))
+        SparePart.objects.filter(sku='AP-BTZ5').update(stock_qty=0, in_stock=False)
+
+        # Savepoint, locking read, one UPDATE per changed-field set, release
+        with self.assertNumQueries(5):
+            self.assertEqual(importer.apply(changes), 2)
+        btz4, btz5 = SparePart.objects.filter(sku__in=['AP-BTZ4', 'AP-BTZ5']).order_by('sku')
+        self.assertEqual((btz4.mrp, btz4.sale_price, btz4.stock_qty, btz4.in_stock),
+                         (Decimal('3500.00'), Decimal('3100.00'), 0, False))
+        self.assertEqual((btz5.stock_qty, btz5.in_stock), (7, True))
@@ -1,4 +1,6 @@
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -52,6 +54,17 @@ class SparePartViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = SparePart.objects.select_related('brand', 'category').all()
     serializer_class = SparePartDetailSerializer
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            qs = qs.prefetch_related('images')
+        if self.action == 'retrieve':
+            qs = qs.prefetch_related(Prefetch(
+                'fitments',
+                queryset=SparePartFitment.objects.select_related('vehicle_model__vehicle_brand__vehicle_type'),
+            ))
+        return qs
+
     def list(self, request, *args, **kwargs):
         q = request.query_params.get('q')
         category_id = request.query_params.get('category')
@@ -120,13 +133,17 @@ class CartViewSet(viewsets.ViewSet):
         cart, _ = Cart.objects.get_or_create(session_id=session_id, defaults={'user': user})
         return cart
 
+    def _cart_data(self, cart):
+        # One query for items and their parts instead of one per item (and again for total_amount)
+        prefetch_related_objects([cart], 'items__spare_part')
+        return CartSerializer(cart).data
+
     def list(self, request):
         session_id = request.query_params.get('session_id')
         if not session_id:
             return Response({'error': True, 'message': 'session_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         cart = self._get_or_create_cart(session_id, request.user if request.user and request.user.is_authenticated else None)
-        serializer = CartSerializer(cart)
-        return Response({'error': False, 'message': 'Cart retrieved successfully', 'data': serializer.data})
+        return Response({'error': False, 'message': 'Cart retrieved successfully', 'data': self._cart_data(cart)})
 
     @action(detail=False, methods=['post'])
     def add(self, request):
@@ -152,8 +169,7 @@ class CartViewSet(viewsets.ViewSet):
             item.unit_price = part.sale_price
             item.save()
 
-        cart_serializer = CartSerializer(cart)
-        return Response({'error': False, 'message': 'Item added to cart', 'data': cart_serializer.data}, status=status.HTTP_201_CREATED)
+        return Response({'error': False, 'message': 'Item added to cart', 'data': self._cart_data(cart)}, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['patch'])
     def update_item(self, request):
@@ -169,8 +185,7 @@ class CartViewSet(viewsets.ViewSet):
             return Response({'error': True, 'message': 'Cart item not found'}, status=status.HTTP_404_NOT_FOUND)
         item.quantity = int(quantity)
         item.save()
-        cart_serializer = CartSerializer(cart)
-        return Response({'error': False, 'message': 'Cart item updated', 'data': cart_serializer.data})
+        return Response({'error': False, 'message': 'Cart item updated', 'data': self._cart_data(cart)})
 
     @action(detail=False, methods=['delete'])
     def remove_item(self, request):
@@ -180,8 +195,7 @@ class CartViewSet(viewsets.ViewSet):
             return Response({'error': True, 'message': 'session_id and item_id are required'}, status=status.HTTP_400_BAD_REQUEST)
         cart = self._get_or_create_cart(session_id)
         deleted, _ = cart.items.filter(id=item_id).delete()
-        cart_serializer = CartSerializer(cart)
-        return Response({'error': False, 'message': 'Item removed' if deleted else 'Item not found', 'data': cart_serializer.data})
+        return Response({'error': False, 'message': 'Item removed' if deleted else 'Item not found', 'data': self._cart_data(cart)})
 
     @action(detail=False, methods=['delete'])
     def clear(self, request):
@@ -190,8 +204,7 @@ class CartViewSet(viewsets.ViewSet):
             return Response({'error': True, 'message': 'session_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         cart = self._get_or_create_cart(session_id)
         cart.items.all().delete()
-        cart_serializer = CartSerializer(cart)
-        return Response({'error': False, 'message': 'Cart cleared', 'data': cart_serializer.data})
+        return Response({'error': False, 'message': 'Cart cleared', 'data': self._cart_data(cart)})
 
     @action(detail=False, methods=['post'])
     def checkout(self, request):
@@ -203,45 +216,59 @@ class CartViewSet(viewsets.ViewSet):
         address = serializer.validated_data['address']
 
         cart = self._get_or_create_cart(session_id, request.user if request.user and request.user.is_authenticated else None)
-        items = list(cart.items.select_related('spare_part'))
-        if not items:
-            return Response({'error': True, 'message': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
-
-        amount_total = 0
-        for item in items:
-            part = item.spare_part
-            if not part.active or not part.in_stock or part.stock_qty < item.quantity:
-                return Response({'error': True, 'message': 'Insufficient stock for one or more items'}, status=status.HTTP_400_BAD_REQUEST)
-            amount_total += item.unit_price * item.quantity
-
-        order = Order.objects.create(
-            session_id=session_id,
-            user=request.user if request.user and request.user.is_authenticated else None,
-            customer_name=customer_name,
-            phone=phone,
-            address=address,
-            amount_total=amount_total,
-            currency='INR',
-            payment_method='cash',
-            payment_status='cash_due',
-            status='created',
-        )
-
-        for item in items:
-            OrderItem.objects.create(
-                order=order,
-                spare_part=item.spare_part,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
+        with transaction.atomic():
+            items = list(cart.items.all())
+            if not items:
+                return Response({'error': True, 'message': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Lock the parts in id order so overlapping checkouts queue instead of
+            # deadlocking, and check stock against the locked rows
+            locked = SparePart.objects.select_for_update().filter(
+                id__in={item.spare_part_id for item in items}
+            ).order_by('id').in_bulk()
+
+            amount_total = 0
+            for item in items:
+                part = item.spare_part = locked[item.spare_part_id]
+                if not part.active or not part.in_stock or part.stock_qty < item.quantity:
+                    return Response({'error': True, 'message': 'Insufficient stock for one or more items'}, status=status.HTTP_400_BAD_REQUEST)
+                amount_total += item.unit_price * item.quantity
+
+            order = Order.objects.create(
+                session_id=session_id,
+                user=request.user if request.user and request.user.is_authenticated else None,
+                customer_name=customer_name,
+                phone=phone,
+                address=address,
+                amount_total=amount_total,
+                currency='INR',
+                payment_method='cash',
+                payment_status='cash_due',
+                status='created',
             )
-            item.spare_part.stock_qty -= item.quantity
-            if item.spare_part.stock_qty <= 0:
-                item.spare_part.in_stock = False
-                item.spare_part.stock_qty = 0
-            item.spare_part.save(update_fields=['stock_qty', 'in_stock', 'updated_at'])
-
-        cart.items.all().delete()
 
+            order_items = []
+            parts = []
+            for item in items:
+                order_items.append(OrderItem(
+                    order=order,
+                    spare_part=item.spare_part,
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                ))
+                part = item.spare_part
+                part.stock_qty -= item.quantity
+                if part.stock_qty <= 0:
+                    part.in_stock = False
+                    part.stock_qty = 0
+                part.updated_at = timezone.now()
+                parts.append(part)
+            OrderItem.objects.bulk_create(order_items)
+            SparePart.objects.bulk_update(parts, ['stock_qty', 'in_stock', 'updated_at'])
+
+            cart.items.all().delete()
+
+        prefetch_related_objects([order], 'items__spare_part')
         order_serializer = OrderSerializer(order)
         return Response({'error': False, 'message': 'Checkout successful. Pay cash on delivery.', 'data': order_serializer.data}, status=status.HTTP_201_CREATED)
 
@@ -256,47 +283,49 @@ class CartViewSet(viewsets.ViewSet):
         phone = serializer.validated_data['phone']
         address = serializer.validated_data['address']
 
-        try:
-            part = SparePart.objects.get(id=spare_part_id, active=True)
-        except SparePart.DoesNotExist:
-            return Response({'error': True, 'message': 'Spare part not found'}, status=status.HTTP_404_NOT_FOUND)
-
-        if not part.in_stock or part.stock_qty < quantity:
-            return Response({'error': True, 'message': 'Insufficient stock'}, status=status.HTTP_400_BAD_REQUEST)
-
-        amount_total = part.sale_price * quantity
-        order = Order.objects.create(
-            session_id=session_id,
-            user=request.user if request.user and request.user.is_authenticated else None,
-            customer_name=customer_name,
-            phone=phone,
-            address=address,
-            amount_total=amount_total,
-            currency='INR',
-            payment_method='cash',
-            payment_status='cash_due',
-            status='created',
-        )
+        with transaction.atomic():
+            try:
+                part = SparePart.objects.select_for_update().get(id=spare_part_id, active=True)
+            except SparePart.DoesNotExist:
+                return Response({'error': True, 'message': 'Spare part not found'}, status=status.HTTP_404_NOT_FOUND)
+
+            if not part.in_stock or part.stock_qty < quantity:
+                return Response({'error': True, 'message': 'Insufficient stock'}, status=status.HTTP_400_BAD_REQUEST)
+
+            amount_total = part.sale_price * quantity
+            order = Order.objects.create(
+                session_id=session_id,
+                user=request.user if request.user and request.user.is_authenticated else None,
+                customer_name=customer_name,
+                phone=phone,
+                address=address,
+                amount_total=amount_total,
+                currency='INR',
+                payment_method='cash',
+                payment_status='cash_due',
+                status='created',
+            )
 
-        OrderItem.objects.create(
-            order=order,
-            spare_part=part,
-            quantity=quantity,
-            unit_price=part.sale_price,
-        )
+            OrderItem.objects.create(
+                order=order,
+                spare_part=part,
+                quantity=quantity,
+                unit_price=part.sale_price,
+            )
 
-        part.stock_qty -= quantity
-        if part.stock_qty <= 0:
-            part.in_stock = False
-            part.stock_qty = 0
-        part.save(update_fields=['stock_qty', 'in_stock', 'updated_at'])
+            part.stock_qty -= quantity
+            if part.stock_qty <= 0:
+                part.in_stock = False
+                part.stock_qty = 0
+            part.save(update_fields=['stock_qty', 'in_stock', 'updated_at'])
 
+        prefetch_related_objects([order], 'items__spare_part')
         order_serializer = OrderSerializer(order)
         return Response({'error': False, 'message': 'Order created. Pay cash on delivery.', 'data': order_serializer.data}, status=status.HTTP_201_CREATED)
 
 
 class OrderViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Order.objects.all()
+    queryset = Order.objects.prefetch_related('items__spare_part')
     serializer_class = OrderSerializer
 
     def list(self, request, *args, **kwargs):
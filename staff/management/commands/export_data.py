@@ -0,0 +1,57 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from repairmybike import exports
+
+
+class Command(BaseCommand):
+    help = (
+        "Export bookings, orders or subscriptions to CSV or XLSX. Rows are streamed in chunks, "
+        "so memory stays flat however many rows there are."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('--format', dest='file_format', choices=sorted(exports.FORMATS),
+                            help='Output format (default: from the --output suffix, else csv)')
+        parser.add_argument('--output', help="File to write; '-' or omitted writes CSV to stdout")
+        parser.add_argument('--status', help='Only rows with this status')
+        parser.add_argument('--date-from', help='First date to include (YYYY-MM-DD)')
+        parser.add_argument('--date-to', help='Last date to include (YYYY-MM-DD)')
+        parser.add_argument('--chunk-size', type=int, default=exports.DEFAULT_CHUNK_SIZE, help='Rows per database fetch')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        to_stdout = output in (None, '-')
+        file_format = options['file_format']
+        if not file_format:
+            file_format = 'xlsx' if output and output.lower().endswith('.xlsx') else 'csv'
+        if to_stdout and file_format != 'csv':
+            raise CommandError('XLSX needs --output FILE')
+
+        started = time.perf_counter()
+        try:
+            stream = exports.stream(
+                options['dataset'], file_format, chunk_size=options['chunk_size'],
+                status=options['status'], date_from=options['date_from'], date_to=options['date_to'],
+            )
+        except exports.ExportError as e:
+            raise CommandError(str(e))
+
+        size = 0
+        fh = sys.stdout.buffer if to_stdout else open(output, 'wb')
+        try:
+            for chunk in stream:
+                fh.write(chunk)
+                size += len(chunk)
+        finally:
+            if to_stdout:
+                fh.flush()
+            else:
+                fh.close()
+        if not to_stdout:
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {size / 1024:.1f} KB to {output} in {time.perf_counter() - started:.1f}s"
+            ))
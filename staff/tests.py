@@ -1,3 +1,107 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import os
+import tempfile
+from decimal import Decimal
 
-# Create your tests here.
+import openpyxl
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from bookings.models import Booking, BookingService, Customer
+from services.models import Service, ServiceCategory
+from vehicles.models import VehicleBrand, VehicleModel, VehicleType
+
+
+class StaffExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        brand = VehicleBrand.objects.create(vehicle_type=VehicleType.objects.create(name='Bike'), name='Honda')
+        model = VehicleModel.objects.create(vehicle_brand=brand, name='Shine')
+        category = ServiceCategory.objects.create(name='General')
+        services = [Service.objects.create(service_category=category, name=n) for n in ('Oil change', 'Brakes')]
+        customer = Customer.objects.create(name='Asha Rāo', phone='+919876543210')
+        for day in range(1, 6):
+            booking = Booking.objects.create(
+                customer=customer, vehicle_model=model, service_location='shop',
+                appointment_date=datetime.date(2026, 3, day), appointment_time=datetime.time(10, 30),
+                total_amount=Decimal('650.50'), booking_status='completed' if day % 2 else 'pending',
+            )
+            for service in services:
+                BookingService.objects.create(booking=booking, service=service, price=Decimal('325.25'))
+        cls.staff = get_user_model().objects.create_user(
+            username='staff', email='staff@example.com', password='pw', is_staff=True,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_csv_streams_flat_rows_with_filters(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(
+                '/api/staff/exports/bookings/', {'status': 'completed', 'date_from': '2026-03-02'},
+            )
+            self.assertTrue(response.streaming)
+            body = b''.join(response.streaming_content).decode('utf-8-sig')
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([r['appointment_date'] for r in rows], ['2026-03-03', '2026-03-05'])
+        self.assertEqual(rows[0]['customer_name'], 'Asha Rāo')
+        self.assertEqual(rows[0]['services'], 'Oil change; Brakes')
+        self.assertEqual(rows[0]['total_amount'], '650.50')
+        self.assertIn('attachment; filename="bookings-', response['Content-Disposition'])
+        # The row-cap count, one query for the rows and one for the services of the chunk, not one per booking
+        self.assertLessEqual(len([q for q in captured if 'booking' in q['sql'].lower()]), 3)
+
+    def test_xlsx_export_and_command(self):
+        response = self.client.get('/api/staff/exports/bookings/', {'file_type': 'xlsx'})
+        sheet = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True).active
+        values = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(len(values), 6)
+        self.assertEqual(values[1][values[0].index('total_amount')], 650.5)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bookings.csv')
+            call_command('export_data', 'bookings', '--output', path, '--chunk-size', '2', stdout=io.StringIO())
+            with open(path, encoding='utf-8-sig') as fh:
+                self.assertEqual(len(list(csv.DictReader(fh))), 5)
+
+    def test_formula_text_is_exported_as_plain_text(self):
+        payload = '=HYPERLINK("http://x","y")'
+        Booking.objects.filter(appointment_date=datetime.date(2026, 3, 1)).update(
+            customer=Customer.objects.create(name=payload, phone='+919800000000'),
+        )
+
+        response = self.client.get('/api/staff/exports/bookings/', {'date_to': '2026-03-01'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(rows[0]['customer_name'], f"'{payload}")
+        self.assertEqual(rows[0]['customer_phone'], '+919800000000')
+
+        response = self.client.get('/api/staff/exports/bookings/', {'date_to': '2026-03-01', 'file_type': 'xlsx'})
+        sheet = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        cell = sheet.cell(row=2, column=[c.value for c in sheet[1]].index('customer_name') + 1)
+        self.assertEqual(cell.data_type, 's')
+        self.assertEqual(cell.value, payload)
+
+    @override_settings(EXPORT_HTTP_MAX_ROWS={'csv': 5, 'xlsx': 4})
+    def test_downloads_over_the_row_cap_are_refused(self):
+        self.assertEqual(self.client.get('/api/staff/exports/bookings/').status_code, 200)
+        response = self.client.get('/api/staff/exports/bookings/', {'file_type': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('export_data bookings', response.data['message'])
+        narrowed = self.client.get('/api/staff/exports/bookings/', {'file_type': 'xlsx', 'status': 'pending'})
+        self.assertEqual(narrowed.status_code, 200)
+
+    def test_rejects_non_staff_and_bad_parameters(self):
+        self.assertEqual(self.client.get('/api/staff/exports/payments/').status_code, 400)
+        self.assertEqual(self.client.get('/api/staff/exports/orders/', {'date_to': '03/2026'}).status_code, 400)
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='customer', email='customer@example.com', password='pw',
+        ))
+        self.assertEqual(self.client.get('/api/staff/exports/orders/').status_code, 403)
@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import StaffBookingViewSet
+from .views import StaffBookingViewSet, StaffExportView, StaffUploadFinalizeView, StaffUploadView
 
 router = DefaultRouter()
 router.register(r'bookings', StaffBookingViewSet, basename='staff-booking')
 
 urlpatterns = [
+    path('exports/<str:dataset>/', StaffExportView.as_view(), name='staff-export'),
+    path('uploads/', StaffUploadView.as_view(), name='staff-upload'),
+    path('uploads/finalize/', StaffUploadFinalizeView.as_view(), name='staff-upload-finalize'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,10 +1,17 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.db.models import Q
+from rest_framework.views import APIView
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
 from bookings.models import Booking
 from bookings.serializers import BookingDetailSerializer
 from rest_framework import permissions
+from repairmybike import direct_uploads, exports
+from repairmybike.media_urls import media_url
+from repairmybike.transactions import NonAtomicRequestsMixin
 from .permissions import IsStaffAuthenticated
 
 
@@ -13,10 +20,7 @@ class StaffBookingViewSet(viewsets.ReadOnlyModelViewSet):
     Staff endpoints to manage bookings
     """
     permission_classes = [permissions.IsAuthenticated, IsStaffAuthenticated]
-    queryset = Booking.objects.select_related(
-        'customer',
-        'vehicle_model__vehicle_brand__vehicle_type'
-    ).prefetch_related('booking_services__service__service_category').all()
+    queryset = Booking.objects.with_details()
     serializer_class = BookingDetailSerializer
     
     def list(self, request, *args, **kwargs):
@@ -53,7 +57,7 @@ class StaffBookingViewSet(viewsets.ReadOnlyModelViewSet):
             'error': False,
             'message': 'Bookings retrieved successfully',
             'data': serializer.data,
-            'count': queryset.count()
+            'count': len(serializer.data)
         })
     
     def retrieve(self, request, *args, **kwargs):
@@ -70,6 +74,7 @@ class StaffBookingViewSet(viewsets.ReadOnlyModelViewSet):
         })
     
     @action(detail=True, methods=['patch'], url_path='update-status')
+    @transaction.atomic
     def update_status(self, request, pk=None):
         """
         Update booking status
@@ -91,13 +96,18 @@ class StaffBookingViewSet(viewsets.ReadOnlyModelViewSet):
                 'message': f'Invalid status. Valid options: {", ".join(valid_statuses)}'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Lock the row so two concurrent completions cannot both consume a
+        # subscription visit (see bookings.signals)
+        booking.subscription_visit_consumed = (
+            Booking.objects.select_for_update().values_list('subscription_visit_consumed', flat=True).get(pk=booking.pk)
+        )
         booking.booking_status = new_status
         
         # If completed, mark payment as completed (for cash payments)
         if new_status == 'completed' and booking.payment_method == 'cash':
             booking.payment_status = 'completed'
         
-        booking.save()
+        booking.save(update_fields=['booking_status', 'payment_status', 'updated_at'])
         
         serializer = self.get_serializer(booking)
         
@@ -112,34 +122,125 @@ class StaffBookingViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Get booking statistics
         """
-        queryset = self.get_queryset()
-        
-        total_bookings = queryset.count()
-        pending = queryset.filter(booking_status='pending').count()
-        confirmed = queryset.filter(booking_status='confirmed').count()
-        in_progress = queryset.filter(booking_status='in_progress').count()
-        completed = queryset.filter(booking_status='completed').count()
-        cancelled = queryset.filter(booking_status='cancelled').count()
-        
-        # Payment stats
-        payment_pending = queryset.filter(payment_status='pending').count()
-        payment_completed = queryset.filter(payment_status='completed').count()
+        # One aggregate query instead of a COUNT per status
+        stats = Booking.objects.aggregate(
+            total_bookings=Count('id'),
+            pending=Count('id', filter=Q(booking_status='pending')),
+            confirmed=Count('id', filter=Q(booking_status='confirmed')),
+            in_progress=Count('id', filter=Q(booking_status='in_progress')),
+            completed=Count('id', filter=Q(booking_status='completed')),
+            cancelled=Count('id', filter=Q(booking_status='cancelled')),
+            payment_pending=Count('id', filter=Q(payment_status='pending')),
+            payment_completed=Count('id', filter=Q(payment_status='completed')),
+        )
         
         return Response({
             'error': False,
             'message': 'Statistics retrieved successfully',
             'data': {
-                'total_bookings': total_bookings,
+                'total_bookings': stats['total_bookings'],
                 'booking_status': {
-                    'pending': pending,
-                    'confirmed': confirmed,
-                    'in_progress': in_progress,
-                    'completed': completed,
-                    'cancelled': cancelled
+                    'pending': stats['pending'],
+                    'confirmed': stats['confirmed'],
+                    'in_progress': stats['in_progress'],
+                    'completed': stats['completed'],
+                    'cancelled': stats['cancelled']
                 },
                 'payment_status': {
-                    'pending': payment_pending,
-                    'completed': payment_completed
+                    'pending': stats['payment_pending'],
+                    'completed': stats['payment_completed']
                 }
             }
-        })
\ No newline at end of file
+        })
+
+
+class StaffExportView(NonAtomicRequestsMixin, APIView):
+    """
+    Stream a dataset (bookings, orders, subscriptions) as a file download.
+    Query params: file_type (csv | xlsx, default csv), status, date_from, date_to (YYYY-MM-DD)
+    Rows are read in chunks and written as they are read, in constant memory. Exports over
+    EXPORT_HTTP_MAX_ROWS[file_type] are refused (400); `manage.py export_data` has no limit.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsStaffAuthenticated]
+
+    def get(self, request, dataset):
+        file_type = request.query_params.get('file_type', 'csv')
+        try:
+            stream = exports.stream(
+                dataset, file_type,
+                max_rows=settings.EXPORT_HTTP_MAX_ROWS.get(file_type),
+                status=request.query_params.get('status'),
+                date_from=request.query_params.get('date_from'),
+                date_to=request.query_params.get('date_to'),
+            )
+        except exports.ExportError as e:
+            return Response({
+                'error': True,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(stream, content_type=exports.FORMATS[file_type])
+        response['Content-Disposition'] = f'attachment; filename="{exports.filename(dataset, file_type)}"'
+        # Keep proxies from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class StaffUploadView(APIView):
+    """
+    Start a direct-to-storage image upload (S3/R2 media backend only).
+    Body: target (vehicle-type, vehicle-brand, vehicle-model, service, spare-part-category,
+    spare-part-brand, spare-part-image), filename, content_type, size (bytes).
+    PUT the file to data.upload_url with data.headers, then call finalize with data.upload_token.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsStaffAuthenticated]
+
+    def post(self, request):
+        try:
+            data = direct_uploads.presign(
+                request.data.get('target'), request.data.get('filename'),
+                request.data.get('content_type'), request.data.get('size'), request.user.pk,
+            )
+        except direct_uploads.UploadError as e:
+            return Response({
+                'error': True,
+                'message': str(e)
+            }, status=e.status)
+
+        return Response({
+            'error': False,
+            'message': 'Upload URL issued',
+            'data': data
+        }, status=status.HTTP_201_CREATED)
+
+
+class StaffUploadFinalizeView(APIView):
+    """
+    Register an uploaded image on its model row.
+    Body: upload_token, object_id (the row to update; the spare part for spare-part-image),
+    and for spare-part-image optionally alt_text, is_primary, sort_order.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsStaffAuthenticated]
+
+    def post(self, request):
+        try:
+            instance, field = direct_uploads.finalize(
+                request.data.get('upload_token'), request.data.get('object_id'), request.user.pk,
+                extra=request.data,
+            )
+        except direct_uploads.UploadError as e:
+            return Response({
+                'error': True,
+                'message': str(e)
+            }, status=e.status)
+
+        file = getattr(instance, field)
+        return Response({
+            'error': False,
+            'message': 'Upload registered',
+            'data': {
+                'id': instance.pk,
+                'name': file.name,
+                'url': media_url(file, request),
+            }
+        })
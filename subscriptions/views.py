@@ -48,7 +48,7 @@ class PlanViewSet(viewsets.ModelViewSet):
 
 
 class SubscriptionViewSet(viewsets.ModelViewSet):
-    queryset = Subscription.objects.all().order_by("-created_at")
+    queryset = Subscription.objects.select_related("plan").order_by("-created_at")
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [filters.SearchFilter]
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class VehiclesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vehicles'
+
+    def ready(self):
+        from repairmybike.image_variants import track
+
+        track(self.get_model('VehicleBrand'), 'image')
+        track(self.get_model('VehicleModel'), 'image')
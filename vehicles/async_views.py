@@ -0,0 +1,73 @@
+"""
+Async GET handlers for the vehicle catalog lists, used when ASYNC_VIEWS is
+on (see urls.py). They return the same payloads and share the cache keys
+of the sync viewsets, but read the cache and the database with the async
+APIs so a uvicorn worker keeps serving other requests while waiting.
+"""
+from django.core.cache import cache
+from django.http import JsonResponse
+
+from repairmybike import catalog_cache
+from repairmybike.offload import aserialize
+
+from .models import VehicleType, VehicleBrand, VehicleModel
+from .serializers import VehicleTypeSerializer, VehicleBrandSerializer, VehicleModelSerializer
+
+
+def _missing_param(name):
+    return JsonResponse({
+        'error': True,
+        'message': f'{name} query parameter is required'
+    }, status=400)
+
+
+async def vehicle_type_list(request):
+    cache_key = catalog_cache.VEHICLE_TYPES_KEY
+    data = await cache.aget(cache_key)
+    if not data:
+        data = await aserialize(VehicleTypeSerializer, VehicleType.objects.all(), request)
+        # Cache for 1 hour
+        await cache.aset(cache_key, data, catalog_cache.CATALOG_TIMEOUT)
+    return JsonResponse({
+        'error': False,
+        'message': 'Vehicle types retrieved successfully',
+        'data': data
+    })
+
+
+async def vehicle_brand_list(request):
+    vehicle_type_id = request.GET.get('vehicle_type')
+    if not vehicle_type_id:
+        return _missing_param('vehicle_type')
+
+    cache_key = catalog_cache.vehicle_brands_key(vehicle_type_id)
+    data = await cache.aget(cache_key)
+    if not data:
+        queryset = VehicleBrand.objects.select_related('vehicle_type').filter(vehicle_type_id=vehicle_type_id)
+        data = await aserialize(VehicleBrandSerializer, queryset, request)
+        # Cache for 1 hour
+        await cache.aset(cache_key, data, catalog_cache.CATALOG_TIMEOUT)
+    return JsonResponse({
+        'error': False,
+        'message': 'Vehicle brands retrieved successfully',
+        'data': data
+    })
+
+
+async def vehicle_model_list(request):
+    vehicle_brand_id = request.GET.get('vehicle_brand')
+    if not vehicle_brand_id:
+        return _missing_param('vehicle_brand')
+
+    cache_key = catalog_cache.vehicle_models_key(vehicle_brand_id)
+    data = await cache.aget(cache_key)
+    if not data:
+        queryset = VehicleModel.objects.select_related('vehicle_brand__vehicle_type').filter(vehicle_brand_id=vehicle_brand_id)
+        data = await aserialize(VehicleModelSerializer, queryset, request)
+        # Cache for 1 hour
+        await cache.aset(cache_key, data, catalog_cache.CATALOG_TIMEOUT)
+    return JsonResponse({
+        'error': False,
+        'message': 'Vehicle models retrieved successfully',
+        'data': data
+    })
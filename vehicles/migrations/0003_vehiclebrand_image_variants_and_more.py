@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0002_vehiclebrand_image_vehiclemodel_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiclebrand',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vehiclemodel',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
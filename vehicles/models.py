@@ -18,6 +18,8 @@ class VehicleBrand(models.Model):
     vehicle_type = models.ForeignKey(VehicleType, on_delete=models.CASCADE, related_name='brands')
     name = models.CharField(max_length=100)
     image = models.ImageField(upload_to='vehicle_brands/', blank=True, null=True)  # ✅ added
+    # Resized WebP copies of image, see repairmybike.image_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -34,6 +36,8 @@ class VehicleModel(models.Model):
     vehicle_brand = models.ForeignKey(VehicleBrand, on_delete=models.CASCADE, related_name='models')
     name = models.CharField(max_length=100)
     image = models.ImageField(upload_to='vehicle_models/', blank=True, null=True)  # ✅ added
+    # Resized WebP copies of image, see repairmybike.image_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
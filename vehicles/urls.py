@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from repairmybike.offload import async_get
+from . import async_views
 from .views import VehicleTypeViewSet, VehicleBrandViewSet, VehicleModelViewSet
 
 router = DefaultRouter()
@@ -9,4 +12,18 @@ router.register(r'vehicle-models', VehicleModelViewSet, basename='vehicle-model'
 
 urlpatterns = [
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
+
+if settings.ASYNC_VIEWS:
+    # Async list endpoints take precedence over the router's sync ones
+    urlpatterns = [
+        path('vehicle-types/', async_get(
+            async_views.vehicle_type_list, VehicleTypeViewSet.as_view({'get': 'list'})
+        ), name='vehicle-type-list'),
+        path('vehicle-brands/', async_get(
+            async_views.vehicle_brand_list, VehicleBrandViewSet.as_view({'get': 'list'})
+        ), name='vehicle-brand-list'),
+        path('vehicle-models/', async_get(
+            async_views.vehicle_model_list, VehicleModelViewSet.as_view({'get': 'list'})
+        ), name='vehicle-model-list'),
+    ] + urlpatterns
@@ -1,6 +1,7 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from django.core.cache import cache
+from repairmybike import catalog_cache
 from .models import VehicleType, VehicleBrand, VehicleModel
 from .serializers import VehicleTypeSerializer, VehicleBrandSerializer, VehicleModelSerializer
 
@@ -10,7 +11,7 @@ class VehicleTypeViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = VehicleTypeSerializer
     
     def list(self, request, *args, **kwargs):
-        cache_key = 'vehicle_types_list'
+        cache_key = catalog_cache.VEHICLE_TYPES_KEY
         cached_data = cache.get(cache_key)
         
         if cached_data:
@@ -24,7 +25,7 @@ class VehicleTypeViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         
         # Cache for 1 hour
-        cache.set(cache_key, serializer.data, 3600)
+        cache.set(cache_key, serializer.data, catalog_cache.CATALOG_TIMEOUT)
         
         return Response({
             'error': False,
@@ -47,7 +48,7 @@ class VehicleBrandViewSet(viewsets.ReadOnlyModelViewSet):
                 'message': 'vehicle_type query parameter is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        cache_key = f'vehicle_brands_type_{vehicle_type_id}'
+        cache_key = catalog_cache.vehicle_brands_key(vehicle_type_id)
         cached_data = cache.get(cache_key)
         
         if cached_data:
@@ -61,7 +62,7 @@ class VehicleBrandViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         
         # Cache for 1 hour
-        cache.set(cache_key, serializer.data, 3600)
+        cache.set(cache_key, serializer.data, catalog_cache.CATALOG_TIMEOUT)
         
         return Response({
             'error': False,
@@ -84,7 +85,7 @@ class VehicleModelViewSet(viewsets.ReadOnlyModelViewSet):
                 'message': 'vehicle_brand query parameter is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        cache_key = f'vehicle_models_brand_{vehicle_brand_id}'
+        cache_key = catalog_cache.vehicle_models_key(vehicle_brand_id)
         cached_data = cache.get(cache_key)
         
         if cached_data:
@@ -98,7 +99,7 @@ class VehicleModelViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         
         # Cache for 1 hour
-        cache.set(cache_key, serializer.data, 3600)
+        cache.set(cache_key, serializer.data, catalog_cache.CATALOG_TIMEOUT)
         
         return Response({
             'error': False,